@@ -5,6 +5,7 @@ from typing_extensions import TypedDict
 from agent.state import AgentState
 from agent.nodes import (
     node_user_query_input,
+    node_preroute,
     node_process_query,
     node_route_after_processing,
     node_collect_knowledge,
@@ -13,6 +14,7 @@ from agent.nodes import (
     node_memory_access,
     node_knowledge_collected,
     node_finalize_answer,
+    node_deliver_processing_answer,
     tool_node,
     tool_call_exists,
 )
@@ -23,11 +25,14 @@ class GraphConfig(TypedDict):
     Configuration for the graph.
     """
     model_name: Literal["anthropic", "openai"]
+    fast_path: bool
+    prerouter: bool
 
 
 workflow=StateGraph(AgentState, context_schema=GraphConfig)
 
 workflow.add_node("user_query_input", node_user_query_input)
+workflow.add_node("preroute", node_preroute)
 workflow.add_node("process_query", node_process_query)
 workflow.add_node("route_after_processing", node_route_after_processing)
 workflow.add_node("tools", tool_node)
@@ -36,9 +41,10 @@ workflow.add_node("web_search", node_web_search)
 workflow.add_node("memory_search", node_memory_access)
 workflow.add_node("knowledge_collected", node_knowledge_collected)
 workflow.add_node("finalize_answer", node_finalize_answer)
+workflow.add_node("deliver_processing_answer", node_deliver_processing_answer)
 
 workflow.add_edge(START, "user_query_input")
-workflow.add_edge("user_query_input", "process_query")
+workflow.add_edge("user_query_input", "preroute")
 workflow.add_edge("process_query", "route_after_processing")
 
 # collect knowledge and analyze again
@@ -56,6 +62,7 @@ workflow.add_conditional_edges(
     {True: "tools", False: END}
 )
 workflow.add_edge("tools", "finalize_answer")
+workflow.add_edge("deliver_processing_answer", END)
 
 graph: StateGraph = None
 # When running via 'langgraph dev', use the default store and checkpointer
@@ -1,14 +1,15 @@
 import json
+import uuid
 from typing import Literal
-from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import ToolNode
 from langgraph.types import Send, Command
 from langgraph.store.base import BaseStore
-from langchain_core.runnables import RunnableConfig
-from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
 from langsmith import traceable
 from agent.tools import all_tools
+from agent.prerouter import preroute
+from agent.routing import select_next_route_after_processing
 from agent.state import (
     AgentState,
     ProcessQueryState,
@@ -27,22 +28,20 @@ from utils.time import (
     local_time_zone,
     current_local_time
 )
-from config.config_loader import assistant_config, ASSISTANT_DEFAULT_NAME
+from utils.llm import get_chat_model
+from config.config_loader import app_config, assistant_config, ASSISTANT_DEFAULT_NAME
 
-def _get_processing_model(config: RunnableConfig) -> BaseChatModel:
+def _get_processing_model(config: RunnableConfig) -> Runnable:
     """
-    Returns a language model instance for query processing.
+    Returns a shared language model with structured output for query processing.
     """
-    model = ChatOpenAI(temperature=0.0, model_name="gpt-4o")
-    return model
+    return get_chat_model("gpt-4o", temperature=0.0, schema=ProcessQueryResult)
 
-def _get_final_answer_model(config: RunnableConfig) -> BaseChatModel:
+def _get_final_answer_model(config: RunnableConfig) -> Runnable:
     """
-    Returns a language model instance for final answer preparation.
+    Returns a shared language model with bound tools for final answer preparation.
     """
-    model = ChatOpenAI(temperature=0.5, model_name="gpt-4o")
-    model = model.bind_tools(all_tools)
-    return model
+    return get_chat_model("gpt-4o", temperature=0.5, tools=all_tools)
 
 
 # Define the function to execute tools
@@ -72,6 +71,43 @@ def node_user_query_input(state: AgentState) -> ProcessQueryState:
         "processing_iteration": 0
     }
 
+def prerouter_enabled(config: RunnableConfig) -> bool:
+    """
+    Returns whether trivial turns are pre-routed without the query processing model.
+    Enabled for all requests with the `agent_prerouter` app setting, or per request with `prerouter` in configurable.
+    """
+    return config.get('configurable', {}).get("prerouter", app_config.get("agent_prerouter", False))
+
+def node_preroute(state: ProcessQueryState, config: RunnableConfig) -> Command[Literal["process_query", "finalize_answer", "tools"]]:
+    """
+    Sends trivial turns (greetings, arithmetic, current date and time, ...) classified by the rule-based
+    pre-router straight to the final answer or to the matching tool, skipping query processing.
+    """
+    last_message = state["messages"][-1] if state.get("messages") else None
+    if not prerouter_enabled(config) or not isinstance(last_message, HumanMessage) \
+            or not isinstance(last_message.content, str):
+        return Command(goto="process_query")
+
+    routing = preroute(last_message.content)
+    if routing["route"] == "tools" and routing["tool"] not in {tool.name for tool in all_tools}:
+        routing["route"] = "process_query"
+    print(f"Pre-routing to: {routing['route']} ({routing['reason']})")
+    if routing["route"] == "process_query":
+        return Command(goto="process_query")
+
+    # Results of query processing from the previous turn must not leak into the final answer
+    update = {
+        "processing_summary": f"Query processing skipped, the query was recognized as: {routing['reason']}.",
+        "processing_answer": "",
+        "is_final_answer": False,
+        "requires_web_search": False,
+        "requires_long_term_memory_access": False,
+    }
+    if routing["route"] == "tools":
+        tool_call = {"name": routing["tool"], "args": routing["tool_args"], "id": f"preroute_{uuid.uuid4().hex}"}
+        update["messages"] = [AIMessage(content="", tool_calls=[tool_call])]
+    return Command(update=update, goto=routing["route"])
+
 @traceable(run_type="llm", name="Process User Query")
 def node_process_query(state: ProcessQueryState, config: RunnableConfig) -> ProcessQueryState:
     """ 
@@ -89,8 +125,7 @@ def node_process_query(state: ProcessQueryState, config: RunnableConfig) -> Proc
     )
     messages = state["messages"]
     
-    llm = _get_processing_model(config)
-    structured_llm = llm.with_structured_output(ProcessQueryResult)
+    structured_llm = _get_processing_model(config)
 
     response = structured_llm.invoke([SystemMessage(content=system_prompt)] + messages)
     print("Processing result:", response)
@@ -98,6 +133,7 @@ def node_process_query(state: ProcessQueryState, config: RunnableConfig) -> Proc
         "processing_iteration": processing_iteration,
         "processing_summary": response.summary,
         "processing_answer": response.answer,
+        "is_final_answer": response.is_final_answer,
         "requires_web_search": response.requires_web_search,
         "requires_long_term_memory_access": response.requires_long_term_memory_access,
         "instructions_for_web_search": response.instructions_for_web_search,
@@ -105,28 +141,7 @@ def node_process_query(state: ProcessQueryState, config: RunnableConfig) -> Proc
         "user": response.user,
     }
 
-def select_next_route_after_processing(state: ProcessQueryState, config: RunnableConfig) -> Literal["collect_knowledge", "finalize_answer"]:
-    """
-    Determines the next route after query processing based on iteration count and requirements.
-    """
-    processing_iteration = state.get("processing_iteration", 0)
-    max_processing_iterations = config.get('configurable', {}).get("max_processing_iterations", 3)
-    
-    # If max iterations reached, finalize answer
-    if processing_iteration >= max_processing_iterations:
-        print(f"Max processing iterations ({max_processing_iterations}) reached, finalizing answer.")
-        return "finalize_answer"
-    
-    # Check if knowledge collection is needed
-    if state.get("requires_long_term_memory_access") and not state.get("user"):
-        print("Warning: No user specified for long-term memory access")
-    
-    if state.get("requires_web_search") or (state.get("requires_long_term_memory_access") and state.get("user")):
-        return "collect_knowledge"
-    else:
-        return "finalize_answer"
-
-def node_route_after_processing(state: ProcessQueryState, config: RunnableConfig) -> Command[Literal["collect_knowledge", "finalize_answer"]]:
+def node_route_after_processing(state: ProcessQueryState, config: RunnableConfig) -> Command[Literal["collect_knowledge", "finalize_answer", "deliver_processing_answer"]]:
     """
     Router node that decides the next step after query processing.
     """
@@ -138,6 +153,7 @@ def node_route_after_processing(state: ProcessQueryState, config: RunnableConfig
         f"Instructions for memory access: {state.get('instructions_for_long_term_memory_access', '')}, "
         f"Processing summary: {state.get('processing_summary', '')}, "
         f"Processing answer: {state.get('processing_answer', '')}, "
+        f"Final answer: {state.get('is_final_answer', False)}, "
     )
     next_route = select_next_route_after_processing(state, config)
     print(f"Routing after processing to: {next_route}")
@@ -249,4 +265,11 @@ def node_finalize_answer(state: ProcessQueryState, config: RunnableConfig) -> Pr
 
     model = _get_final_answer_model(config)
     result = model.invoke(messages)
-    return {"messages": [result]}
\ No newline at end of file
+    return {"messages": [result]}
+
+def node_deliver_processing_answer(state: ProcessQueryState) -> ProcessQueryState:
+    """
+    Fast path: sends the final answer from query processing to the user,
+    without another call to the final answer model.
+    """
+    return {"messages": [AIMessage(content=state["processing_answer"])]}
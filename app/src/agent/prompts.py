@@ -27,6 +27,10 @@ Take into account all information collected so far from previous processing iter
 If the collected information already contains the answer, you can provide the final answer.
 Otherwise, determine the next steps needed to answer the user's query.
 
+Mark the answer as final only if it fully answers the user's query (or asks the needed follow-up question),
+is written as a reply to the user, and no web search, long-term memory access or tool (eg. calculations, date operations)
+is needed to complete it. Such an answer is sent to the user as is, without further refinement.
+
 <memory_access_registry>
 {memory_access_registry}
 </memory_access_registry>
@@ -0,0 +1,38 @@
+"""
+Routing decisions of the agent graph, kept apart from the nodes so that they can be tested
+without the LLMs, tools and subgraphs the nodes depend on.
+"""
+from typing import Literal
+from langchain_core.runnables import RunnableConfig
+from agent.state import ProcessQueryState
+from config.config_loader import app_config
+
+def fast_path_enabled(config: RunnableConfig) -> bool:
+    """
+    Returns whether final answers from query processing are sent to the user directly.
+    Enabled for all requests with the `agent_fast_path` app setting, or per request with `fast_path` in configurable.
+    """
+    return config.get('configurable', {}).get("fast_path", app_config.get("agent_fast_path", False))
+
+def select_next_route_after_processing(state: ProcessQueryState, config: RunnableConfig) -> Literal["collect_knowledge", "finalize_answer", "deliver_processing_answer"]:
+    """
+    Determines the next route after query processing based on iteration count and requirements.
+    In fast path mode, a final answer that needs no knowledge collection skips the final answer model.
+    """
+    processing_iteration = state.get("processing_iteration", 0)
+    max_processing_iterations = config.get('configurable', {}).get("max_processing_iterations", 3)
+    
+    # If max iterations reached, finalize answer
+    if processing_iteration >= max_processing_iterations:
+        print(f"Max processing iterations ({max_processing_iterations}) reached, finalizing answer.")
+        return "finalize_answer"
+    
+    # Check if knowledge collection is needed
+    if state.get("requires_long_term_memory_access") and not state.get("user"):
+        print("Warning: No user specified for long-term memory access")
+    
+    if state.get("requires_web_search") or (state.get("requires_long_term_memory_access") and state.get("user")):
+        return "collect_knowledge"
+    if fast_path_enabled(config) and state.get("is_final_answer") and state.get("processing_answer"):
+        return "deliver_processing_answer"
+    return "finalize_answer"
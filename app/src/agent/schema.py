@@ -12,6 +12,10 @@ class ProcessQueryResult(BaseModel):
     answer: str = Field(
         description="The answer to the user's query.",
     )
+    is_final_answer: bool = Field(
+        default=False,
+        description="Whether the answer is complete and ready to be sent to the user as is, without collecting more information, calling tools or further refinement.",
+    )
     requires_web_search: bool = Field(
         description="Whether the query requires a web search to answer, eg. if user asks for current events (publicly known)",
     )
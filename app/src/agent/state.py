@@ -33,6 +33,7 @@ class ProcessQueryState(CollectedKnowledgeState):
     user_preferences: Annotated[Optional[dict], ..., "The user preferences that may influence the answer generation."]
     processing_summary: Annotated[str, ..., "A concise summary of the query processing and decisions made."]
     processing_answer: Annotated[str, ..., "The answer to the user's query from processing."]
+    is_final_answer: Annotated[bool, ..., "Whether the answer from processing can be sent to the user as is."]
     requires_web_search: Annotated[bool, ..., "Whether the query requires a web search to answer, eg. if user asks for current events (publicly known)"]
     requires_long_term_memory_access: Annotated[bool, ..., "Whether the query requires access to long-term memory to answer, eg user refers to past conversations or personal data. The user name is required to access long-term memory."]
     instructions_for_web_search: Annotated[Optional[str], ..., "Specific instructions or search queries for the web search agent."]
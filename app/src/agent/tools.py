@@ -8,7 +8,7 @@ from langchain_community.utilities import ArxivAPIWrapper,WikipediaAPIWrapper
 from langchain_community.tools import ArxivQueryRun,WikipediaQueryRun
 from pydantic import BaseModel, Field
 from utils.time import current_local_time, current_utc_time, local_time_zone
-from langchain_google_community import GoogleSearchAPIWrapper
+from utils.search import google_search
 from langchain_tavily import TavilySearch
 
 log = logging.getLogger(__name__)
@@ -245,12 +245,7 @@ def google_web_search(query: str) -> str:
     """
     Searches the web using Google Custom Search Engine (CSE) and returns the top results.
     """
-
-    google_search = GoogleSearchAPIWrapper(
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        google_cse_id=os.getenv("GOOGLE_CSE_ID")
-    )
-    results = google_search.results(query=query, num_results=5)
+    results = google_search(query=query, num_results=5)
     log.debug("Google search results for query '%s': %s", query, results)
     return results
 
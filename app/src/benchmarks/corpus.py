@@ -0,0 +1,34 @@
+import os
+import json
+from typing import TypedDict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES_DIR = os.path.join(FIXTURES_DIR, "pages")
+
+
+class CorpusQuery(TypedDict):
+    """
+    A query about one of the corpus pages along with strings expected in the answer.
+    """
+    page: str
+    query: str
+    answers: list[str]
+
+
+def load_pages() -> dict[str, bytes]:
+    """
+    Returns raw HTML of all corpus pages keyed by file name.
+    """
+    pages = {}
+    for file_name in sorted(os.listdir(PAGES_DIR)):
+        if file_name.endswith(".html"):
+            with open(os.path.join(PAGES_DIR, file_name), "rb") as file:
+                pages[file_name] = file.read()
+    return pages
+
+def load_queries() -> list[CorpusQuery]:
+    """
+    Returns labeled queries about the corpus pages.
+    """
+    with open(os.path.join(FIXTURES_DIR, "relevance_queries.jsonl"), "r", encoding="utf-8") as file:
+        return [CorpusQuery(**json.loads(line)) for line in file if line.strip()]
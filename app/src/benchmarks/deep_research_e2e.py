@@ -0,0 +1,164 @@
+"""
+End-to-end benchmark of the deep research graph, run offline against a local stand-in for the web.
+
+The fixture corpus is served by an in-process HTTP server and searched with a local BM25 index
+(the "local" search backend), pages go through the regular fetching and conversion pipeline.
+LLM calls are answered by a deterministic offline model (see benchmarks.offline_llm), unless --openai
+is given. Caches are disabled, so that every run does the same work.
+
+Reports per-node timings, pages fetched, bytes converted and whether the research findings
+contain the expected answers of the labeled queries.
+
+Usage (from app/src):
+    python -m benchmarks.deep_research_e2e
+    python -m benchmarks.deep_research_e2e --queries 5 --max-research-loops 1
+"""
+import time
+import logging
+import argparse
+import threading
+import functools
+from collections import defaultdict
+from contextlib import ExitStack
+from unittest.mock import patch
+from langchain_core.messages import HumanMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from config.config_loader import app_config
+from utils.http import fetch_page, register_fetch_backend
+from utils.llm import clear_chat_models
+from benchmarks.corpus import load_queries
+from benchmarks.local_web import LocalWeb
+from benchmarks.offline_llm import OfflineChatModel
+from benchmarks.relevance_filter import contains_answers
+
+BENCHMARK_SETTINGS = {
+    "search_backend": "local",
+    "fetch_backend": "counting",
+    "fetch_cache_enabled": False,
+    "analysis_cache_enabled": False,
+    "search_cache_enabled": False,
+    # all pages are served by one local host, don't throttle it like a real site
+    "scraping_domain_overrides": {"127.0.0.1": {"concurrency": 16, "rate_per_second": 0}},
+}
+GRAPH_NAMES = ("deep-research-agent", "web_page_analyzer")
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Records wall-clock time of every graph node run, keyed by "<graph>/<node>".
+    """
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self._graph_runs = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        with self._lock:
+            if name in GRAPH_NAMES:
+                self._graph_runs[run_id] = name
+            elif parent_run_id in self._graph_runs and name == (metadata or {}).get("langgraph_node"):
+                self._started[run_id] = (f"{self._graph_runs[parent_run_id]}/{name}", time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _finish(self, run_id):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if started:
+                self.durations[started[0]].append(time.perf_counter() - started[1])
+
+
+class FetchCounter:
+    """
+    Page fetching backend counting pages and bytes passed on to the HTML to markdown conversion.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, headers=None):
+        page = fetch_page(url, headers)
+        with self._lock:
+            self.pages += 1
+            self.bytes += len(page["raw"])
+        return page
+
+
+def run_benchmark(queries_count: int, max_research_loops: int, use_openai: bool):
+    app_config.config.update(BENCHMARK_SETTINGS)
+    fetch_counter = FetchCounter()
+    register_fetch_backend("counting", fetch_counter)
+    # the graphs are imported after the settings are changed, as some of them are read at import
+    from deep_research.graph import graph
+
+    queries = load_queries()[:queries_count]
+    # reflection asks another labeled question about the same page as the follow-up
+    follow_up_queries = {}
+    for query in queries:
+        same_page = [other["query"] for other in load_queries() if other["page"] == query["page"] and other != query]
+        if same_page and max_research_loops > 1:
+            follow_up_queries[query["query"]] = same_page[0]
+
+    timer = NodeTimer()
+    with LocalWeb() as web, ExitStack() as stack:
+        if not use_openai:
+            chat_model = functools.partial(OfflineChatModel, follow_up_queries=follow_up_queries)
+            stack.enter_context(patch("utils.llm.ChatOpenAI", chat_model))
+            # shared models are created by the patched factory and dropped when the benchmark ends
+            clear_chat_models()
+            stack.callback(clear_chat_models)
+
+        print(f"Corpus: {len(web.server.pages)} pages served at {web.server.base_url}, {len(queries)} queries, "
+              f"LLM: {'OpenAI' if use_openai else 'offline'}")
+        print(f"{'query':<60} {'seconds':>8} {'loops':>6} {'pages':>6} {'KB':>7} {'tokens':>7} {'answers':>8}")
+        total_started = time.perf_counter()
+        retained = 0
+        for query in queries:
+            pages_before, bytes_before = fetch_counter.pages, fetch_counter.bytes
+            started = time.perf_counter()
+            result = graph.invoke(
+                {"messages": [HumanMessage(query["query"])]},
+                config={
+                    "callbacks": [timer],
+                    "configurable": {"max_research_loops": max_research_loops},
+                },
+            )
+            elapsed = time.perf_counter() - started
+            found = contains_answers("\n".join(result.get("findings", [])), query["answers"])
+            retained += found
+            print(f"{query['query'][:60]:<60} {elapsed:>8.2f} {result.get('research_loop_count', 0):>6} "
+                  f"{fetch_counter.pages - pages_before:>6} {(fetch_counter.bytes - bytes_before) / 1024:>7.1f} "
+                  f"{result.get('tokens_used', 0):>7} {'yes' if found else 'no':>8}")
+        total_elapsed = time.perf_counter() - total_started
+
+    print(f"\nTotal: {total_elapsed:.2f}s, {fetch_counter.pages} pages fetched "
+          f"({web.server.requests} HTTP requests), {fetch_counter.bytes / 1024:.1f} KB converted, "
+          f"answers found for {retained}/{len(queries)} queries")
+    print(f"\n{'node':<50} {'runs':>5} {'total s':>8} {'mean ms':>8} {'max ms':>8}")
+    for node, durations in sorted(timer.durations.items(), key=lambda item: sum(item[1]), reverse=True):
+        print(f"{node:<50} {len(durations):>5} {sum(durations):>8.2f} "
+              f"{sum(durations) / len(durations) * 1000:>8.1f} {max(durations) * 1000:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=None, help="Number of labeled queries to run (default all).")
+    parser.add_argument("--max-research-loops", type=int, default=2, help="Maximum number of research loops.")
+    parser.add_argument("--openai", action="store_true",
+                        help="Use OpenAI models (needs OPENAI_API_KEY) instead of the offline model.")
+    args = parser.parse_args()
+    # keep the report readable, eg. "No new URLs to analyze" warnings are expected
+    logging.basicConfig(level=logging.ERROR)
+    run_benchmark(args.queries, args.max_research_loops, args.openai)
+
+
+if __name__ == "__main__":
+    main()
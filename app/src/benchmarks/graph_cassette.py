@@ -0,0 +1,92 @@
+"""
+Runs a graph from langgraph.json while recording its HTTP traffic (LLM calls, searches, page
+downloads) into a cassette, or replays a recorded cassette without network access.
+
+Replaying with zero latency measures the Python overhead of the graph separately from network
+time, --profile writes cProfile statistics of the run (view with `python -m pstats` or snakeviz).
+Fetch, search and analysis caches are disabled, so that all requests of the run hit the network
+while recording and the same requests are made when replaying.
+
+Usage (from app/src):
+    python -m benchmarks.graph_cassette record deep-research run.json.gz --query "When does the 2025 F1 season start?"
+    python -m benchmarks.graph_cassette replay deep-research run.json.gz --query "When does the 2025 F1 season start?" \\
+        --latency zero --profile run.prof
+    python -m benchmarks.graph_cassette record web-page-analyzer page.json.gz \\
+        --input '{"url": "https://example.com", "search_query": "example"}'
+"""
+import os
+import json
+import time
+import cProfile
+import argparse
+import importlib
+from config.config_loader import app_config
+from utils.cassette import Cassette
+
+LANGGRAPH_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "langgraph.json")
+CASSETTE_SETTINGS = {
+    "fetch_cache_enabled": False,
+    "analysis_cache_enabled": False,
+    "search_cache_enabled": False,
+}
+
+
+def load_graph(name: str):
+    """
+    Imports the graph registered under the name in langgraph.json (eg. "./deep_research/graph.py:graph").
+    """
+    with open(LANGGRAPH_CONFIG_PATH, "r", encoding="utf-8") as file:
+        graphs = json.load(file)["graphs"]
+    if name not in graphs:
+        raise SystemExit(f"Unknown graph {name}, available graphs: {', '.join(graphs)}")
+    path, attribute = graphs[name].split(":")
+    module_name = path.removeprefix("./").removesuffix(".py").replace("/", ".")
+    return getattr(importlib.import_module(module_name), attribute)
+
+def run(mode: str, graph_name: str, cassette_path: str, graph_input: dict, latency: str,
+        profile_path: str | None):
+    app_config.config.update(CASSETTE_SETTINGS)
+    graph = load_graph(graph_name)
+    profiler = cProfile.Profile() if profile_path else None
+
+    with Cassette(cassette_path, mode=mode, latency=latency) as cassette:
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        result = graph.invoke(graph_input, config={"configurable": {"thread_id": f"cassette-{graph_name}"}})
+        if profiler:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+    interactions = len(cassette.interactions)
+    print(f"{mode.capitalize()}: {graph_name}, {interactions} HTTP interactions ({cassette_path})")
+    if mode == "replay" and latency == "zero":
+        print(f"Wall time (Python overhead): {elapsed:.2f}s, recorded network time: {cassette.network_seconds:.2f}s")
+    else:
+        print(f"Wall time: {elapsed:.2f}s, network time: {cassette.network_seconds:.2f}s, "
+              f"Python overhead: {max(elapsed - cassette.network_seconds, 0):.2f}s")
+    messages = result.get("messages") if isinstance(result, dict) else None
+    if messages:
+        print(f"\nAnswer:\n{messages[-1].content}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("graph", help="Graph name from langgraph.json (eg. deep-research).")
+    parser.add_argument("cassette", help="Cassette file (gzipped JSON).")
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument("--query", help="User message, for graphs with messages state.")
+    input_group.add_argument("--input", help="Graph input as JSON.")
+    parser.add_argument("--latency", choices=["original", "zero"], default="original",
+                        help="Replay responses after their recorded latency or immediately.")
+    parser.add_argument("--profile", help="Write cProfile statistics of the graph run to this file.")
+    args = parser.parse_args()
+
+    graph_input = json.loads(args.input) if args.input else {"messages": [{"role": "user", "content": args.query}]}
+    run(args.mode, args.graph, args.cassette, graph_input, args.latency, args.profile)
+
+
+if __name__ == "__main__":
+    main()
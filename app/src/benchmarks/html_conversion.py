@@ -0,0 +1,80 @@
+"""
+Benchmark of the HTML to markdown conversion engines.
+
+Converts every page of the fixture corpus with each engine and reports throughput
+(pages/s, MB/s of HTML) and peak memory. Every engine runs in a fresh process,
+so that its peak resident memory is not affected by the other engines.
+
+Usage (from app/src):
+    python -m benchmarks.html_conversion
+    python -m benchmarks.html_conversion --engines lxml --repeat 50 --main-content
+"""
+import argparse
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from benchmarks.corpus import load_pages
+from utils.http import sniff_charset
+from web_page_analyzer.utils import MARKDOWN_CONVERTERS, html_to_markdown
+
+
+def measure_engine(engine: str, repeat: int, extract_main_content: bool) -> dict:
+    """
+    Converts the corpus `repeat` times with the engine and returns the measurements.
+    Runs in a worker process.
+    """
+    pages = [raw.decode(sniff_charset(raw) or "utf-8") for raw in load_pages().values()]
+    html_bytes = sum(len(page.encode("utf-8")) for page in pages)
+    # warm up (imports, regex compilation)
+    html_to_markdown(pages[0], main_content_only=extract_main_content, engine=engine)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            html_to_markdown(page, main_content_only=extract_main_content, engine=engine)
+    elapsed = time.perf_counter() - started
+
+    # python heap peak of a single pass, measured separately as tracing slows the conversion down
+    tracemalloc.start()
+    for page in pages:
+        html_to_markdown(page, main_content_only=extract_main_content, engine=engine)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "engine": engine,
+        "pages": len(pages) * repeat,
+        "seconds": elapsed,
+        "html_mb": html_bytes * repeat / 1024 / 1024,
+        "traced_peak_mb": traced_peak / 1024 / 1024,
+        # ru_maxrss is in kilobytes on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def run_benchmark(engines: list[str], repeat: int, extract_main_content: bool):
+    pages = load_pages()
+    print(f"Corpus: {len(pages)} pages, {sum(map(len, pages.values())) / 1024:.0f} KB, "
+          f"repeat: {repeat}, main content extraction: {'on' if extract_main_content else 'off'}")
+    print(f"{'engine':>12} {'pages/s':>9} {'MB/s':>7} {'heap peak MB':>13} {'max RSS MB':>11}")
+    for engine in engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            result = executor.submit(measure_engine, engine, repeat, extract_main_content).result()
+        print(f"{engine:>12} {result['pages'] / result['seconds']:>9.1f} "
+              f"{result['html_mb'] / result['seconds']:>7.2f} "
+              f"{result['traced_peak_mb']:>13.1f} {result['max_rss_mb']:>11.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=list(MARKDOWN_CONVERTERS), default=list(MARKDOWN_CONVERTERS),
+                        help="Engines to evaluate.")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of passes over the corpus.")
+    parser.add_argument("--main-content", action="store_true",
+                        help="Extract main content of the pages before the conversion.")
+    args = parser.parse_args()
+    run_benchmark(args.engines, args.repeat, args.main_content)
+
+
+if __name__ == "__main__":
+    main()
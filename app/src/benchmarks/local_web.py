@@ -0,0 +1,137 @@
+"""
+Local stand-in for the web: an in-process HTTP server serving the fixture corpus
+and a search index over it, registered as the "local" search backend.
+
+    with LocalWeb() as web:
+        web.search("sourdough bulk fermentation", 3)  # [{"title": ..., "link": "http://127.0.0.1:.../...", ...}]
+"""
+import re
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from benchmarks.corpus import load_pages
+from utils.http import sniff_charset
+from utils.search import register_search_backend
+from web_page_analyzer.utils import html_to_text, split_into_chunks
+from web_page_analyzer.relevance import TermIndex
+
+log = logging.getLogger(__name__)
+
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+SNIPPET_MAX_CHARS = 160
+SNIPPET_SECTION_TOKENS = 40
+
+
+class LocalWebServer:
+    """
+    HTTP server serving the fixture pages at /pages/<file name> from a background thread.
+    Counts requests and bytes served.
+    """
+
+    def __init__(self, pages: dict[str, bytes]):
+        self.pages = pages
+        self.requests = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, page: str) -> str:
+        """
+        Returns URL of the fixture page.
+        """
+        return f"{self.base_url}/pages/{page}"
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.pages.get(self.path.removeprefix("/pages/"))
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_served += len(body)
+
+            def log_message(self, format, *args):
+                log.debug("Local web: " + format, *args)
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-web", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class LocalSearchIndex:
+    """
+    BM25 search over the fixture pages, returning results in the Google CSE format
+    (title, link and the best matching passage as the snippet).
+    """
+
+    def __init__(self, pages: dict[str, bytes], url_of):
+        self.results = []
+        texts = []
+        self.passages = []
+        for name, raw in pages.items():
+            html = raw.decode(sniff_charset(raw) or "utf-8", errors="replace")
+            title = TITLE_PATTERN.search(html)
+            text = html_to_text(html)
+            self.results.append({"title": title.group(1).strip() if title else name, "link": url_of(name)})
+            texts.append(text)
+            self.passages.append(split_into_chunks(text, SNIPPET_SECTION_TOKENS))
+        self.index = TermIndex(texts)
+
+    def search(self, query: str, num_results: int) -> list[dict]:
+        scores = self.index.bm25_scores(query)
+        ranked = [idx for idx in sorted(range(len(scores)), key=lambda i: scores[i], reverse=True) if scores[idx] > 0]
+        return [
+            {**self.results[idx], "snippet": self._snippet(idx, query)}
+            for idx in ranked[:num_results]
+        ]
+
+    def _snippet(self, idx: int, query: str) -> str:
+        passages = self.passages[idx]
+        scores = TermIndex(passages).bm25_scores(query)
+        best = max(range(len(passages)), key=lambda i: scores[i])
+        return " ".join(passages[best].split())[:SNIPPET_MAX_CHARS]
+
+
+class LocalWeb:
+    """
+    Serves the fixture corpus and registers its search index as the "local" search backend
+    (select it with the search_backend setting).
+    """
+
+    def __init__(self, pages: Optional[dict[str, bytes]] = None):
+        self.server = LocalWebServer(pages if pages is not None else load_pages())
+        self.index = LocalSearchIndex(self.server.pages, self.server.url)
+        register_search_backend("local", self.index.search)
+
+    def search(self, query: str, num_results: int) -> list[dict]:
+        return self.index.search(query, num_results)
+
+    def __enter__(self) -> "LocalWeb":
+        self.server.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.stop()
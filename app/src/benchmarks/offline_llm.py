@@ -0,0 +1,119 @@
+"""
+Deterministic, offline stand-in for the OpenAI chat models used by the deep research graphs.
+
+Instead of calling an LLM, it answers the prompts of deep research and web page analyzer
+with simple extractive heuristics (eg. the page sentences sharing most terms with the query),
+so that the research pipeline runs end-to-end without network access, with token usage
+estimated from the prompt and response sizes.
+"""
+import re
+from typing import Any, Optional
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.chat_models import BaseChatModel
+from deep_research.schema import Reflection, WebResearchInput, WebResearchQuery
+from web_page_analyzer.relevance import tokenize
+from utils.tokens import estimate_tokens
+
+RESEARCH_TOPIC_PATTERNS = [
+    re.compile(r"\*Research topic:\*\n(.*?)\n\*End of research topic\*", re.DOTALL),
+    re.compile(r"on the following subject:\n(.*?)\.\n\nInstructions", re.DOTALL),
+]
+SEARCH_QUERY_PATTERN = re.compile(r"Current search query: (.*)")
+CONTENT_MARKERS = ("Content to analyze (till the end of the text):\n", "Partial analyses:\n", "Findings:\n",
+                   "Results of web research:\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+ANALYSIS_SENTENCES = 3
+MAX_RESPONSE_CHARS = 2000
+
+
+def _research_topic(prompt: str) -> str:
+    for pattern in RESEARCH_TOPIC_PATTERNS:
+        match = pattern.search(prompt)
+        if match:
+            return match.group(1).strip()
+    return ""
+
+def _content(prompt: str) -> str:
+    for marker in CONTENT_MARKERS:
+        if marker in prompt:
+            return prompt.split(marker, 1)[1]
+    return ""
+
+def _best_sentences(text: str, query: str, count: int) -> list[str]:
+    """
+    Returns the sentences of the text sharing most terms with the query, in the original order.
+    """
+    query_terms = set(tokenize(query))
+    sentences = [" ".join(sentence.split()) for sentence in SENTENCE_END.split(text) if sentence.strip()]
+    scores = [len(query_terms & set(tokenize(sentence))) for sentence in sentences]
+    best = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)[:count]
+    return [sentences[i] for i in sorted(best) if scores[i] > 0]
+
+
+class OfflineChatModel(BaseChatModel):
+    """
+    Chat model answering deep research prompts without an LLM, see the module docstring.
+    Accepts (and ignores) the ChatOpenAI constructor arguments.
+    Reflection asks the follow-up query given in follow_up_queries for the research topic, if any.
+    """
+    model: str = "offline"
+    temperature: float = 0.0
+    max_retries: int = 0
+    api_key: Optional[Any] = None
+    http_client: Optional[Any] = None
+    http_async_client: Optional[Any] = None
+    follow_up_queries: dict[str, str] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "offline"
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = self._respond(prompt)
+        message = AIMessage(content=content, usage_metadata=self._usage(prompt, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _respond(self, prompt: str) -> str:
+        content = _content(prompt)
+        if prompt.startswith("You are an expert data analyst"):
+            query = SEARCH_QUERY_PATTERN.search(prompt)
+            sentences = _best_sentences(content, query.group(1) if query else prompt, ANALYSIS_SENTENCES)
+            if not sentences:
+                return "No relevant information found"
+            return " ".join(sentences) + "\nConfidence level: 7"
+        return content.strip()[:MAX_RESPONSE_CHARS]
+
+    @staticmethod
+    def _usage(prompt: str, content: str) -> dict:
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        def respond(prompt) -> Any:
+            prompt = prompt if isinstance(prompt, str) else str(prompt)
+            parsed = self._structured_response(schema, prompt)
+            if not include_raw:
+                return parsed
+            raw = AIMessage(content=parsed.model_dump_json(), usage_metadata=self._usage(prompt, parsed.model_dump_json()))
+            return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+        return RunnableLambda(respond, name=f"Offline{schema.__name__}")
+
+    def _structured_response(self, schema, prompt: str):
+        topic = _research_topic(prompt)
+        if schema is WebResearchInput:
+            return WebResearchInput(
+                user_query=topic,
+                web_research_queries=[WebResearchQuery(query=topic, rationale="Answers the user question.")],
+            )
+        if schema is Reflection:
+            follow_up_query = self.follow_up_queries.get(topic)
+            return Reflection(
+                is_sufficient=follow_up_query is None,
+                knowledge_gap=f"More details on: {follow_up_query}" if follow_up_query else "",
+                follow_up_queries=[follow_up_query] if follow_up_query else [],
+            )
+        raise ValueError(f"Unsupported structured output schema: {schema.__name__}")
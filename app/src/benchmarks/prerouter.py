@@ -0,0 +1,90 @@
+"""
+Routing accuracy of the agent pre-router on labeled user turns.
+
+Reports the share of turns routed as labeled, the mistakes, and the precision of the routes skipping
+query processing (a turn wrongly pre-routed gets a wrong answer, while a trivial turn left to query
+processing only costs an LLM call).
+
+Usage (from app/src):
+    python -m benchmarks.prerouter
+    python -m benchmarks.prerouter --fixture my_turns.jsonl
+"""
+import os
+import json
+import time
+import argparse
+from typing import Optional, TypedDict
+from collections import Counter
+from benchmarks.corpus import FIXTURES_DIR
+from agent.prerouter import preroute
+
+PREROUTER_FIXTURE_PATH = os.path.join(FIXTURES_DIR, "prerouter_queries.jsonl")
+
+
+class LabeledTurn(TypedDict):
+    """
+    A user turn with the expected pre-router route and tool.
+    """
+    query: str
+    route: str
+    tool: Optional[str]
+
+
+def load_labeled_turns(path: str = PREROUTER_FIXTURE_PATH) -> list[LabeledTurn]:
+    """
+    Returns labeled user turns for the pre-router.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return [LabeledTurn(**json.loads(line)) for line in file if line.strip()]
+
+def evaluate(turns: list[LabeledTurn]) -> dict:
+    """
+    Routes the turns and compares the decisions with the labels.
+
+    Returns:
+        Dictionary with accuracy, mistakes (turn, routing), and per-label counts of predictions
+        and correct predictions (labels are "<route>" or "<route>:<tool>")
+    """
+    mistakes = []
+    predicted, correct = Counter(), Counter()
+    for turn in turns:
+        routing = preroute(turn["query"])
+        label = f"{routing['route']}:{routing['tool']}" if routing["tool"] else routing["route"]
+        predicted[label] += 1
+        if routing["route"] == turn["route"] and routing["tool"] == turn["tool"]:
+            correct[label] += 1
+        else:
+            mistakes.append((turn, routing))
+    return {
+        "accuracy": 1 - len(mistakes) / len(turns) if turns else 1.0,
+        "mistakes": mistakes,
+        "predicted": predicted,
+        "correct": correct,
+    }
+
+def run_benchmark(path: str):
+    turns = load_labeled_turns(path)
+    started = time.perf_counter()
+    result = evaluate(turns)
+    elapsed_us = (time.perf_counter() - started) * 1e6 / len(turns)
+
+    print(f"Turns: {len(turns)}, accuracy: {result['accuracy']:.1%}, {elapsed_us:.1f} us/turn")
+    print(f"\n{'route':<40} {'predicted':>9} {'precision':>9}")
+    for label, count in sorted(result["predicted"].items()):
+        print(f"{label:<40} {count:>9} {result['correct'][label] / count:>9.0%}")
+    if result["mistakes"]:
+        print("\nMistakes:")
+        for turn, routing in result["mistakes"]:
+            expected = f"{turn['route']}:{turn['tool']}" if turn["tool"] else turn["route"]
+            got = f"{routing['route']}:{routing['tool']}" if routing["tool"] else routing["route"]
+            print(f"  {turn['query'][:60]:<60} expected {expected}, got {got} ({routing['reason']})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=PREROUTER_FIXTURE_PATH, help="Labeled turns (JSON lines).")
+    args = parser.parse_args()
+    run_benchmark(args.fixture)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of the web page analyzer relevance filter.
+
+Measures how many tokens the BM25 relevance filter saves on the fixture corpus
+and whether the selected sections still contain the expected answers.
+
+Usage (from app/src):
+    python -m benchmarks.relevance_filter
+    python -m benchmarks.relevance_filter --budgets 300 600 --section-tokens 80
+"""
+import argparse
+import time
+from benchmarks.corpus import load_pages, load_queries
+from utils.http import sniff_charset
+from web_page_analyzer.utils import html_to_markdown
+from web_page_analyzer.relevance import select_relevant_sections
+from utils.tokens import estimate_tokens
+
+
+def contains_answers(text: str, answers: list[str]) -> bool:
+    """
+    Checks whether all expected answers are present in the text.
+    Markdown escapes (eg. "\\_") are ignored.
+    """
+    text = text.replace("\\", "").lower()
+    return all(answer.lower() in text for answer in answers)
+
+def run_benchmark(budgets: list[int], top_k: int, section_tokens: int, extract_main_content: bool):
+    pages = load_pages()
+    queries = load_queries()
+    markdown_pages = {
+        name: html_to_markdown(raw.decode(sniff_charset(raw) or "utf-8"), main_content_only=extract_main_content)
+        for name, raw in pages.items()
+    }
+
+    baseline_tokens = sum(estimate_tokens(markdown_pages[query["page"]]) for query in queries)
+    baseline_retained = sum(contains_answers(markdown_pages[query["page"]], query["answers"]) for query in queries)
+    print(f"Corpus: {len(pages)} pages, {len(queries)} labeled queries, "
+          f"main content extraction: {'on' if extract_main_content else 'off'}")
+    print(f"{'budget':>8} {'tokens':>8} {'saved':>7} {'retained':>9} {'ms/page':>8}")
+    print(f"{'none':>8} {baseline_tokens:>8} {0:>6.0%} {baseline_retained:>4}/{len(queries):<4} {'-':>8}")
+
+    for budget in budgets:
+        tokens = 0
+        retained = 0
+        started = time.perf_counter()
+        for query in queries:
+            selection = select_relevant_sections(
+                markdown_pages[query["page"]],
+                query["query"],
+                token_budget=budget,
+                top_k=top_k,
+                section_tokens=section_tokens,
+            )
+            tokens += selection["tokens_after"]
+            retained += contains_answers(selection["text"], query["answers"])
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        saved = 1 - tokens / baseline_tokens
+        print(f"{budget:>8} {tokens:>8} {saved:>6.0%} {retained:>4}/{len(queries):<4} {elapsed_ms:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[200, 400, 800],
+                        help="Token budgets to evaluate.")
+    parser.add_argument("--top-k", type=int, default=12, help="Maximum number of selected sections.")
+    parser.add_argument("--section-tokens", type=int, default=100, help="Section size in tokens.")
+    parser.add_argument("--no-main-content", action="store_true",
+                        help="Convert whole pages instead of their main content.")
+    args = parser.parse_args()
+    run_benchmark(args.budgets, args.top_k, args.section_tokens, not args.no_main_content)
+
+
+if __name__ == "__main__":
+    main()
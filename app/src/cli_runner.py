@@ -3,10 +3,13 @@
 import logging
 import sys
 import uuid
+import argparse
 from langchain_core.messages import HumanMessage
 from agent.graph import graph as agent_graph
 from agent.state import AgentState
 from config.config_loader import assistant_config
+from runner.streaming import stream_answer
+from runner.batch import BatchRunner
 
 logging.basicConfig(level=logging.WARN)
 logger = logging.getLogger(__name__)
@@ -16,9 +19,10 @@ class AssistantRunner:
     Console application runner for the AI assistant.
     """
     
-    def __init__(self):
+    def __init__(self, stream: bool = False):
         self.assistant_name = assistant_config.get("assistant_name", "Assistant")
         self.graph = agent_graph
+        self.stream = stream
         self.thread_id = str(uuid.uuid4())
         self.config = {"configurable": {"thread_id": self.thread_id, "model_name": "openai"}}
         
@@ -79,6 +83,42 @@ class AssistantRunner:
             logger.error("Unexpected error processing query: %s", str(e))
             return "I'm sorry, I encountered an unexpected error while processing your request."
     
+    def stream_user_query(self, user_input: str) -> str:
+        """
+        Process user query through the agent graph, printing progress of the graph (and subgraph) nodes
+        and the tokens of the final answer as they arrive.
+        Time to first token and total time are printed after the answer.
+        """
+        answer_started = False
+
+        def print_token(token: str):
+            nonlocal answer_started
+            if not answer_started:
+                answer_started = True
+                print(f"\n🤖 {self.assistant_name}: ", end="")
+            print(token, end="", flush=True)
+
+        try:
+            result = stream_answer(
+                self.graph,
+                AgentState(messages=[HumanMessage(content=user_input)]),
+                self.config,
+                on_token=print_token,
+                on_progress=lambda stage: print(f"  ⏳ {stage}", flush=True),
+            )
+        except Exception as e:
+            logger.error("Error streaming query: %s", str(e))
+            print(f"\n❌ I encountered an error while processing your request: {e}")
+            return ""
+
+        if not result["answer"]:
+            print(f"\n🤖 {self.assistant_name}: I'm sorry, I couldn't process your request at the moment.", end="")
+        time_to_first_token = result["time_to_first_token"]
+        print(f"\n\n⏱️ Time to first token: "
+              f"{f'{time_to_first_token:.2f}s' if time_to_first_token is not None else '-'}, "
+              f"total: {result['total_seconds']:.2f}s")
+        return result["answer"]
+
     def run_chat_loop(self):
         """Main chat loop."""
         self.print_welcome_message()
@@ -94,11 +134,14 @@ class AssistantRunner:
                 if not user_input:
                     continue
                 
-                print(f"\n🤖 {self.assistant_name}: ", end="")
-                
-                # Process the query and get response
-                response = self.process_user_query(user_input)
-                print(response)
+                if self.stream:
+                    self.stream_user_query(user_input)
+                else:
+                    print(f"\n🤖 {self.assistant_name}: ", end="")
+
+                    # Process the query and get response
+                    response = self.process_user_query(user_input)
+                    print(response)
                 
                 self.print_separator()
                 
@@ -114,10 +157,23 @@ def run_assistant():
     """
     Main function to run the assistant application.
     """
+    parser = argparse.ArgumentParser(description="Console application for the AI assistant.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Print answer tokens as they arrive, along with progress of the graph stages.")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Run conversations from the JSONL file non-interactively instead of the chat loop.")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="Batch mode: JSONL file for the per-turn answers, latency and token usage.")
+    parser.add_argument("--workers", type=int, default=4, help="Batch mode: number of conversations run in parallel.")
+    args = parser.parse_args()
+
+    if args.batch:
+        BatchRunner(agent_graph, workers=args.workers).run(args.batch, args.output)
+        return
     logger.info("Starting the assistant application...")
     
     try:
-        runner = AssistantRunner()
+        runner = AssistantRunner(stream=args.stream)
         runner.run_chat_loop()
     except Exception as e:
         logger.error("Failed to start assistant: %s", str(e))
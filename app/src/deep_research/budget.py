@@ -0,0 +1,190 @@
+import math
+import time
+import logging
+from typing import Optional, TypedDict
+from deep_research.configuration import Configuration
+from utils.usage import usage_cost
+
+log = logging.getLogger(__name__)
+
+# Prior estimates, used until the spend of the first research loop is known
+PAGE_TOKENS_ESTIMATE = 5000  # relevance filtered page, prompt and analysis
+ANALYSIS_TOKENS_ESTIMATE = 300  # analysis of a single page passed to reflection and answer
+ANSWER_OUTPUT_TOKENS_ESTIMATE = 1500
+ANSWER_SECONDS_ESTIMATE = 15
+REFLECTION_SECONDS_ESTIMATE = 5
+# Share of the budget the first research loop may use, the rest is left for follow-up loops
+FIRST_LOOP_BUDGET_SHARE = 0.4
+
+MAX_QUERIES_PER_LOOP = 4
+MAX_RESULTS_PER_QUERY = 5
+MAX_PAGES_PER_LOOP = MAX_QUERIES_PER_LOOP * MAX_RESULTS_PER_QUERY
+MAX_BUDGET_LOOPS = 8
+
+
+class ResearchPlan(TypedDict):
+    """
+    Size of the fan-out of a research loop.
+    """
+    search_queries: int
+    results_per_query: int
+
+
+class Spend(TypedDict):
+    """
+    Resources used (or to be used) by the research.
+    """
+    seconds: float
+    tokens: float
+    cost_usd: float
+
+
+def budget_enabled(configurable: Configuration) -> bool:
+    """
+    Checks whether the research is driven by a budget instead of fixed query, result and loop counts.
+    """
+    return bool(
+        configurable.research_budget_seconds
+        or configurable.research_budget_tokens
+        or configurable.research_budget_cost_usd
+    )
+
+def _budget(configurable: Configuration) -> Spend:
+    # dimensions without a budget are unlimited
+    return Spend(
+        seconds=configurable.research_budget_seconds or math.inf,
+        tokens=configurable.research_budget_tokens or math.inf,
+        cost_usd=configurable.research_budget_cost_usd or math.inf,
+    )
+
+def spent(state: dict) -> Spend:
+    """
+    Returns resources used by the research so far.
+    """
+    return Spend(
+        seconds=time.time() - state.get("research_started_at", time.time()),
+        tokens=state.get("tokens_used", 0),
+        cost_usd=state.get("cost_usd", 0.0),
+    )
+
+def _answer_reserve(configurable: Configuration, analyses_count: int) -> Spend:
+    """
+    Returns resources to keep for the final answer.
+    """
+    input_tokens = analyses_count * ANALYSIS_TOKENS_ESTIMATE + 1000
+    return Spend(
+        seconds=ANSWER_SECONDS_ESTIMATE,
+        tokens=input_tokens + ANSWER_OUTPUT_TOKENS_ESTIMATE,
+        cost_usd=usage_cost(configurable.answer_model, input_tokens, ANSWER_OUTPUT_TOKENS_ESTIMATE),
+    )
+
+def _fan_out(pages: int, max_queries: int = MAX_QUERIES_PER_LOOP) -> ResearchPlan:
+    """
+    Splits the number of pages to analyze into search queries and results per query,
+    preferring breadth (more queries) over depth.
+    """
+    pages = max(1, min(pages, MAX_PAGES_PER_LOOP))
+    search_queries = max(1, min(round(math.sqrt(pages)), max_queries))
+    return ResearchPlan(
+        search_queries=search_queries,
+        results_per_query=max(1, min(pages // search_queries, MAX_RESULTS_PER_QUERY)),
+    )
+
+def plan_initial_research(configurable: Configuration, analysis_model: str) -> ResearchPlan:
+    """
+    Sizes the first research loop so that it uses at most FIRST_LOOP_BUDGET_SHARE
+    of the token and cost budget. Pages are analyzed in parallel, so time budget
+    doesn't limit the fan-out, only the number of loops.
+    Args:
+        configurable: The deep research configuration.
+        analysis_model: The model used by web page analyzer.
+    Returns:
+        The number of search queries and results per query of the first loop.
+    """
+    budget = _budget(configurable)
+    reserve = _answer_reserve(configurable, analyses_count=0)
+    page_cost = usage_cost(analysis_model, PAGE_TOKENS_ESTIMATE, 0)
+    affordable_pages = min(
+        (budget["tokens"] - reserve["tokens"]) * FIRST_LOOP_BUDGET_SHARE / PAGE_TOKENS_ESTIMATE,
+        (budget["cost_usd"] - reserve["cost_usd"]) * FIRST_LOOP_BUDGET_SHARE / page_cost,
+    )
+    if math.isinf(affordable_pages):
+        # time budget only, keep the configured fan-out
+        plan = ResearchPlan(
+            search_queries=configurable.number_of_initial_queries,
+            results_per_query=configurable.number_of_results_per_query,
+        )
+    else:
+        plan = _fan_out(int(affordable_pages))
+    log.info("Research budget %s, initial plan: %s", budget, plan)
+    return plan
+
+def _late_analyses_reserve(state: dict, used: Spend) -> Spend:
+    """
+    Returns resources to keep for the late analyses still running, whose spend is not in the state yet.
+    Each is assumed to use the average spend per analyzed page of the research so far.
+    """
+    running = state.get("running_late_analyses", 0)
+    pages = max(state.get("number_of_ran_queries", 0), 1)
+    return Spend(
+        seconds=0.0,  # late analyses run in parallel with the research, their time is in the elapsed time
+        tokens=used["tokens"] / pages * running,
+        cost_usd=used["cost_usd"] / pages * running,
+    )
+
+def plan_next_loop(state: dict, configurable: Configuration) -> Optional[ResearchPlan]:
+    """
+    Decides whether another research loop fits in the budget and sizes it.
+
+    The spend of the next loop is estimated from the average spend of the loops done so far,
+    leaving enough for the final answer and for the late analyses still running
+    (see deep_research.late_analyses). Returns None when the research should be finalized.
+    """
+    loops_done = max(state.get("research_loop_count", 1), 1)
+    if loops_done >= MAX_BUDGET_LOOPS:
+        return None
+    if not state.get("knowledge_gap", "").strip() or not state.get("follow_up_queries"):
+        return None
+
+    budget = _budget(configurable)
+    used = spent(state)
+    reserve = _answer_reserve(configurable, analyses_count=state.get("number_of_ran_queries", 0))
+    late_reserve = _late_analyses_reserve(state, used)
+    available = {key: budget[key] - used[key] - reserve[key] - late_reserve[key] for key in budget}
+    per_loop = {key: used[key] / loops_done for key in used}
+
+    if available["seconds"] < per_loop["seconds"] + REFLECTION_SECONDS_ESTIMATE:
+        log.info("Research time budget exhausted, used: %s", used)
+        return None
+    # how many "average loops" fit in the remaining token and cost budget
+    scale = min(
+        available["tokens"] / per_loop["tokens"] if per_loop["tokens"] else math.inf,
+        available["cost_usd"] / per_loop["cost_usd"] if per_loop["cost_usd"] else math.inf,
+    )
+    if scale < 1:
+        log.info("Research token/cost budget exhausted, used: %s", used)
+        return None
+
+    pages_per_loop = max(state.get("number_of_ran_queries", 0) / loops_done, 1)
+    # a loop can be at most twice as wide as the average one, leaving budget for the next loops
+    pages = int(pages_per_loop * min(scale, 2.0)) if not math.isinf(scale) else int(pages_per_loop)
+    plan = _fan_out(pages, max_queries=len(state["follow_up_queries"]))
+    log.info("Research loop %d planned: %s, used: %s, available: %s", loops_done + 1, plan, used, available)
+    return plan
+
+def loop_deadline_seconds(state: dict, configurable: Configuration) -> float:
+    """
+    Returns the time the web content analyses of the current research loop may take,
+    so that reflection and the final answer still fit in the time budget (0 means no deadline).
+    Late analyses of the previous loops run in parallel, their time is already in the elapsed time
+    and the state passed should include the spend of those finished (see select_urls_to_analyze).
+    """
+    deadline_seconds = configurable.research_loop_deadline_seconds
+    if not configurable.research_budget_seconds:
+        return deadline_seconds
+    remaining = (
+        configurable.research_budget_seconds - spent(state)["seconds"]
+        - REFLECTION_SECONDS_ESTIMATE - ANSWER_SECONDS_ESTIMATE
+    )
+    remaining = max(remaining, 1.0)
+    return min(deadline_seconds, remaining) if deadline_seconds > 0 else remaining
@@ -32,11 +32,78 @@ class Configuration(BaseModel):
         description="The number of search results to retrieve per query.",
     )
 
+    max_urls_to_fetch_per_query: int = Field(
+        default=0,
+        description="The maximum number of search results per query to fetch and analyze. Results are ranked "
+                    "by relevance of their title and snippet to the query, so lower values trade recall "
+                    "for latency and cost. 0 fetches all results.",
+    )
+
+    snippet_answer_threshold: float = Field(
+        default=0,
+        description="When a search result snippet contains at least this fraction (0-1) of the query terms, "
+                    "the snippets are used as the research result and no page is fetched for the query. "
+                    "0 disables answering from snippets.",
+    )
+
     max_research_loops: int = Field(
         default=2,
         description="The maximum number of research loops to perform.",
     )
 
+    skip_duplicate_pages: bool = Field(
+        default=True,
+        description="Whether to skip analysis of pages duplicating a page already analyzed in the research run "
+                    "(URL variants like AMP or tracking parameters, mirrors, syndicated copies).",
+    )
+
+    near_duplicate_max_distance: int = Field(
+        default=3,
+        description="The maximum number of differing bits of 64-bit SimHash fingerprints of near-duplicate pages.",
+    )
+
+    research_loop_deadline_seconds: float = Field(
+        default=60,
+        description="The maximum time (in seconds) for web content analyses of a research loop. "
+                    "Analyses not finished in time are dropped, so that slow sites don't hold up the research. "
+                    "0 disables the deadline.",
+    )
+
+    research_budget_seconds: float = Field(
+        default=0,
+        description="Wall-clock budget of the research in seconds. When any budget is set, the number of queries, "
+                    "results per query and research loops are planned adaptively instead of the fixed values above. "
+                    "0 means no budget.",
+    )
+
+    research_budget_tokens: int = Field(
+        default=0,
+        description="LLM token budget of the research (input and output tokens). 0 means no budget.",
+    )
+
+    research_budget_cost_usd: float = Field(
+        default=0,
+        description="Estimated LLM cost budget of the research in USD. 0 means no budget.",
+    )
+
+    follow_up_query_max_similarity: float = Field(
+        default=0.7,
+        description="Follow-up queries with higher text similarity (0-1) to a query already searched "
+                    "in the research run (or to another follow-up query) are dropped.",
+    )
+
+    findings_max_tokens: int = Field(
+        default=4000,
+        description="The maximum size (in tokens) of the research findings passed to reflection and the answer. "
+                    "Larger findings are compressed into a summary by the reflection model. 0 disables compression.",
+    )
+
+    findings_max_similarity: float = Field(
+        default=0.7,
+        description="Facts with higher text similarity (0-1) to a fact already in the research findings "
+                    "are dropped as duplicates.",
+    )
+
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
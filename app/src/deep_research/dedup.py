@@ -0,0 +1,70 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+from utils.url import canonicalize_url
+from utils.fingerprint import hamming_distance
+
+log = logging.getLogger(__name__)
+
+# Registries of the most recent research runs kept in memory
+MAX_TRACKED_RUNS = 128
+
+
+class DuplicateRegistry:
+    """
+    Pages analyzed within a single research run, used to skip duplicate pages.
+
+    A page is a duplicate when its canonical URL (see canonicalize_url) was already claimed
+    in the run, or when its content fingerprint (see simhash) is within max_distance bits
+    of a fingerprint of an already claimed page (mirrors, syndicated copies of an article).
+    Web content analysis branches run in parallel, so pages are claimed atomically.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._urls: set[str] = set()
+        self._fingerprints: dict[int, str] = {}
+
+    def claim_url(self, url: str) -> bool:
+        """
+        Claims the URL for analysis. Returns False if its canonical URL was already claimed.
+        """
+        canonical_url = canonicalize_url(url)
+        with self._lock:
+            if canonical_url in self._urls:
+                return False
+            self._urls.add(canonical_url)
+            return True
+
+    def claim_content(self, url: str, fingerprint: Optional[int], max_distance: int) -> Optional[str]:
+        """
+        Claims page content for analysis.
+        Returns URL of the already claimed near-duplicate page or None if the content is new.
+        """
+        if fingerprint is None:
+            return None
+        with self._lock:
+            for claimed_fingerprint, claimed_url in self._fingerprints.items():
+                if hamming_distance(fingerprint, claimed_fingerprint) <= max_distance:
+                    return claimed_url
+            self._fingerprints[fingerprint] = url
+            return None
+
+
+_registries: OrderedDict[str, DuplicateRegistry] = OrderedDict()
+_registries_lock = threading.Lock()
+
+def get_duplicate_registry(research_run_id: str) -> DuplicateRegistry:
+    """
+    Returns the duplicate registry of the research run.
+    """
+    with _registries_lock:
+        registry = _registries.get(research_run_id)
+        if registry is None:
+            registry = _registries[research_run_id] = DuplicateRegistry()
+            if len(_registries) > MAX_TRACKED_RUNS:
+                _registries.popitem(last=False)
+        else:
+            _registries.move_to_end(research_run_id)
+        return registry
@@ -0,0 +1,87 @@
+import re
+from web_page_analyzer.nodes import NO_RELEVANT_INFORMATION
+from utils.text_similarity import WORD_PATTERN, is_near_duplicate
+
+# Analyses this short mentioning "No relevant information found" carry no findings
+EMPTY_ANALYSIS_MAX_WORDS = 30
+# Shorter lines (headings, confidence levels) are kept with the facts of their analysis, not deduplicated
+MIN_FACT_WORDS = 5
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+FINDINGS_SEPARATOR = "\n\n---\n\n"
+
+
+def is_empty_analysis(analysis: str) -> bool:
+    """
+    Checks whether the web content analysis found nothing relevant.
+    """
+    words = WORD_PATTERN.findall(analysis)
+    return not words or (
+        NO_RELEVANT_INFORMATION.lower() in analysis.lower() and len(words) <= EMPTY_ANALYSIS_MAX_WORDS
+    )
+
+def _is_fact(sentence: str) -> bool:
+    return len(WORD_PATTERN.findall(sentence)) >= MIN_FACT_WORDS
+
+def known_facts(findings: list[str]) -> list[str]:
+    """
+    Returns the facts of the findings: sentences long enough to be deduplicated,
+    or the whole finding if it is a short answer without such sentences.
+    """
+    facts = []
+    for finding in findings:
+        sentences = [
+            sentence
+            for line in finding.splitlines()
+            for sentence in SENTENCE_END.split(line.strip())
+            if _is_fact(sentence)
+        ]
+        facts.extend(sentences or [finding.strip()])
+    return facts
+
+def new_findings(findings: list[str], analyses: list[str], max_similarity: float) -> list[str]:
+    """
+    Extracts findings from the web content analyses that are not known yet.
+
+    Empty analyses are dropped. Each analysis is split into lines and sentences, sentences similar
+    to a fact already in the findings (or in the preceding analyses) and not adding any numbers
+    are removed, analyses left without new facts are dropped.
+    Args:
+        findings: The findings of the research so far.
+        analyses: The new web content analysis results.
+        max_similarity: Sentences with higher text similarity to a known fact are duplicates.
+    Returns:
+        The new findings, one per analysis with new facts.
+    """
+    facts = known_facts(findings)
+    result = []
+    for analysis in analyses:
+        if is_empty_analysis(analysis):
+            continue
+        if known_facts([analysis]) == [analysis.strip()]:
+            # a short answer without fact-length sentences is compared as a whole
+            if not is_near_duplicate(analysis, facts, max_similarity):
+                result.append(analysis.strip())
+                facts.append(analysis.strip())
+            continue
+        lines = []
+        has_new_facts = False
+        for line in analysis.strip().splitlines():
+            sentences = []
+            for sentence in SENTENCE_END.split(line.strip()):
+                if not _is_fact(sentence):
+                    sentences.append(sentence)
+                elif not is_near_duplicate(sentence, facts, max_similarity):
+                    sentences.append(sentence)
+                    facts.append(sentence)
+                    has_new_facts = True
+            if any(sentences) or not line.strip():
+                lines.append(" ".join(sentences))
+        if has_new_facts:
+            result.append("\n".join(lines).strip())
+    return result
+
+def format_findings(findings: list[str]) -> str:
+    """
+    Formats the findings for reflection and answer prompts.
+    """
+    return FINDINGS_SEPARATOR.join(findings)
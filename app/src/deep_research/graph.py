@@ -8,7 +8,9 @@ from deep_research.configuration import Configuration
 from deep_research.nodes import (
     generate_query,
     web_research,
+    select_urls_to_analyze,
     web_content_analysis,
+    update_findings,
     reflection,
     node_finalize_answer,
     continue_to_web_research,
@@ -20,7 +22,9 @@ builder = StateGraph(OverallState, config_schema=Configuration)
 
 builder.add_node("generate_query", generate_query)
 builder.add_node("web_research", web_research)
+builder.add_node("select_urls_to_analyze", select_urls_to_analyze)
 builder.add_node("web_content_analysis", web_content_analysis)
+builder.add_node("update_findings", update_findings)
 builder.add_node("reflection", reflection)
 builder.add_node("finalize_answer", node_finalize_answer)
 
@@ -31,11 +35,14 @@ builder.add_edge(START, "generate_query")
 builder.add_conditional_edges(
     "generate_query", continue_to_web_research, ["web_research"]
 )
+# Wait for all web research branches, then analyze pages not analyzed in the previous loops
+builder.add_edge("web_research", "select_urls_to_analyze")
 builder.add_conditional_edges(
-    "web_research", continue_to_web_content_analysis, ["web_content_analysis"]
+    "select_urls_to_analyze", continue_to_web_content_analysis, ["web_content_analysis", "update_findings"]
 )
-# Reflect on the web research
-builder.add_edge("web_content_analysis", "reflection")
+# Add the analyses to the research findings and reflect on them
+builder.add_edge("web_content_analysis", "update_findings")
+builder.add_edge("update_findings", "reflection")
 # Evaluate the research
 builder.add_conditional_edges(
     "reflection", evaluate_research, ["web_research", "finalize_answer"]
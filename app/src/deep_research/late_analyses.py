@@ -0,0 +1,86 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import TypedDict
+from deep_research.dedup import MAX_TRACKED_RUNS
+
+log = logging.getLogger(__name__)
+
+
+class LateSpend(TypedDict):
+    """
+    Resources used by late analyses, not counted in the research state yet,
+    and the number of late analyses still running (their spend is not known yet).
+    """
+    tokens_used: int
+    cost_usd: float
+    running: int
+
+
+class LateAnalysisRegistry:
+    """
+    Web content analyses of a single research run that missed the research loop deadline.
+
+    Branches stop waiting for late analyses, so the analyses (cancelled at the next step) finish
+    in the background. Their spend is collected here and merged into the research state
+    by the following research nodes (see deep_research.nodes.reflection), analyses still running
+    are reserved for by the research budget (see deep_research.budget.plan_next_loop).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = 0
+        self._tokens_used = 0
+        self._cost_usd = 0.0
+
+    @property
+    def running(self) -> int:
+        """
+        Number of late analyses still running.
+        """
+        with self._lock:
+            return self._running
+
+    def started(self) -> None:
+        """
+        Records an analysis that missed the deadline and still runs.
+        """
+        with self._lock:
+            self._running += 1
+
+    def finished(self, tokens_used: int, cost_usd: float) -> None:
+        """
+        Records the spend of a late analysis that finished (or was cancelled).
+        """
+        with self._lock:
+            self._running -= 1
+            self._tokens_used += tokens_used
+            self._cost_usd += cost_usd
+
+    def collect(self) -> LateSpend:
+        """
+        Returns the spend of late analyses finished since the last call.
+        """
+        with self._lock:
+            spend = LateSpend(tokens_used=self._tokens_used, cost_usd=self._cost_usd, running=self._running)
+            self._tokens_used = 0
+            self._cost_usd = 0.0
+            return spend
+
+
+_registries: OrderedDict[str, LateAnalysisRegistry] = OrderedDict()
+_registries_lock = threading.Lock()
+
+def get_late_analysis_registry(research_run_id: str) -> LateAnalysisRegistry:
+    """
+    Returns the late analysis registry of the research run.
+    """
+    with _registries_lock:
+        registry = _registries.get(research_run_id)
+        if registry is None:
+            registry = _registries[research_run_id] = LateAnalysisRegistry()
+            if len(_registries) > MAX_TRACKED_RUNS:
+                _registries.popitem(last=False)
+        else:
+            _registries.move_to_end(research_run_id)
+        return registry
@@ -1,13 +1,16 @@
-import os
+import time
+import uuid
 import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Optional
 
 from langsmith import traceable
 
 from langchain_core.messages import AIMessage
 from langgraph.types import Send
 from langchain_core.runnables import RunnableConfig
-from langchain_openai import ChatOpenAI
-from langchain_google_community import GoogleSearchAPIWrapper
 
 from deep_research.schema import WebResearchInput, Reflection
 from deep_research.configuration import Configuration
@@ -15,24 +18,54 @@ from deep_research.state import (
     OverallState,
     GenerateQueryState,
     ReflectionState,
-    WebResearchQuery,
+    WebResearchState,
     WebResearchResult,
     WebResearchResultState,
     WebContentAnalysisResultState,
+    WebContentAnalysisState,
 )
 from deep_research.prompts import (
     query_writer_instructions,
     reflection_instructions,
+    findings_compression_instructions,
     answer_instructions,
 )
 from deep_research.utils import (
     get_research_topic,
     get_current_date,
+    url_to_markdown,
+    filter_follow_up_queries,
 )
+from deep_research.dedup import get_duplicate_registry
+from deep_research.late_analyses import LateAnalysisRegistry, LateSpend, get_late_analysis_registry
+from deep_research.findings import new_findings, format_findings
+from deep_research.ranking import rank_search_results, snippet_coverage, format_snippets
+from deep_research.budget import (
+    budget_enabled,
+    plan_initial_research,
+    plan_next_loop,
+    loop_deadline_seconds,
+    spent,
+)
+from utils.usage import message_usage
+from utils.tokens import estimate_tokens
+from utils.fingerprint import simhash
+from utils.url import url_digest
+from utils.search import web_search
+from utils.llm import get_chat_model
+from utils.scheduler import domain_of, scraping_queue_stats
 from web_page_analyzer import graph as web_page_analyzer
+from web_page_analyzer.configuration import Configuration as AnalyzerConfiguration
+from config.config_loader import app_config
 
 log = logging.getLogger(__name__)
 
+# Runs web content analyses, so that branches can stop waiting for them at the research loop deadline
+_analysis_executor = ThreadPoolExecutor(
+    max_workers=app_config.get("research_analysis_workers", 32),
+    thread_name_prefix="web-content-analysis",
+)
+
 def generate_query(state: OverallState, config: RunnableConfig) -> GenerateQueryState:
     """LangGraph node that generates search queries based on the User's question.
 
@@ -47,18 +80,19 @@ def generate_query(state: OverallState, config: RunnableConfig) -> GenerateQuery
         Dictionary with state update, including search_query key containing the generated queries
     """
     configurable = Configuration.from_runnable_config(config)
+    research_started_at = time.time()
 
+    # in the budget mode the research fan-out is planned from the budget
+    plan = None
+    if budget_enabled(configurable):
+        plan = plan_initial_research(configurable, AnalyzerConfiguration.from_runnable_config(config).analysis_model)
     # check for custom initial search query count
     if state.get("initial_search_query_count") is None:
-        state["initial_search_query_count"] = configurable.number_of_initial_queries
+        state["initial_search_query_count"] = plan["search_queries"] if plan else configurable.number_of_initial_queries
 
-    llm = ChatOpenAI(
-        model=configurable.query_generator_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("OPENAI_API_KEY"),
+    structured_llm = get_chat_model(
+        configurable.query_generator_model, temperature=1.0, schema=WebResearchInput, include_raw=True
     )
-    structured_llm = llm.with_structured_output(WebResearchInput)
 
     # Format the prompt
     current_date = get_current_date()
@@ -71,32 +105,52 @@ def generate_query(state: OverallState, config: RunnableConfig) -> GenerateQuery
         extra_instructions=extra_instructions,
     )
     # Generate the search queries
-    result = structured_llm.invoke(formatted_prompt)
+    output = structured_llm.invoke(formatted_prompt)
+    result = _parsed_output(output)
     return {
         "user_query": result.user_query,
         "web_research_queries": [query for query in result.web_research_queries],
+        "research_run_id": str(uuid.uuid4()),
+        "research_started_at": research_started_at,
+        "planned_queries": state["initial_search_query_count"] if plan else None,
+        "results_per_query": plan["results_per_query"] if plan else None,
+        **message_usage(configurable.query_generator_model, output["raw"]),
     }
 
+def _parsed_output(output: dict):
+    """
+    Returns the parsed structured output of an LLM invoked with include_raw=True (used to get token usage).
+    """
+    if output["parsing_error"]:
+        raise output["parsing_error"]
+    return output["parsed"]
+
 
 def continue_to_web_research(state: GenerateQueryState):
     """LangGraph node that sends the search queries to the web research node.
 
     This is used to spawn n number of web research nodes, one for each search query.
+    In the budget mode, queries above the planned number are dropped.
     """
     return [
         Send("web_research",
              {
                 "search_query": research_query.query, 
                 "rationale": research_query.rationale,
+                "seen_urls": state.get("seen_urls", set()),
+                "results_per_query": state.get("results_per_query"),
             })
-        for research_query in state["web_research_queries"]
+        for research_query in state["web_research_queries"][:state.get("planned_queries")]
     ]
 
 
-def web_research(state: WebResearchQuery, config: RunnableConfig) -> WebResearchResultState:
-    """LangGraph node that performs web research using the native Google Search API tool.
+def web_research(state: WebResearchState, config: RunnableConfig) -> WebResearchResultState:
+    """LangGraph node that performs web research using the configured search backend (Google CSE by default).
 
-    Executes a web search using the native Google Search API tool in combination with Gemini 2.0 Flash.
+    Search results are ranked by relevance of their title and snippet to the search query
+    and only the top max_urls_to_fetch_per_query results (or results_per_query of the budget plan)
+    are passed on for fetching and analysis. When the snippets contain enough of the query terms
+    (see snippet_answer_threshold), they are used as the research result and no page is fetched.
 
     Args:
         state: Current graph state containing the search query and research loop count
@@ -106,40 +160,89 @@ def web_research(state: WebResearchQuery, config: RunnableConfig) -> WebResearch
         Dictionary with state update, including research_loop_count, and web_research_results
     """
     configurable = Configuration.from_runnable_config(config)
+    fetch_limit = state.get("results_per_query") or configurable.max_urls_to_fetch_per_query or None
 
-    google_search = GoogleSearchAPIWrapper(
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        google_cse_id=os.getenv("GOOGLE_CSE_ID")
-    )
-    results = google_search.results(
+    results = web_search(
         query=state["search_query"],
-        num_results=configurable.number_of_results_per_query
+        num_results=max(configurable.number_of_results_per_query, fetch_limit or 0),
     )
-    urls = [result["link"] for result in results if "link" in result]
-    results = [
+    results = [result for result in results if "link" in result]
+    # pages analyzed in the previous research loops are not fetched again
+    seen_urls = state.get("seen_urls", set())
+    new_results = [result for result in results if url_digest(result["link"]) not in seen_urls]
+    if len(new_results) < len(results):
+        log.info("Reusing %d already analyzed URLs for query: %s", len(results) - len(new_results), state["search_query"])
+    ranked_results = rank_search_results(new_results, state["search_query"])[:fetch_limit]
+    update = {
+        "reused_url_count": len(results) - len(new_results),
+        "executed_queries": [state["search_query"]],
+    }
+
+    if configurable.snippet_answer_threshold and any(
+        snippet_coverage(result, state["search_query"]) >= configurable.snippet_answer_threshold
+        for result in ranked_results
+    ):
+        log.info("Search result snippets answer the query, skipping page fetching: %s", state["search_query"])
+        update["web_content_analysis_results"] = [format_snippets(ranked_results, state["search_query"])]
+        return update
+
+    update["web_research_results"] = [
         WebResearchResult(
             search_query=state["search_query"],
             rationale=state.get("rationale", ""),
-            url=url
+            url=result["link"],
+            title=result.get("title", ""),
+            snippet=result.get("snippet", ""),
+            domain=domain_of(result["link"]),
         )
-        for url in urls
+        for result in ranked_results
     ]
+    return update
+
+def select_urls_to_analyze(state: WebContentAnalysisResultState, config: RunnableConfig) -> WebContentAnalysisResultState:
+    """LangGraph node that gathers results of the parallel web research branches
+    and selects URLs to analyze.
 
+    URLs already analyzed in the research run (tracked in seen_urls) are skipped,
+    as well as URLs returned by more than one search query.
+    Sets the deadline of the web content analysis of the current research loop,
+    after counting the spend of late analyses of the previous loops finished so far.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    seen_urls = set(state.get("seen_urls", set()))
+    urls_to_analyze = []
+    for research in state.get("web_research_results", []):
+        digest = url_digest(research["url"])
+        if digest in seen_urls:
+            continue
+        seen_urls.add(digest)
+        urls_to_analyze.append(research)
+    late_spend = _with_late_spend({}, get_late_analysis_registry(state["research_run_id"]).collect())
+    deadline_seconds = loop_deadline_seconds(
+        {
+            **state,
+            "tokens_used": state.get("tokens_used", 0) + late_spend["tokens_used"],
+            "cost_usd": state.get("cost_usd", 0.0) + late_spend["cost_usd"],
+        },
+        configurable,
+    )
     return {
-        "web_research_results": results,
+        "urls_to_analyze": urls_to_analyze,
+        "analysis_deadline": time.time() + deadline_seconds if deadline_seconds > 0 else None,
+        **late_spend,
     }
 
-def continue_to_web_content_analysis(state: WebContentAnalysisResultState) -> list[Send]:
+def continue_to_web_content_analysis(state: WebContentAnalysisResultState) -> list[Send] | str:
     """LangGraph node that sends the web research results to the web scraping node.
 
     This is used to spawn n number of web scraping nodes, one for each url query.
+    When there are no new URLs (all were analyzed already or the search result snippets
+    answered the queries), the research goes straight to updating the findings.
     """
-    num_of_urls = len(state.get("web_research_results", []))
-    analysed_urls = len(state.get("web_content_analysis_results", []))
-    if num_of_urls <= analysed_urls:
-        log.warning("All URLs have already been analyzed. No further web content analysis will be performed.")
-        return []
-    
+    if not state["urls_to_analyze"]:
+        log.warning("No new URLs to analyze. No further web content analysis will be performed.")
+        return "update_findings"
+
     return [
         Send("web_content_analysis",
              {
@@ -147,16 +250,95 @@ def continue_to_web_content_analysis(state: WebContentAnalysisResultState) -> li
                 "search_query": research["search_query"],
                 "rationale": research["rationale"],
                 "url": research["url"],
+                "research_run_id": state["research_run_id"],
+                "analysis_deadline": state.get("analysis_deadline"),
              }
         )
-        for research in state["web_research_results"][analysed_urls:]
+        for research in state["urls_to_analyze"]
     ]
 
-def web_content_analysis(state: WebResearchResult) -> WebContentAnalysisResultState:
+def web_content_analysis(state: WebContentAnalysisState, config: RunnableConfig) -> WebContentAnalysisResultState:
     """
     LangGraph node that calls web_page_analyzer graph to scrape and analyze 
     the content of a given web page.
+    Pages duplicating a page already analyzed in the research run (the same canonical URL
+    or near-duplicate content) are skipped and counted in skipped_duplicates.
+
+    Reflection waits for all analysis branches, so the analysis runs in a worker thread and the
+    branch stops waiting for it at the research loop deadline. Analyses not finished by then
+    are dropped from the research, recorded in late_analyses and cancelled before their next step.
+    Their spend is counted once they stop (see deep_research.late_analyses).
+    """
+    configurable = Configuration.from_runnable_config(config)
+    deadline = state.get("analysis_deadline")
+    if not deadline:
+        return _analyze_web_content(state, configurable)
+
+    started = time.time()
+    # the context carries LangGraph/LangSmith run context, so the analysis is traced under this node
+    context = contextvars.copy_context()
+    cancelled = threading.Event()
+    future = _analysis_executor.submit(context.run, _analyze_web_content, state, configurable, cancelled)
+    try:
+        return future.result(timeout=max(0.0, deadline - started))
+    except TimeoutError:
+        cancelled.set()
+        log.warning(
+            "Analysis of %s missed the research loop deadline after %.1fs, continuing without it",
+            state["url"], time.time() - started,
+        )
+        registry = get_late_analysis_registry(state["research_run_id"])
+        registry.started()
+        future.add_done_callback(lambda f: _record_late_analysis(registry, state["url"], started, f))
+        return {
+            "late_analyses": [{"url": state["url"], "waited_seconds": round(time.time() - started, 3)}],
+            "seen_urls": {url_digest(state["url"])},
+        }
+
+def _record_late_analysis(registry: LateAnalysisRegistry, url: str, started: float, future: Future) -> None:
     """
+    Records the spend of an analysis that finished after the research loop deadline.
+    """
+    if future.exception():
+        # spend of the failed step is unknown
+        registry.finished(0, 0.0)
+        log.warning("Late analysis of %s failed after %.1fs: %s", url, time.time() - started, future.exception())
+        return
+    result = future.result()
+    registry.finished(result.get("tokens_used", 0), result.get("cost_usd", 0.0))
+    log.info(
+        "Late analysis of %s finished after %.1fs using %d tokens, result dropped",
+        url, time.time() - started, result.get("tokens_used", 0),
+    )
+
+def _analyze_web_content(
+    state: WebContentAnalysisState,
+    configurable: Configuration,
+    cancelled: Optional[threading.Event] = None,
+) -> WebContentAnalysisResultState:
+    """
+    Scrapes and analyzes the web page, see web_content_analysis.
+    When the cancelled event is set, the analysis stops before its next step (fetch, relevance filter,
+    LLM analysis) and returns only the spend so far.
+    """
+    cancelled_result = {"seen_urls": {url_digest(state["url"])}}
+    analyzer_input = {"url": state["url"]}
+    if configurable.skip_duplicate_pages:
+        registry = get_duplicate_registry(state["research_run_id"])
+        if not registry.claim_url(state["url"]):
+            log.info("Skipping duplicate URL: %s", state["url"])
+            return {"skipped_duplicates": 1, "seen_urls": {url_digest(state["url"])}}
+        if _is_set(cancelled):
+            return cancelled_result
+        page_content = url_to_markdown(state["url"])
+        duplicate_of = registry.claim_content(
+            state["url"], simhash(page_content), configurable.near_duplicate_max_distance
+        )
+        if duplicate_of:
+            log.info("Skipping %s, near-duplicate of already analyzed %s", state["url"], duplicate_of)
+            return {"skipped_duplicates": 1, "seen_urls": {url_digest(state["url"])}}
+        analyzer_input["page_content"] = page_content
+
     search_query = """Original user query: {user_query}
     Current search query: {search_query}
     Rationale for the search query: {rationale}
@@ -166,12 +348,86 @@ def web_content_analysis(state: WebResearchResult) -> WebContentAnalysisResultSt
         rationale=state["rationale"],
     )
 
-    response = web_page_analyzer.graph.invoke(
+    if _is_set(cancelled):
+        return cancelled_result
+    response = {}
+    # the analyzer state is checked after each of its steps, so that a late analysis stops early
+    for response in web_page_analyzer.graph.stream(
         {
             "search_query": search_query,
-            "url": state["url"],
-        })
-    return {"web_content_analysis_results": [response["analysis_result"]]}
+            # the composite query differs with every generated rationale, cache the analysis by the query alone
+            "cache_query": state["search_query"],
+            **analyzer_input,
+        },
+        stream_mode="values",
+    ):
+        if _is_set(cancelled) and "analysis_result" not in response:
+            log.info("Analysis of %s cancelled", state["url"])
+            return {
+                **cancelled_result,
+                "tokens_used": response.get("tokens_used", 0),
+                "cost_usd": response.get("cost_usd", 0.0),
+            }
+    return {
+        "web_content_analysis_results": [response["analysis_result"]],
+        "seen_urls": {url_digest(state["url"])},
+        "tokens_used": response.get("tokens_used", 0),
+        "cost_usd": response.get("cost_usd", 0.0),
+    }
+
+def _is_set(event: Optional[threading.Event]) -> bool:
+    return event is not None and event.is_set()
+
+def _with_late_spend(usage: dict, late: LateSpend) -> dict:
+    """
+    Adds the spend of late analyses of the research run, finished since it was last counted, to the node usage.
+    """
+    if late["tokens_used"]:
+        log.info("Counting %d tokens ($%.4f) used by late analyses", late["tokens_used"], late["cost_usd"])
+    return {
+        "tokens_used": usage.get("tokens_used", 0) + late["tokens_used"],
+        "cost_usd": usage.get("cost_usd", 0.0) + late["cost_usd"],
+    }
+
+def update_findings(state: OverallState, config: RunnableConfig) -> WebContentAnalysisResultState:
+    """
+    LangGraph node that adds the web content analyses of the research loop to the findings.
+
+    Analyses with no relevant information and facts already known are dropped (see deep_research.findings).
+    When the findings exceed findings_max_tokens, they are compressed into a summary, so that
+    the size of reflection and answer prompts doesn't grow with the number of research loops.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    analyses = state.get("web_content_analysis_results", [])
+    analyses_count = state.get("findings_analyses_count", 0)
+    findings = state.get("findings", [])
+    added = new_findings(findings, analyses[analyses_count:], configurable.findings_max_similarity)
+    findings = findings + added
+    log.info(
+        "%d of %d new analyses added to the findings",
+        len(added), len(analyses) - analyses_count,
+    )
+
+    update = {"findings_analyses_count": len(analyses)}
+    findings_tokens = estimate_tokens(format_findings(findings))
+    if configurable.findings_max_tokens and findings_tokens > configurable.findings_max_tokens:
+        formatted_prompt = findings_compression_instructions.format(
+            research_topic=get_research_topic(state["messages"]),
+            current_date=get_current_date(),
+            # leave room for the findings of the next research loops
+            max_words=configurable.findings_max_tokens // 2,
+            findings=format_findings(findings),
+        )
+        llm = get_chat_model(configurable.reflection_model, temperature=0)
+        result = llm.invoke(formatted_prompt)
+        findings = [result.content]
+        log.info(
+            "Findings compressed from %d to %d tokens",
+            findings_tokens, estimate_tokens(result.content),
+        )
+        update.update(message_usage(configurable.reflection_model, result))
+    update["findings"] = findings
+    return update
 
 @traceable(run_type="llm", name="Reflection")
 def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
@@ -198,17 +454,14 @@ def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
     formatted_prompt = reflection_instructions.format(
         research_topic=get_research_topic(state["messages"]),
         current_date=current_date,
-        web_research_results="\n\n---\n\n".join(state["web_content_analysis_results"])
+        web_research_results=format_findings(state.get("findings", [])),
     )
     log.info(f"Reflection Prompt: {formatted_prompt}")
     # init Reasoning Model
-    llm = ChatOpenAI(
-        model=reasoning_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
-    result = llm.with_structured_output(Reflection).invoke(formatted_prompt)
+    llm = get_chat_model(reasoning_model, temperature=1.0, schema=Reflection, include_raw=True)
+    output = llm.invoke(formatted_prompt)
+    result = _parsed_output(output)
+    late = get_late_analysis_registry(state["research_run_id"]).collect()
 
     return {
         "is_sufficient": result.is_sufficient,
@@ -216,6 +469,8 @@ def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
         "follow_up_queries": result.follow_up_queries,
         "research_loop_count": state["research_loop_count"],
         "number_of_ran_queries": len(state["web_content_analysis_results"]),
+        "running_late_analyses": late["running"],
+        **_with_late_spend(message_usage(reasoning_model, output["raw"]), late),
     }
 
 
@@ -227,6 +482,9 @@ def evaluate_research(
 
     Controls the research loop by deciding whether to continue gathering information
     or to finalize the summary based on the configured maximum number of research loops.
+    Follow-up queries paraphrasing queries already searched are dropped.
+    In the budget mode, the decision and the size of the next loop are based on the resources
+    used so far (see deep_research.budget).
 
     Args:
         state: Current graph state containing the research loop count
@@ -236,22 +494,43 @@ def evaluate_research(
         String literal indicating the next node to visit ("web_research" or "finalize_summary")
     """
     configurable = Configuration.from_runnable_config(config)
-    max_research_loops = (
-        state.get("max_research_loops")
-        if state.get("max_research_loops") is not None
-        else configurable.max_research_loops
+    if state["is_sufficient"]:
+        return "finalize_answer"
+    follow_up_queries = filter_follow_up_queries(
+        state["follow_up_queries"],
+        state.get("executed_queries", []),
+        configurable.follow_up_query_max_similarity,
     )
-    if state["is_sufficient"] or state["research_loop_count"] >= max_research_loops:
+    if not follow_up_queries:
+        log.info("All follow-up queries were already searched, finalizing the answer")
         return "finalize_answer"
+
+    if budget_enabled(configurable):
+        plan = plan_next_loop({**state, "follow_up_queries": follow_up_queries}, configurable)
+        if plan is None:
+            return "finalize_answer"
+        follow_up_queries = follow_up_queries[:plan["search_queries"]]
+        results_per_query = plan["results_per_query"]
     else:
-        return [
-            Send(
-                "web_research",
-                {
-                    "search_query": follow_up_query,
-                    },
-            ) for follow_up_query in state["follow_up_queries"]
-        ]
+        max_research_loops = (
+            state.get("max_research_loops")
+            if state.get("max_research_loops") is not None
+            else configurable.max_research_loops
+        )
+        if state["research_loop_count"] >= max_research_loops:
+            return "finalize_answer"
+        results_per_query = None
+
+    return [
+        Send(
+            "web_research",
+            {
+                "search_query": follow_up_query,
+                "seen_urls": state.get("seen_urls", set()),
+                "results_per_query": results_per_query,
+                },
+        ) for follow_up_query in follow_up_queries
+    ]
 
 
 def node_finalize_answer(state: OverallState, config: RunnableConfig):
@@ -277,20 +556,31 @@ def node_finalize_answer(state: OverallState, config: RunnableConfig):
     formatted_prompt = answer_instructions.format(
         current_date=current_date,
         research_topic=get_research_topic(state["messages"]),
-        web_research_results="\n\n---\n\n".join(state["web_content_analysis_results"]),
+        web_research_results=format_findings(state.get("findings", [])),
         extra_instructions=extra_instructions,
     )
 
     # init Reasoning Model
-    llm = ChatOpenAI(
-        model=reasoning_model,
-        temperature=0,
-        max_retries=2,
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
+    llm = get_chat_model(reasoning_model, temperature=0)
 
     result = llm.invoke(formatted_prompt)
+    usage = _with_late_spend(
+        message_usage(reasoning_model, result), get_late_analysis_registry(state["research_run_id"]).collect()
+    )
+    used = spent(state)
+    log.info(
+        "Research finished in %.1fs using %d tokens ($%.4f), %d URLs reused, %d duplicate pages skipped, "
+        "%d analyses missed the deadline",
+        used["seconds"],
+        used["tokens"] + usage["tokens_used"],
+        used["cost_usd"] + usage["cost_usd"],
+        state.get("reused_url_count", 0),
+        state.get("skipped_duplicates", 0),
+        len(state.get("late_analyses", [])),
+    )
+    log.info("Scraping queue statistics per domain: %s", scraping_queue_stats())
 
     return {
         "messages": [AIMessage(content=result.content)],
+        **usage,
     }
@@ -95,6 +95,20 @@ Results of web research:
 {web_research_results}
 """
 
+findings_compression_instructions = """You are an expert research assistant. Findings from web pages collected while researching the following subject grew too long:
+{research_topic}.
+
+Instructions:
+- Compress the findings below into a concise summary of at most {max_words} words.
+- Keep all facts, numbers, dates and names relevant to the subject, drop repetitions and irrelevant details.
+- If findings contradict each other, keep both versions and note the contradiction.
+- Keep the confidence levels of the findings where they differ.
+- Current date is {current_date}.
+
+Findings:
+{findings}
+"""
+
 answer_instructions = """Generate a high-quality answer to the user's question based on the provided summaries.
 
 Instructions:
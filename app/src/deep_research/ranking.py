@@ -0,0 +1,62 @@
+from web_page_analyzer.relevance import TermIndex, tokenize
+from utils.scheduler import domain_of
+
+# Weight of the search engine ranking relative to the normalized (0-1) BM25 score of title and snippet
+SEARCH_RANK_WEIGHT = 0.3
+# Score multiplier applied for every result from the same domain ranked higher
+REPEATED_DOMAIN_PENALTY = 0.7
+
+
+def _result_text(result: dict) -> str:
+    return f"{result.get('title', '')}\n{result.get('snippet', '')}"
+
+def rank_search_results(results: list[dict], query: str) -> list[dict]:
+    """
+    Orders search results by relevance of their title and snippet to the query.
+
+    Results are scored by BM25 of their title and snippet (normalized to 0-1) plus a bonus decreasing
+    with the search engine rank. The score of a result is multiplied by REPEATED_DOMAIN_PENALTY for every
+    result from its domain ranked higher, so that the top results cover more sources, while a relevant
+    result from a repeated domain still ranks ahead of an irrelevant one.
+    Args:
+        results: The search results (dicts with title, link and snippet) in the search engine order.
+        query: The search query.
+    Returns:
+        The results in the order they should be fetched.
+    """
+    scores = TermIndex([_result_text(result) for result in results]).bm25_scores(query)
+    max_score = max(scores, default=0.0) or 1.0
+    base_scores = [scores[i] / max_score + SEARCH_RANK_WEIGHT / (1 + i) for i in range(len(results))]
+    domains = [domain_of(result["link"]) for result in results]
+    domain_counts: dict[str, int] = {}
+    remaining = list(range(len(results)))
+    ranked = []
+    while remaining:
+        best = max(
+            remaining,
+            key=lambda i: base_scores[i] * REPEATED_DOMAIN_PENALTY ** domain_counts.get(domains[i], 0),
+        )
+        remaining.remove(best)
+        ranked.append(results[best])
+        domain_counts[domains[best]] = domain_counts.get(domains[best], 0) + 1
+    return ranked
+
+def snippet_coverage(result: dict, query: str) -> float:
+    """
+    Returns the fraction of query terms found in the title and snippet of the search result.
+    """
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return 0.0
+    return len(query_terms & set(tokenize(_result_text(result)))) / len(query_terms)
+
+def format_snippets(results: list[dict], query: str) -> str:
+    """
+    Formats search result snippets as a web content analysis result.
+    """
+    lines = [f'Search results for "{query}":']
+    lines += [
+        f"- {result.get('title', '')} ({domain_of(result['link'])}): {result.get('snippet', '')}"
+        for result in results
+    ]
+    return "\n".join(lines)
@@ -1,6 +1,6 @@
 import operator
 
-from typing import TypedDict
+from typing import Optional, TypedDict
 
 from langgraph.graph import add_messages
 from langchain_core.messages import BaseMessage
@@ -14,30 +14,68 @@ class WebResearchQuery(TypedDict):
     search_query: Annotated[str, ..., "Query to answer by analyzing web page content."]
     rationale: Annotated[str, ..., "Rationale for the web content analysis."]
 
+class WebResearchState(WebResearchQuery):
+    """
+    State of a single web search branch.
+    """
+    seen_urls: Annotated[set, ..., "Digests of URLs already analyzed in the research run."]
+    results_per_query: Annotated[Optional[int], ..., "Number of search results to fetch and analyze."]
+
 class WebResearchResult(WebResearchQuery):
     """
     A single web research result.
     """
     url: Annotated[str, ..., "URL returned from web search."]
+    title: Annotated[str, ..., "Title of the search result."]
+    snippet: Annotated[str, ..., "Snippet of the search result."]
+    domain: Annotated[str, ..., "Domain of the URL."]
+
+class WebContentAnalysisState(WebResearchResult):
+    """
+    State of a single web page analysis branch.
+    """
+    research_run_id: Annotated[str, ..., "Identifier of the research run, used to detect duplicate pages."]
+    analysis_deadline: Annotated[Optional[float], ..., "Time (epoch seconds) the analysis must finish by."]
+
+class ResearchBudgetState(TypedDict):
+    """
+    State for tracking resources used by the research and the budget-driven research plan.
+    """
+    research_started_at: Annotated[float, ..., "Time (epoch seconds) the research started."]
+    tokens_used: Annotated[int, operator.add]
+    cost_usd: Annotated[float, operator.add]
+    planned_queries: Annotated[Optional[int], ..., "Number of search queries planned for the research loop."]
+    results_per_query: Annotated[Optional[int], ..., "Number of search results per query planned for the research loop."]
+    running_late_analyses: Annotated[int, ..., "Number of analyses that missed the deadline and were still running at the last reflection."]
 
-class GenerateQueryState(TypedDict):
+class GenerateQueryState(ResearchBudgetState):
     """
     State for generating web research queries.
     """
     user_query: Annotated[str, ..., "Condensed user query best describing the research topic and what the user wants"]
     web_research_queries: Annotated[list, operator.add]
+    research_run_id: Annotated[str, ..., "Identifier of the research run, used to detect duplicate pages."]
 
 class WebResearchResultState(GenerateQueryState):
     """
     State for holding web research results which include collected links from web research.
     """
     web_research_results: Annotated[list, operator.add]
+    reused_url_count: Annotated[int, operator.add]
+    executed_queries: Annotated[list, operator.add]
+    urls_to_analyze: Annotated[list, ..., "Web research results selected for analysis in the current research loop."]
+    analysis_deadline: Annotated[Optional[float], ..., "Time (epoch seconds) the analyses of the current research loop must finish by."]
 
 class WebContentAnalysisResultState(WebResearchResultState):
     """
     State for holding web content analysis results.
     """
     web_content_analysis_results: Annotated[list, operator.add]
+    skipped_duplicates: Annotated[int, operator.add]
+    seen_urls: Annotated[set, operator.or_]
+    late_analyses: Annotated[list, operator.add]
+    findings: Annotated[list[str], ..., "Deduplicated, bounded findings of the research so far."]
+    findings_analyses_count: Annotated[int, ..., "Number of web content analysis results already added to the findings."]
 
 class OverallState(WebContentAnalysisResultState):
     """
@@ -50,12 +88,14 @@ class OverallState(WebContentAnalysisResultState):
     reasoning_model: str
     extra_instructions: str
 
-class ReflectionState(TypedDict):
+class ReflectionState(ResearchBudgetState):
     """
     State for reflection on the provided summaries about a research topic.
     """
     is_sufficient: bool
     knowledge_gap: str
-    follow_up_queries: Annotated[list, operator.add]
+    follow_up_queries: Annotated[list, ..., "Follow-up queries of the last reflection."]
     research_loop_count: int
-    number_of_ran_queries: int
\ No newline at end of file
+    number_of_ran_queries: int
+    seen_urls: Annotated[set, operator.or_]
+    executed_queries: Annotated[list, operator.add]
\ No newline at end of file
@@ -1,24 +1,21 @@
 import uuid
 import json
 from datetime import datetime
-from functools import lru_cache
 from langgraph.store.base import BaseStore
-from langchain_core.runnables import RunnableConfig
-from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.messages import SystemMessage, AIMessage
-from langchain_openai import ChatOpenAI
 from memory.state import MemoryState, MemoryAccessQueriesState
 from memory.prompts import generate_memory_queries_prompt, analyze_memory_results_prompt
 from memory.schema import MemoryAccessQueriesResult
+from utils.llm import get_chat_model
 
-@lru_cache(maxsize=4)
-def _get_model(model_name: str, temperature: float = 0.0) -> BaseChatModel:
+def _get_model(model_name: str, temperature: float = 0.0, schema: type | None = None) -> Runnable:
     """
-    Returns a language model instance based on the provided model name.
-    Caches up to 4 different model instances.
+    Returns a shared language model instance based on the provided model name,
+    with structured output if schema is given.
     """
     if model_name == "openai":
-        model = ChatOpenAI(temperature=temperature, model_name="gpt-4o")
+        model = get_chat_model("gpt-4o", temperature=temperature, schema=schema)
     elif model_name == "anthropic":
         #model =  ChatAnthropic(temperature=0, model_name="claude-3-sonnet-20240229")
         raise NotImplementedError("Do not use Anthropic models for now")
@@ -43,8 +40,7 @@ def node_generate_memory_access_queries(state: MemoryState, config: RunnableConf
     )
     messages = [system_prompt] + messages
     model_name = config.get('configurable', {}).get("model_name", "openai")
-    llm = _get_model(model_name, temperature=0.5)
-    structured_llm = llm.with_structured_output(MemoryAccessQueriesResult)
+    structured_llm = _get_model(model_name, temperature=0.5, schema=MemoryAccessQueriesResult)
 
     result = structured_llm.invoke(messages)
     result_queries = [query.dict() for query in result.memory_access_queries]
@@ -0,0 +1,152 @@
+"""
+Batch mode of the console runner (cli_runner.py --batch), running conversations from a JSONL file.
+"""
+import json
+import math
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from agent.state import AgentState
+from utils.usage import usage_cost
+
+log = logging.getLogger(__name__)
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of the values."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+class BatchRunner:
+    """
+    Non-interactive runner of conversations read from a JSONL file through the agent graph,
+    for throughput runs and capacity planning.
+
+    Every line is a conversation: {"id": "c1", "turns": ["Hi, I'm Bob", "What's the weather in Paris?"]}
+    ("query" can be used instead of "turns" for single-turn conversations, "configurable" is merged
+    into the graph configurable, eg. {"fast_path": true}). Conversations run in parallel on a pool
+    of workers, each with its own thread_id, their turns run in order. One result line per turn,
+    with the answer, latency and token usage, is written as soon as the turn finishes.
+    """
+
+    def __init__(self, graph, workers: int = 4):
+        self.graph = graph
+        self.workers = workers
+        self._output_lock = threading.Lock()
+
+    @staticmethod
+    def load_conversations(path: str) -> list[dict]:
+        """Load conversations from the JSONL file, assigning ids to conversations without one."""
+        conversations = []
+        with open(path, "r", encoding="utf-8") as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                conversation = json.loads(line)
+                if "turns" not in conversation:
+                    conversation["turns"] = [conversation["query"]]
+                conversation.setdefault("id", str(line_number))
+                conversations.append(conversation)
+        return conversations
+
+    def run_turn(self, user_input: str, config: dict) -> dict:
+        """Run one user turn through the graph, measuring its latency and the tokens used by all LLM calls."""
+        usage_handler = UsageMetadataCallbackHandler()
+        started = time.perf_counter()
+        result = self.graph.invoke(
+            AgentState(messages=[HumanMessage(content=user_input)]),
+            config={**config, "callbacks": [usage_handler]},
+        )
+        latency = time.perf_counter() - started
+        last_message = result.get("messages", [])[-1] if result.get("messages") else None
+        usage = usage_handler.usage_metadata
+        return {
+            "answer": last_message.content if isinstance(last_message, AIMessage) else None,
+            "latency_seconds": round(latency, 3),
+            "input_tokens": sum(model_usage.get("input_tokens", 0) for model_usage in usage.values()),
+            "output_tokens": sum(model_usage.get("output_tokens", 0) for model_usage in usage.values()),
+            "cost_usd": round(sum(
+                usage_cost(model, model_usage.get("input_tokens", 0), model_usage.get("output_tokens", 0))
+                for model, model_usage in usage.items()
+            ), 6),
+        }
+
+    def run_conversation(self, conversation: dict, output) -> list[dict]:
+        """Run turns of the conversation in order, on its own thread. A failed turn ends the conversation."""
+        thread_id = str(uuid.uuid4())
+        config = {"configurable": {
+            "model_name": "openai", **conversation.get("configurable", {}), "thread_id": thread_id,
+        }}
+        results = []
+        for turn, user_input in enumerate(conversation["turns"]):
+            record = {"id": conversation["id"], "thread_id": thread_id, "turn": turn, "query": user_input}
+            try:
+                record.update(self.run_turn(user_input, config))
+            except Exception as e:
+                log.error("Conversation %s failed at turn %d: %s", conversation["id"], turn, str(e))
+                record["error"] = str(e)
+            results.append(record)
+            with self._output_lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+            if "error" in record:
+                break
+        return results
+
+    def run(self, input_path: str, output_path: str) -> dict:
+        """Run all conversations of the input file, write per-turn results and print the summary."""
+        conversations = self.load_conversations(input_path)
+        print(f"Running {len(conversations)} conversations "
+              f"({sum(len(conversation['turns']) for conversation in conversations)} turns) with {self.workers} workers")
+        started = time.perf_counter()
+        with open(output_path, "w", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = [
+                record
+                for records in executor.map(lambda conversation: self.run_conversation(conversation, output), conversations)
+                for record in records
+            ]
+        summary = self.summarize(results, time.perf_counter() - started)
+        self.print_summary(summary)
+        print(f"Results written to {output_path}")
+        return summary
+
+    @staticmethod
+    def summarize(results: list[dict], elapsed: float) -> dict:
+        """Aggregate latency, throughput and token usage of the turns."""
+        succeeded = [record for record in results if "error" not in record]
+        latencies = [record["latency_seconds"] for record in succeeded]
+        summary = {
+            "turns": len(results),
+            "errors": len(results) - len(succeeded),
+            "wall_seconds": round(elapsed, 3),
+            "turns_per_minute": round(len(succeeded) / elapsed * 60, 2) if elapsed else 0.0,
+            "input_tokens": sum(record["input_tokens"] for record in succeeded),
+            "output_tokens": sum(record["output_tokens"] for record in succeeded),
+            "cost_usd": round(sum(record["cost_usd"] for record in succeeded), 4),
+        }
+        if latencies:
+            summary.update({
+                "latency_mean": round(sum(latencies) / len(latencies), 3),
+                "latency_p50": percentile(latencies, 50),
+                "latency_p90": percentile(latencies, 90),
+                "latency_p99": percentile(latencies, 99),
+                "latency_max": max(latencies),
+            })
+        return summary
+
+    @staticmethod
+    def print_summary(summary: dict):
+        """Print the batch summary."""
+        print(f"\n{'='*60}")
+        print(f"Turns: {summary['turns']}, errors: {summary['errors']}, wall time: {summary['wall_seconds']:.1f}s, "
+              f"throughput: {summary['turns_per_minute']:.1f} turns/min")
+        if "latency_mean" in summary:
+            print(f"Latency (s): mean {summary['latency_mean']:.2f}, p50 {summary['latency_p50']:.2f}, "
+                  f"p90 {summary['latency_p90']:.2f}, p99 {summary['latency_p99']:.2f}, max {summary['latency_max']:.2f}")
+        print(f"Tokens: {summary['input_tokens']} input, {summary['output_tokens']} output, "
+              f"cost: ${summary['cost_usd']:.4f}")
+        print(f"{'='*60}")
@@ -0,0 +1,84 @@
+"""
+Streaming of agent graph answers, used by the console runner (cli_runner.py --stream).
+"""
+import time
+from typing import Callable, Optional, TypedDict
+from langchain_core.messages import AIMessage
+
+# Nodes of the agent graph whose LLM tokens are the answer to the user
+ANSWER_NODES = ("finalize_answer",)
+
+
+class StreamResult(TypedDict):
+    """
+    Streamed answer with its timing.
+    """
+    answer: str
+    time_to_first_token: Optional[float]
+    total_seconds: float
+
+
+def format_progress(namespace: tuple, node: str) -> str:
+    """
+    Formats graph progress event, eg. "web_search › web_research" for a subgraph node.
+    """
+    stages = [part.split(":")[0] for part in namespace] + [node]
+    return " › ".join(stages)
+
+def stream_answer(graph, graph_input: dict, config: dict, on_token: Callable[[str], None],
+                  on_progress: Callable[[str], None]) -> StreamResult:
+    """
+    Runs the graph with graph.stream(stream_mode=["messages", "updates"], subgraphs=True),
+    passing tokens of the answer to on_token as they arrive.
+
+    Only tokens of the top-level ANSWER_NODES are the answer (deep research has a finalize_answer
+    node as well). Answers not generated by an LLM (eg. the fast path) arrive only as node updates,
+    they are passed to on_token at once when the graph finishes. Until the first token, progress of
+    the graph and subgraph nodes is passed to on_progress.
+
+    Args:
+        graph: Compiled agent graph
+        graph_input: Graph input
+        config: Graph configuration (eg. with thread_id)
+        on_token: Called with every piece of the answer
+        on_progress: Called with the formatted name of every node that finished
+
+    Returns:
+        The answer, time to first token (None if the graph gave no answer) and total time in seconds
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    answer_parts = []
+    final_message = None
+    for namespace, mode, data in graph.stream(
+        graph_input, config=config, stream_mode=["messages", "updates"], subgraphs=True
+    ):
+        if mode == "messages":
+            chunk, metadata = data
+            if namespace or metadata.get("langgraph_node") not in ANSWER_NODES:
+                continue
+            if isinstance(chunk.content, str) and chunk.content:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                answer_parts.append(chunk.content)
+                on_token(chunk.content)
+            continue
+
+        for node, update in data.items():
+            if node.startswith("__"):
+                continue
+            if first_token_at is None:
+                on_progress(format_progress(namespace, node))
+            if not namespace and isinstance(update, dict) and update.get("messages"):
+                final_message = update["messages"][-1]
+
+    if not answer_parts and isinstance(final_message, AIMessage) and isinstance(final_message.content, str) \
+            and final_message.content:
+        first_token_at = time.perf_counter()
+        answer_parts.append(final_message.content)
+        on_token(final_message.content)
+    return StreamResult(
+        answer="".join(answer_parts),
+        time_to_first_token=first_token_at - started if first_token_at is not None else None,
+        total_seconds=time.perf_counter() - started,
+    )
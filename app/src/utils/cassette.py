@@ -0,0 +1,252 @@
+import json
+import gzip
+import time
+import base64
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+from typing import Literal, Optional, TypedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httpx
+import httplib2
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+log = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+# Only response headers the graphs (or the HTTP clients) act upon are recorded,
+# including the ones driving the retries of the OpenAI client
+RECORDED_HEADERS = frozenset([
+    "content-type", "etag", "last-modified", "location", "retry-after", "cache-control", "expires",
+    "retry-after-ms", "x-should-retry",
+])
+# Query parameters carrying credentials (eg. Google CSE "key") are not written to the cassette
+REDACTED_QUERY_PARAMS = frozenset(["key", "api_key", "apikey", "access_token", "token"])
+REDACTED = "REDACTED"
+
+CassetteMode = Literal["record", "replay"]
+CassetteLatency = Literal["original", "zero"]
+
+
+class Interaction(TypedDict):
+    """
+    A single recorded HTTP exchange.
+    """
+    method: str
+    url: str
+    body_sha256: str
+    status: int
+    headers: dict[str, str]
+    body: str
+    body_encoding: Literal["utf-8", "base64"]
+    elapsed: float
+
+
+class CassetteMissError(LookupError):
+    """
+    Raised in replay mode for a request without a recorded response.
+    """
+
+
+def redact_url(url: str) -> str:
+    """
+    Returns the URL with values of credential query parameters replaced.
+    """
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [
+        (name, REDACTED if name.lower() in REDACTED_QUERY_PARAMS else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def _body_sha256(body: Optional[bytes | str]) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body or b"").hexdigest()
+
+def _recorded_headers(headers) -> dict[str, str]:
+    return {name.lower(): value for name, value in headers.items() if name.lower() in RECORDED_HEADERS}
+
+
+class Cassette:
+    """
+    Records outbound HTTP exchanges of a graph run (LLM calls through httpx, page downloads through
+    requests, Google CSE calls through httplib2) into a gzipped JSON file and replays them back.
+
+    In replay mode no request leaves the process. A request is answered by the first unplayed
+    interaction with the same method, URL and body hash; requests whose body changed (eg. a prompt with
+    the current date) fall back to the next unplayed interaction with the same method and URL.
+    Responses are served after their recorded latency or immediately (latency="zero"),
+    which isolates Python overhead of the graphs from network time.
+
+        with Cassette("run.json.gz", mode="record"):
+            graph.invoke(...)
+        with Cassette("run.json.gz", mode="replay", latency="zero"):
+            graph.invoke(...)
+
+    Request headers are not recorded, credential query parameters are redacted.
+    Only one cassette can be active at a time.
+    """
+
+    _active_lock = threading.Lock()
+
+    def __init__(self, path: str, mode: CassetteMode, latency: CassetteLatency = "original"):
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.interactions: list[Interaction] = []
+        self.network_seconds = 0.0
+        self._played: list[bool] = []
+        self._lock = threading.Lock()
+        self._originals = []
+
+    def __enter__(self) -> "Cassette":
+        if not Cassette._active_lock.acquire(blocking=False):
+            raise RuntimeError("Another cassette is already active")
+        if self.mode == "replay":
+            self.load()
+        self._patch(httpx.HTTPTransport, "handle_request", self._httpx_handle_request)
+        self._patch(httpx.AsyncHTTPTransport, "handle_async_request", self._httpx_handle_async_request)
+        self._patch(HTTPAdapter, "send", self._requests_send)
+        self._patch(httplib2.Http, "request", self._httplib2_request)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+        Cassette._active_lock.release()
+        if self.mode == "record":
+            self.save()
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+        self.interactions = data["interactions"]
+        self._played = [False] * len(self.interactions)
+
+    def save(self) -> None:
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, file, separators=(",", ":"))
+        log.info("Recorded %d HTTP interactions to %s", len(self.interactions), self.path)
+
+    def _patch(self, owner: type, name: str, replacement) -> None:
+        original = getattr(owner, name)
+        self._originals.append((owner, name, original))
+
+        def patched(client, *args, **kwargs):
+            return replacement(original, client, *args, **kwargs)
+
+        async def patched_async(client, *args, **kwargs):
+            return await replacement(original, client, *args, **kwargs)
+
+        setattr(owner, name, patched_async if name == "handle_async_request" else patched)
+
+    def _record(self, method: str, url: str, request_body, status: int, headers, content: bytes,
+                elapsed: float) -> None:
+        try:
+            body, body_encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, body_encoding = base64.b64encode(content).decode("ascii"), "base64"
+        interaction = Interaction(
+            method=method.upper(),
+            url=redact_url(url),
+            body_sha256=_body_sha256(request_body),
+            status=status,
+            headers=_recorded_headers(headers),
+            body=body,
+            body_encoding=body_encoding,
+            elapsed=round(elapsed, 4),
+        )
+        with self._lock:
+            self.interactions.append(interaction)
+            self.network_seconds += elapsed
+
+    def _replay(self, method: str, url: str, request_body) -> tuple[Interaction, bytes]:
+        method, url, body_sha256 = method.upper(), redact_url(url), _body_sha256(request_body)
+        with self._lock:
+            candidates = [
+                idx for idx, interaction in enumerate(self.interactions)
+                if not self._played[idx] and interaction["method"] == method and interaction["url"] == url
+            ]
+            if not candidates:
+                raise CassetteMissError(f"No recorded response for {method} {url}")
+            idx = next(
+                (idx for idx in candidates if self.interactions[idx]["body_sha256"] == body_sha256),
+                candidates[0],
+            )
+            self._played[idx] = True
+            interaction = self.interactions[idx]
+            self.network_seconds += interaction["elapsed"]
+        if self.latency == "original":
+            time.sleep(interaction["elapsed"])
+        if interaction["body_encoding"] == "base64":
+            return interaction, base64.b64decode(interaction["body"])
+        return interaction, interaction["body"].encode("utf-8")
+
+    def _httpx_handle_request(self, original, transport, request: httpx.Request) -> httpx.Response:
+        if self.mode == "replay":
+            interaction, content = self._replay(request.method, str(request.url), request.read())
+            return httpx.Response(interaction["status"], headers=interaction["headers"], content=content, request=request)
+        started = time.perf_counter()
+        response = original(transport, request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        self._record(request.method, str(request.url), request.read(), response.status_code, response.headers,
+                     content, time.perf_counter() - started)
+        return httpx.Response(response.status_code, headers=_recorded_headers(response.headers), content=content,
+                              request=request)
+
+    async def _httpx_handle_async_request(self, original, transport, request: httpx.Request) -> httpx.Response:
+        if self.mode == "replay":
+            interaction, content = self._replay(request.method, str(request.url), await request.aread())
+            return httpx.Response(interaction["status"], headers=interaction["headers"], content=content, request=request)
+        started = time.perf_counter()
+        response = await original(transport, request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        self._record(request.method, str(request.url), await request.aread(), response.status_code, response.headers,
+                     content, time.perf_counter() - started)
+        return httpx.Response(response.status_code, headers=_recorded_headers(response.headers), content=content,
+                              request=request)
+
+    def _requests_send(self, original, adapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.mode == "replay":
+            interaction, content = self._replay(request.method, request.url, request.body)
+            response = requests.Response()
+            response.status_code = interaction["status"]
+            response.headers = CaseInsensitiveDict(interaction["headers"])
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response.request = request
+            response.elapsed = timedelta(seconds=interaction["elapsed"])
+            # the body is already read, streamed downloads (iter_content) are served from it
+            response._content = content
+            response._content_consumed = True
+            return response
+        started = time.perf_counter()
+        response = original(adapter, request, **kwargs)
+        content = response.content
+        self._record(request.method, request.url, request.body, response.status_code, response.headers,
+                     content, time.perf_counter() - started)
+        return response
+
+    def _httplib2_request(self, original, http, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        if self.mode == "replay":
+            interaction, content = self._replay(method, uri, body)
+            return httplib2.Response({"status": str(interaction["status"]), **interaction["headers"]}), content
+        started = time.perf_counter()
+        response, content = original(http, uri, method, body, headers, *args, **kwargs)
+        self._record(method, uri, body, response.status, response, content, time.perf_counter() - started)
+        return response, content
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, TypedDict
+
+log = logging.getLogger(__name__)
+
+
+class CacheEntry(TypedDict):
+    """
+    A single entry stored in the disk cache.
+    """
+    key: str
+    raw: Optional[bytes]
+    text: Optional[str]
+    metadata: dict
+    created_at: float
+    accessed_at: float
+
+
+class DiskCache:
+    """
+    SQLite backed key-value cache with TTL and size-bounded LRU eviction.
+
+    Every entry holds an optional binary payload (`raw`), an optional text rendering of
+    that payload (`text`) and a JSON serializable `metadata` dict. Entries older than
+    `ttl_seconds` are reported as stale, but they are kept on disk until evicted so that
+    callers can revalidate them (eg. with ETag/Last-Modified) instead of fetching again.
+    When the total size of stored payloads exceeds `max_bytes`, least recently used
+    entries are removed first.
+
+    The cache is safe to use from multiple threads. Multiple processes can share the same
+    database file thanks to SQLite locking.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                raw BLOB,
+                text TEXT,
+                metadata TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Returns the entry stored under the given key (fresh or stale) or None.
+        Reading an entry marks it as recently used.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw, text, metadata, created_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        raw, text, metadata, created_at = row
+        return CacheEntry(
+            key=key,
+            raw=raw,
+            text=text,
+            metadata=json.loads(metadata),
+            created_at=created_at,
+            accessed_at=now,
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """
+        Checks whether the entry is still within the configured TTL.
+        """
+        if self.ttl_seconds is None:
+            return True
+        return time.time() - entry["created_at"] < self.ttl_seconds
+
+    def put(self, key: str, raw: Optional[bytes] = None, text: Optional[str] = None,
+            metadata: Optional[dict] = None) -> None:
+        """
+        Stores (or replaces) the entry under the given key and evicts old entries if needed.
+        """
+        now = time.time()
+        size = len(raw or b"") + len((text or "").encode("utf-8"))
+        if size > self.max_bytes:
+            log.info("Entry %s is larger than the whole cache (%d bytes), not caching", key, size)
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, raw, text, metadata, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, raw, text, json.dumps(metadata or {}), size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str, metadata: Optional[dict] = None) -> None:
+        """
+        Marks the entry as freshly validated, restarting its TTL.
+        Optionally replaces its metadata (eg. with new validators received on revalidation).
+        """
+        now = time.time()
+        with self._lock:
+            if metadata is None:
+                self._conn.execute(
+                    "UPDATE entries SET created_at = ?, accessed_at = ? WHERE key = ?",
+                    (now, now, key),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE entries SET created_at = ?, accessed_at = ?, metadata = ? WHERE key = ?",
+                    (now, now, json.dumps(metadata), key),
+                )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """
+        Removes the entry stored under the given key.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def total_size(self) -> int:
+        """
+        Returns the total size in bytes of all stored payloads.
+        """
+        with self._lock:
+            return self._total_size()
+
+    def hit_ratio(self) -> float:
+        """
+        Returns the ratio of cache hits to all lookups performed by this instance.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self) -> None:
+        """
+        Drops least recently used entries until the cache fits in max_bytes.
+        Must be called with the lock held.
+        """
+        excess = self._total_size() - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = 0
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC")
+        keys_to_evict = []
+        for key, size in rows:
+            if evicted >= excess:
+                break
+            keys_to_evict.append((key,))
+            evicted += size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", keys_to_evict)
+        log.info("Evicted %d cache entries (%d bytes) from %s", len(keys_to_evict), evicted, self.path)
@@ -0,0 +1,39 @@
+import re
+import hashlib
+from collections import Counter
+from typing import Optional
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+def simhash(text: str, min_words: int = 50) -> Optional[int]:
+    """
+    Computes 64-bit SimHash fingerprint of the text (Charikar's SimHash over word 3-shingles).
+    Near-duplicate texts (eg. the same article with different navigation or ads) have fingerprints
+    differing in a few bits only, see hamming_distance.
+    Args:
+        text: The text to fingerprint (eg. page content in markdown).
+        min_words: Texts with fewer words are not fingerprinted, as short texts
+            (eg. error messages) look alike regardless of their meaning.
+    Returns:
+        The fingerprint or None for too short texts.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < min_words:
+        return None
+    shingles = Counter(
+        " ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in shingles.items():
+        shingle_hash = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if shingle_hash >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def hamming_distance(first: int, second: int) -> int:
+    """
+    Returns the number of bits differing between two fingerprints.
+    """
+    return (first ^ second).bit_count()
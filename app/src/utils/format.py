@@ -3,4 +3,10 @@ from datetime import datetime
 def format_date(timestamp: int) -> str:
     """Formats a UTC timestamp (in seconds) to a human-readable string."""
     return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-           
\ No newline at end of file
+           
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query so that queries differing only in letter case,
+    whitespace or trailing punctuation are treated as the same query (eg. in cache keys).
+    """
+    return " ".join(query.split()).strip("?!. ").lower()
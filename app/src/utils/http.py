@@ -0,0 +1,304 @@
+import re
+import codecs
+import logging
+import threading
+from typing import Callable, Mapping, Optional, TypedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config.config_loader import app_config
+from utils.scheduler import get_scraping_scheduler, parse_retry_after
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/126.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+DEFAULT_TIMEOUT_SECONDS = 10
+RETRY_STATUS_CODES = (500, 502, 504)
+# Responses asking to slow down are retried by fetch_page through the scraping scheduler,
+# which pauses the whole domain instead of sleeping in the calling thread
+THROTTLING_STATUS_CODES = (429, 503)
+DEFAULT_MAX_RETRY_AFTER_SECONDS = 30
+
+DEFAULT_FETCH_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_ALLOWED_CONTENT_TYPES = ["text/html", "application/xhtml+xml", "text/plain"]
+FETCH_CHUNK_SIZE = 64 * 1024
+DEFAULT_FETCH_BACKEND = "http"
+# HTML spec requires the <meta charset> declaration to fit in the first 1024 bytes,
+# be a bit more forgiving for pages that don't follow that rule
+CHARSET_SNIFF_BYTES = 4096
+META_CHARSET_PATTERN = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-:.]+)""",
+    re.IGNORECASE,
+)
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_adapters: dict[str, HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+_thread_local = threading.local()
+
+def http_timeout() -> float:
+    """
+    Returns the configured timeout (in seconds) for outbound HTTP requests.
+    """
+    return app_config.get("http_timeout_seconds", DEFAULT_TIMEOUT_SECONDS)
+
+def _create_retry() -> Retry:
+    """
+    Creates retry policy with exponential backoff for server errors.
+    Throttled requests (Retry-After) are left to fetch_page and the scraping scheduler.
+    """
+    return Retry(
+        total=app_config.get("http_max_retries", 2),
+        backoff_factor=app_config.get("http_backoff_factor", 0.5),
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+
+def _get_adapters() -> dict[str, HTTPAdapter]:
+    """
+    Returns connection pooling adapters shared by all threads, keyed by URL prefix.
+    The default adapter keeps a keep-alive pool of `http_pool_maxsize` connections
+    for each of up to `http_pool_connections` hosts. Pool size of selected hosts can be
+    overridden with `http_host_pool_sizes` (eg. {"en.wikipedia.org": 20}).
+    """
+    if not _adapters:
+        with _adapters_lock:
+            if not _adapters:
+                retry = _create_retry()
+                default_adapter = HTTPAdapter(
+                    pool_connections=app_config.get("http_pool_connections", 20),
+                    pool_maxsize=app_config.get("http_pool_maxsize", 10),
+                    max_retries=retry,
+                )
+                adapters = {
+                    "http://": default_adapter,
+                    "https://": default_adapter,
+                }
+                for host, pool_size in app_config.get("http_host_pool_sizes", {}).items():
+                    host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+                    adapters[f"http://{host}/"] = host_adapter
+                    adapters[f"https://{host}/"] = host_adapter
+                _adapters.update(adapters)
+    return _adapters
+
+def get_http_session() -> requests.Session:
+    """
+    Returns HTTP session to be used for outbound requests made by the current thread.
+
+    requests.Session keeps mutable state (eg. cookies) so every thread gets its own session,
+    however all sessions share the same connection pools. This way parallel graph branches
+    reuse keep-alive connections to the same hosts instead of doing TCP and TLS handshakes
+    for every request.
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        for prefix, adapter in _get_adapters().items():
+            session.mount(prefix, adapter)
+        _thread_local.session = session
+        log.debug("Created HTTP session for thread %s", threading.current_thread().name)
+    return session
+
+
+class UnsupportedContentTypeError(requests.RequestException):
+    """
+    Raised when the fetched resource is not a (textual) web page, eg. PDF or image.
+    """
+
+
+class FetchedPage(TypedDict):
+    """
+    Web page downloaded with fetch_page.
+    """
+    status_code: int
+    headers: Mapping[str, str]
+    raw: bytes
+    html: str
+    encoding: Optional[str]
+    truncated: bool
+
+
+def fetch_page(url: str, headers: Optional[dict] = None) -> FetchedPage:
+    """
+    Downloads a web page in streaming mode with bounded memory usage.
+
+    Content-Type is checked before the body is read, so PDFs, images and other binary
+    downloads are rejected without downloading them. The body is read in chunks and the
+    download stops after `fetch_max_bytes`. Text is decoded incrementally, as chunks arrive,
+    with the charset taken from the Content-Type header, byte order mark or the <meta> tag
+    (no statistical charset detection). Only decoding is incremental, the page is returned
+    as a whole and converted to markdown (see web_page_analyzer.utils) after the download.
+    Downloads go through the scraping scheduler (per-domain concurrency and rate limits,
+    global in-flight cap). Throttled requests (429/503) are retried after Retry-After,
+    during which the whole domain is paused.
+    Args:
+        url: The URL to fetch.
+        headers: Extra request headers (eg. conditional request headers).
+    Returns:
+        The fetched page. For 304 (Not Modified) responses raw and html are empty.
+    Raises:
+        requests.RequestException: on connection errors and error status codes.
+        UnsupportedContentTypeError: if the resource is not a supported text document.
+    """
+    scheduler = get_scraping_scheduler()
+    max_retries = app_config.get("http_max_retries", 2)
+    attempt = 0
+    while True:
+        with scheduler.slot(url), get_http_session().get(
+            url, timeout=http_timeout(), headers=headers, stream=True
+        ) as response:
+            if response.status_code in THROTTLING_STATUS_CODES and attempt < max_retries:
+                delay = _throttling_delay(response, attempt)
+                if delay is not None:
+                    scheduler.block(url, delay)
+                    attempt += 1
+                    continue
+            return _read_page(url, response)
+
+def _throttling_delay(response: requests.Response, attempt: int) -> Optional[float]:
+    """
+    Returns number of seconds to wait before retrying a throttled request (Retry-After or
+    exponential backoff) or None if the server asks to wait longer than we are willing to.
+    """
+    delay = parse_retry_after(response.headers.get("Retry-After"))
+    if delay is None:
+        delay = app_config.get("http_backoff_factor", 0.5) * (2 ** attempt)
+    if delay > app_config.get("http_max_retry_after_seconds", DEFAULT_MAX_RETRY_AFTER_SECONDS):
+        return None
+    return delay
+
+def _read_page(url: str, response: requests.Response) -> FetchedPage:
+    """
+    Reads body of the streamed response, see fetch_page.
+    Chunks are decoded as they arrive and the body is capped at fetch_max_bytes,
+    both the raw bytes and the decoded text of the whole (possibly truncated) page are kept in memory.
+    """
+    max_bytes = app_config.get("fetch_max_bytes", DEFAULT_FETCH_MAX_BYTES)
+    if response.status_code == 304:
+        return FetchedPage(
+            status_code=304, headers=CaseInsensitiveDict(response.headers), raw=b"", html="", encoding=None, truncated=False
+        )
+    response.raise_for_status()  # throws exception on errors (eg. 404/500)
+
+    content_type = response.headers.get("Content-Type", "")
+    if not is_supported_content_type(content_type):
+        raise UnsupportedContentTypeError(f"Unsupported content type: {content_type}", response=response)
+
+    chunks = []
+    text_parts = []
+    size = 0
+    truncated = False
+    encoding = charset_from_content_type(content_type)
+    decoder = None
+    for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+        if size + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - size]
+            truncated = True
+        chunks.append(chunk)
+        size += len(chunk)
+        if decoder is None:
+            # the charset declaration, if any, is at the very beginning of the document
+            if encoding is None and size < CHARSET_SNIFF_BYTES and not truncated:
+                continue
+            encoding = encoding or sniff_charset(b"".join(chunks)) or "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            text_parts.append(decoder.decode(b"".join(chunks)))
+        else:
+            text_parts.append(decoder.decode(chunk))
+        if truncated:
+            log.warning("Page %s exceeds %d bytes, the rest of the page is skipped", url, max_bytes)
+            break
+
+    raw = b"".join(chunks)
+    if decoder is None:
+        # the whole page is shorter than the charset sniffing window
+        encoding = encoding or sniff_charset(raw) or "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        text_parts.append(decoder.decode(raw))
+    text_parts.append(decoder.decode(b"", final=True))
+
+    return FetchedPage(
+        status_code=response.status_code,
+        headers=CaseInsensitiveDict(response.headers),
+        raw=raw,
+        html="".join(text_parts),
+        encoding=encoding,
+        truncated=truncated,
+    )
+
+# Downloads a web page, takes the URL and extra request headers
+FetchBackend = Callable[[str, Optional[dict]], FetchedPage]
+
+FETCH_BACKENDS: dict[str, FetchBackend] = {
+    "http": fetch_page,
+}
+
+def register_fetch_backend(name: str, backend: FetchBackend) -> None:
+    """
+    Registers a page fetching backend, to be selected with the fetch_backend setting
+    (eg. an instrumented or recorded backend for benchmarks and tests).
+    """
+    FETCH_BACKENDS[name] = backend
+
+def get_fetch_backend() -> FetchBackend:
+    """
+    Returns the page fetching backend selected by the fetch_backend setting (fetch_page by default).
+    """
+    return FETCH_BACKENDS[app_config.get("fetch_backend", DEFAULT_FETCH_BACKEND)]
+
+def is_supported_content_type(content_type: str) -> bool:
+    """
+    Checks whether the Content-Type header value denotes a supported text document.
+    A missing header is accepted, most servers that omit it serve HTML.
+    """
+    mime_type = content_type.split(";", 1)[0].strip().lower()
+    if not mime_type:
+        return True
+    return mime_type in app_config.get("fetch_allowed_content_types", DEFAULT_ALLOWED_CONTENT_TYPES)
+
+def charset_from_content_type(content_type: str) -> Optional[str]:
+    """
+    Returns the charset declared in the Content-Type header value or None.
+    """
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            return _known_encoding(value.strip().strip("\"'"))
+    return None
+
+def sniff_charset(head: bytes) -> Optional[str]:
+    """
+    Determines the document charset from the byte order mark or <meta> tag
+    found at the beginning of the document.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = META_CHARSET_PATTERN.search(head[:CHARSET_SNIFF_BYTES])
+    if match:
+        return _known_encoding(match.group(1).decode("ascii", errors="ignore"))
+    return None
+
+def _known_encoding(name: str) -> Optional[str]:
+    """
+    Returns the encoding name if Python supports it, otherwise None.
+    """
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        log.warning("Unknown charset: %s", name)
+        return None
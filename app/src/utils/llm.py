@@ -0,0 +1,107 @@
+import os
+import logging
+import threading
+from typing import Optional, Sequence
+from openai import DefaultHttpxClient, DefaultAsyncHttpxClient
+import httpx
+from pydantic import BaseModel
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
+from config.config_loader import app_config
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LLM_MAX_CONNECTIONS = 50
+DEFAULT_LLM_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_LLM_MAX_RETRIES = 2
+
+_models: dict[tuple, Runnable] = {}
+_models_lock = threading.Lock()
+_http_clients: dict[str, httpx.Client | httpx.AsyncClient] = {}
+_http_clients_lock = threading.Lock()
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=app_config.get("llm_http_max_connections", DEFAULT_LLM_MAX_CONNECTIONS),
+        max_keepalive_connections=app_config.get(
+            "llm_http_max_keepalive_connections", DEFAULT_LLM_MAX_KEEPALIVE_CONNECTIONS
+        ),
+    )
+
+def _get_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Returns HTTP clients shared by all chat models, so that LLM calls of every graph reuse
+    keep-alive connections instead of doing TCP and TLS handshakes for every node run.
+    Request timeouts are set per request by the OpenAI client.
+    """
+    if not _http_clients:
+        with _http_clients_lock:
+            if not _http_clients:
+                limits = _http_limits()
+                _http_clients["async"] = DefaultAsyncHttpxClient(limits=limits)
+                _http_clients["sync"] = DefaultHttpxClient(limits=limits)
+    return _http_clients["sync"], _http_clients["async"]
+
+def _model_key(model: str, temperature: float, tools: Optional[Sequence], schema: Optional[type[BaseModel]],
+               include_raw: bool) -> tuple:
+    tool_names = tuple(getattr(tool, "name", None) or getattr(tool, "__name__", repr(tool)) for tool in tools or ())
+    return model, float(temperature), tool_names, schema, include_raw
+
+def get_chat_model(
+    model: str,
+    temperature: float = 0.0,
+    *,
+    tools: Optional[Sequence] = None,
+    schema: Optional[type[BaseModel]] = None,
+    include_raw: bool = False,
+) -> Runnable:
+    """
+    Returns a chat model shared by all graphs of the process.
+
+    Models are created once per (model, temperature, tools, structured output schema) and reused,
+    including the runnables prepared by bind_tools and with_structured_output. All models send
+    their requests through the same connection pooled HTTP clients.
+    Chat models are stateless between calls, so the returned runnable is safe to use from parallel
+    graph branches.
+
+    Args:
+        model: OpenAI model name (eg. "gpt-4o")
+        temperature: Sampling temperature
+        tools: Tools to bind to the model, keyed by their names
+        schema: Pydantic model of the structured output
+        include_raw: Whether the structured output also includes the raw message (eg. for token usage)
+
+    Returns:
+        Chat model, model with bound tools or structured output runnable
+    """
+    key = _model_key(model, temperature, tools, schema, include_raw)
+    runnable = _models.get(key)
+    if runnable is not None:
+        return runnable
+    with _models_lock:
+        runnable = _models.get(key)
+        if runnable is None:
+            http_client, http_async_client = _get_http_clients()
+            runnable = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                max_retries=app_config.get("llm_max_retries", DEFAULT_LLM_MAX_RETRIES),
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+            if tools:
+                runnable = runnable.bind_tools(list(tools))
+            if schema is not None:
+                runnable = runnable.with_structured_output(schema, include_raw=include_raw)
+            _models[key] = runnable
+            log.debug("Created chat model %s", key)
+    return runnable
+
+def clear_chat_models() -> None:
+    """
+    Drops all shared chat models, eg. after their factory was replaced in tests or benchmarks.
+    The HTTP clients are kept.
+    """
+    with _models_lock:
+        _models.clear()
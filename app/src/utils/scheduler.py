@@ -0,0 +1,184 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, TypedDict
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+from config.config_loader import app_config
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_DOMAIN_CONCURRENCY = 2
+DEFAULT_DOMAIN_RATE_PER_SECOND = 2.0
+DEFAULT_DOMAIN_BURST = 4
+# Queue waits longer than this are logged as warnings
+SLOW_QUEUE_WAIT_SECONDS = 2.0
+
+
+class DomainStats(TypedDict):
+    """
+    Scheduling statistics of a single domain.
+    """
+    requests: int
+    throttled: int
+    queue_wait_seconds_total: float
+    queue_wait_seconds_max: float
+
+
+class DomainQueue:
+    """
+    Scheduling state of a single domain: concurrency limit, token bucket and Retry-After block.
+    """
+
+    def __init__(self, concurrency: int, rate_per_second: float, burst: int):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = DomainStats(requests=0, throttled=0, queue_wait_seconds_total=0.0, queue_wait_seconds_max=0.0)
+
+    def reserve(self) -> float:
+        """
+        Takes a token from the bucket if the domain isn't blocked.
+        Returns 0 on success or number of seconds to wait before trying again.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.rate_per_second <= 0:
+                return 0.0
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate_per_second)
+            self.refilled_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate_per_second
+
+
+class ScrapingScheduler:
+    """
+    Schedules outbound page downloads politely.
+
+    Each domain has a concurrency limit and a token bucket rate limit (rate_per_second
+    with bursts of up to burst requests), a global cap limits the number of downloads in flight
+    across all domains. A domain that responded with Retry-After is paused for all callers,
+    not just the one that received the response. Limits of selected domains can be overridden
+    with domain_overrides (eg. {"en.wikipedia.org": {"concurrency": 4, "rate_per_second": 10}}).
+    Time spent waiting for a slot is recorded per domain, see stats.
+    """
+
+    def __init__(self, max_in_flight: int, concurrency: int, rate_per_second: float, burst: int,
+                 domain_overrides: Optional[dict[str, dict]] = None):
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._defaults = {"concurrency": concurrency, "rate_per_second": rate_per_second, "burst": burst}
+        self._domain_overrides = domain_overrides or {}
+        self._domains: dict[str, DomainQueue] = {}
+        self._lock = threading.Lock()
+
+    def _domain_queue(self, domain: str) -> DomainQueue:
+        with self._lock:
+            queue = self._domains.get(domain)
+            if queue is None:
+                queue = self._domains[domain] = DomainQueue(
+                    **{**self._defaults, **self._domain_overrides.get(domain, {})}
+                )
+            return queue
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """
+        Blocks until the URL can be downloaded without exceeding the limits of its domain
+        and the global in-flight cap, and holds the download slot until the context exits.
+        """
+        domain = domain_of(url)
+        queue = self._domain_queue(domain)
+        started = time.monotonic()
+        # the global slot is taken last, so that callers waiting for a busy domain don't hold it
+        with queue.semaphore:
+            while (delay := queue.reserve()) > 0:
+                time.sleep(delay)
+            with self._in_flight:
+                waited = time.monotonic() - started
+                with queue.lock:
+                    queue.stats["requests"] += 1
+                    queue.stats["queue_wait_seconds_total"] += waited
+                    queue.stats["queue_wait_seconds_max"] = max(queue.stats["queue_wait_seconds_max"], waited)
+                if waited >= SLOW_QUEUE_WAIT_SECONDS:
+                    log.warning("Download from %s waited %.1fs in the scraping queue", domain, waited)
+                yield
+
+    def block(self, url: str, seconds: float) -> None:
+        """
+        Pauses downloads from the URL's domain for the given number of seconds (eg. after Retry-After).
+        """
+        queue = self._domain_queue(domain_of(url))
+        with queue.lock:
+            queue.blocked_until = max(queue.blocked_until, time.monotonic() + seconds)
+            queue.stats["throttled"] += 1
+        log.info("Downloads from %s paused for %.1fs", domain_of(url), seconds)
+
+    def stats(self) -> dict[str, DomainStats]:
+        """
+        Returns scheduling statistics (including queue wait time) keyed by domain.
+        """
+        with self._lock:
+            queues = dict(self._domains)
+        result = {}
+        for domain, queue in queues.items():
+            with queue.lock:
+                result[domain] = DomainStats(**queue.stats)
+        return result
+
+
+def domain_of(url: str) -> str:
+    """
+    Returns the (lowercase) host name of the URL.
+    """
+    return (urlsplit(url).hostname or "").lower()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses the Retry-After header (delay in seconds or HTTP date) into number of seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_scheduler: Optional[ScrapingScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scraping_scheduler() -> ScrapingScheduler:
+    """
+    Returns the process-wide scheduler of page downloads.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = ScrapingScheduler(
+                    max_in_flight=app_config.get("scraping_max_in_flight", DEFAULT_MAX_IN_FLIGHT),
+                    concurrency=app_config.get("scraping_domain_concurrency", DEFAULT_DOMAIN_CONCURRENCY),
+                    rate_per_second=app_config.get("scraping_domain_rate_per_second", DEFAULT_DOMAIN_RATE_PER_SECOND),
+                    burst=app_config.get("scraping_domain_burst", DEFAULT_DOMAIN_BURST),
+                    domain_overrides=app_config.get("scraping_domain_overrides", {}),
+                )
+    return _scheduler
+
+def scraping_queue_stats() -> dict[str, DomainStats]:
+    """
+    Returns per-domain statistics of the page download queue (requests, throttling, queue wait time).
+    """
+    return get_scraping_scheduler().stats()
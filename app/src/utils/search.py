@@ -0,0 +1,171 @@
+import os
+import json
+import logging
+import threading
+from typing import Callable, Optional
+from langchain_google_community import GoogleSearchAPIWrapper
+from config.config_loader import app_config
+from utils.disk_cache import DiskCache
+from utils.format import normalize_query
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_CACHE_PATH = "~/.cache/ai-chatbot/search_cache.sqlite"
+DEFAULT_SEARCH_CACHE_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_SEARCH_CACHE_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_SEARCH_BACKEND = "google"
+
+# Searches the web, takes the query and the number of results,
+# returns the results (dicts with title, link and snippet)
+SearchBackend = Callable[[str, int], list[dict]]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one call.
+    The first caller runs the function, callers arriving while it runs wait for
+    and share its result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._calls: dict[str, SingleFlight._Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable):
+        """
+        Runs fn, unless a call with the same key is already in flight, and returns its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+        if not leader:
+            log.debug("Waiting for in-flight call: %s", key)
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_search_flights = SingleFlight()
+_search_cache: Optional[DiskCache] = None
+_search_cache_lock = threading.Lock()
+_thread_local = threading.local()
+
+def get_search_cache() -> Optional[DiskCache]:
+    """
+    Returns the process-wide cache of search results or None if caching is disabled.
+    """
+    global _search_cache
+    if not app_config.get("search_cache_enabled", True):
+        return None
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                try:
+                    _search_cache = DiskCache(
+                        path=app_config.get("search_cache_path", DEFAULT_SEARCH_CACHE_PATH),
+                        max_bytes=app_config.get("search_cache_max_bytes", DEFAULT_SEARCH_CACHE_MAX_BYTES),
+                        ttl_seconds=app_config.get("search_cache_ttl_seconds", DEFAULT_SEARCH_CACHE_TTL_SECONDS),
+                    )
+                except Exception as e:
+                    log.error("Unable to open search cache, continuing without it: %s", e)
+                    return None
+    return _search_cache
+
+def _get_google_search() -> GoogleSearchAPIWrapper:
+    """
+    Returns Google search client of the current thread (the underlying httplib2 client isn't thread-safe).
+    """
+    client = getattr(_thread_local, "google_search", None)
+    if client is None:
+        client = _thread_local.google_search = GoogleSearchAPIWrapper(
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            google_cse_id=os.getenv("GOOGLE_CSE_ID")
+        )
+    return client
+
+def _cached_results(cache: Optional[DiskCache], key: str, query: str) -> Optional[list[dict]]:
+    """
+    Returns fresh search results from the search cache or None.
+    """
+    if not cache:
+        return None
+    entry = cache.get(key)
+    if entry and cache.is_fresh(entry):
+        log.info("Search cache hit for query: %s", query)
+        return json.loads(entry["text"])
+    return None
+
+def google_search(query: str, num_results: int) -> list[dict]:
+    """
+    Searches the web with Google Custom Search Engine (CSE).
+
+    Results are cached (see search_cache_* settings) by normalized query and number of results,
+    so repeated searches don't use the CSE quota. Concurrent identical searches
+    (eg. from parallel graph branches or sessions) share a single API request.
+    Args:
+        query: The search query.
+        num_results: The number of results to return.
+    Returns:
+        The search results (dicts with title, link and snippet).
+    """
+    key = json.dumps([normalize_query(query), num_results])
+    cache = get_search_cache()
+    cached = _cached_results(cache, key, query)
+    if cached is not None:
+        return cached
+
+    def search() -> list[dict]:
+        # a search that finished just before this one was coalesced may have filled the cache
+        cached = _cached_results(cache, key, query)
+        if cached is not None:
+            return cached
+        results = _get_google_search().results(query=query, num_results=num_results)
+        # don't cache empty results ("No good Google Search Result was found")
+        if cache and any("link" in result for result in results):
+            cache.put(key, text=json.dumps(results), metadata={"query": query})
+        return results
+
+    return _search_flights.do(key, search)
+
+
+SEARCH_BACKENDS: dict[str, SearchBackend] = {
+    "google": google_search,
+}
+
+def register_search_backend(name: str, backend: SearchBackend) -> None:
+    """
+    Registers a search backend, to be selected with the search_backend setting
+    (eg. a local search index for offline benchmarks).
+    """
+    SEARCH_BACKENDS[name] = backend
+
+def web_search(query: str, num_results: int) -> list[dict]:
+    """
+    Searches the web with the backend selected by the search_backend setting (Google CSE by default).
+    Args:
+        query: The search query.
+        num_results: The number of results to return.
+    Returns:
+        The search results (dicts with title, link and snippet).
+    """
+    backend = app_config.get("search_backend", DEFAULT_SEARCH_BACKEND)
+    return SEARCH_BACKENDS[backend](query, num_results)
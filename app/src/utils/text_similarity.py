@@ -0,0 +1,61 @@
+import re
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+out over own same she should so some such than that the their them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your
+""".split())
+
+def _stem(word: str) -> str:
+    # plural forms only, enough for matching short texts like search queries
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+def word_set(text: str) -> frozenset[str]:
+    """
+    Returns the set of lowercase words of the text without stopwords and plural endings.
+    """
+    return frozenset(_stem(word) for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS)
+
+def char_ngrams(text: str, n: int = 3) -> frozenset[str]:
+    """
+    Returns the set of character n-grams of the text with normalized letter case and whitespace.
+    Unlike words, n-grams match inflected forms and small spelling differences.
+    """
+    text = " ".join(WORD_PATTERN.findall(text.lower()))
+    if len(text) <= n:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+def jaccard_similarity(first: frozenset, second: frozenset) -> float:
+    """
+    Returns the Jaccard similarity (size of intersection / size of union) of two sets.
+    """
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+def text_similarity(first: str, second: str) -> float:
+    """
+    Returns similarity of two short texts (eg. facts or search queries) from 0 to 1,
+    the higher of word and character trigram Jaccard similarities.
+    """
+    return max(
+        jaccard_similarity(word_set(first), word_set(second)),
+        jaccard_similarity(char_ngrams(first), char_ngrams(second)),
+    )
+
+def is_near_duplicate(text: str, others: list[str], max_similarity: float) -> bool:
+    """
+    Checks whether the text is too similar to any of the other texts (text_similarity above max_similarity).
+    Texts with numbers missing in the other text (eg. figures or queries of different years)
+    are not duplicates, however similar.
+    """
+    numbers = set(NUMBER_PATTERN.findall(text))
+    return any(
+        text_similarity(text, other) > max_similarity and numbers <= set(NUMBER_PATTERN.findall(other))
+        for other in others
+    )
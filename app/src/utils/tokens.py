@@ -0,0 +1,11 @@
+import math
+
+# Rough average for English text and OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Returns a cheap estimate of the number of LLM tokens in the given text.
+    Good enough for budgeting and metrics, use a real tokenizer where exact counts matter.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
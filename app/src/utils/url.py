@@ -0,0 +1,56 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that trivially different spellings of the same address
+    map to the same string (eg. to be used as a cache key).
+    Lowercases scheme and host, drops default ports and fragments,
+    sorts query parameters and makes sure the path is not empty.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+# Query parameters that only track the visit and don't change the page content
+TRACKING_PARAMS = frozenset([
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid", "ref_src", "_ga", "_hsenc", "_hsmi",
+])
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+def canonicalize_url(url: str) -> str:
+    """
+    Maps URL variants of the same page to one canonical URL (eg. to detect duplicate search results).
+    On top of normalize_url, treats http and https as the same page, drops "www." and "amp."
+    host prefixes, tracking query parameters (utm_*, fbclid, gclid...), AMP markers
+    ("/amp" path segment, "amp" query parameter) and trailing slashes.
+    """
+    parts = urlsplit(normalize_url(url))
+    scheme = "https" if parts.scheme in DEFAULT_PORTS else parts.scheme
+    host = parts.netloc
+    for prefix in ("www.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path_segments = [segment for segment in parts.path.split("/") if segment and segment != "amp"]
+    path = "/" + "/".join(path_segments)
+    query = urlencode([
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS
+        and not name.lower().startswith(TRACKING_PARAM_PREFIXES)
+        and name.lower() != "amp"
+    ])
+    return urlunsplit((scheme, host, path, query, ""))
+
+def url_digest(url: str) -> str:
+    """
+    Returns a short (16 hex characters) digest of the canonical URL,
+    to track seen pages compactly.
+    """
+    return hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=8).hexdigest()
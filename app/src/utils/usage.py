@@ -0,0 +1,50 @@
+from langchain_core.messages import BaseMessage
+
+# USD prices per 1M input and output tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "o4-mini": (1.10, 4.40),
+    "o3": (2.00, 8.00),
+}
+# Unknown models are priced as the most expensive known model, so that budgets are not overrun
+DEFAULT_MODEL_PRICE = max(MODEL_PRICES.values(), key=sum)
+
+
+def model_price(model: str) -> tuple[float, float]:
+    """
+    Returns USD prices per 1M input and output tokens of the model.
+    Dated model versions (eg. "gpt-4o-2024-08-06") are priced as their base model.
+    """
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model == name or model.startswith(name + "-"):
+            return MODEL_PRICES[name]
+    return DEFAULT_MODEL_PRICE
+
+def token_usage(message: BaseMessage) -> tuple[int, int]:
+    """
+    Returns the number of input and output tokens reported for the LLM response message.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+def usage_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """
+    Returns the estimated USD cost of the LLM call.
+    """
+    input_price, output_price = model_price(model)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+def message_usage(model: str, message: BaseMessage) -> dict:
+    """
+    Returns state update with tokens used by the LLM response message and their cost,
+    to be accumulated in "tokens_used" and "cost_usd" state keys.
+    """
+    input_tokens, output_tokens = token_usage(message)
+    return {
+        "tokens_used": input_tokens + output_tokens,
+        "cost_usd": usage_cost(model, input_tokens, output_tokens),
+    }
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import threading
+from typing import Optional
+from config.config_loader import app_config
+from utils.disk_cache import DiskCache
+from utils.format import normalize_query
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ANALYSIS_CACHE_PATH = "~/.cache/ai-chatbot/analysis_cache.sqlite"
+DEFAULT_ANALYSIS_CACHE_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_ANALYSIS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def analysis_cache_key(page_content: str, search_query: str, model: str, prompt_version: str,
+                       chunk_size_tokens: int, current_date: str) -> str:
+    """
+    Returns the cache key of the analysis of the page content for the search query.
+    The key covers everything the analysis result depends on: page content, query,
+    model, prompts, the chunk size of the map-reduce analysis of long pages and the current date
+    given to the prompts (answers like "next race" depend on it).
+    """
+    content_hash = hashlib.sha256(page_content.encode("utf-8")).hexdigest()
+    key_parts = [
+        content_hash, normalize_query(search_query), model, prompt_version, str(chunk_size_tokens), current_date,
+    ]
+    return hashlib.sha256("\x1f".join(key_parts).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Persistent cache of web page analysis results, backed by DiskCache (TTL, size-bounded LRU eviction).
+    Expired entries are counted as misses.
+    """
+
+    def __init__(self, cache: DiskCache):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached analysis result or None.
+        """
+        entry = self._cache.get(key)
+        if entry and not self._cache.is_fresh(entry):
+            self._cache.delete(key)
+            entry = None
+        with self._lock:
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry["text"] if entry else None
+
+    def put(self, key: str, analysis_result: str, metadata: Optional[dict] = None) -> None:
+        """
+        Stores the analysis result.
+        """
+        self._cache.put(key, text=analysis_result, metadata=metadata)
+
+    def hit_ratio(self) -> float:
+        """
+        Returns the ratio of cache hits to all lookups performed in this process.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else 0.0
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+_analysis_cache_lock = threading.Lock()
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """
+    Returns the process-wide cache of web page analysis results or None if caching is disabled.
+    """
+    global _analysis_cache
+    if not app_config.get("analysis_cache_enabled", True):
+        return None
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                try:
+                    _analysis_cache = AnalysisCache(DiskCache(
+                        path=app_config.get("analysis_cache_path", DEFAULT_ANALYSIS_CACHE_PATH),
+                        max_bytes=app_config.get("analysis_cache_max_bytes", DEFAULT_ANALYSIS_CACHE_MAX_BYTES),
+                        ttl_seconds=app_config.get("analysis_cache_ttl_seconds", DEFAULT_ANALYSIS_CACHE_TTL_SECONDS),
+                    ))
+                except Exception as e:
+                    log.error("Unable to open analysis cache, continuing without it: %s", e)
+                    return None
+    return _analysis_cache
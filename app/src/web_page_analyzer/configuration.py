@@ -0,0 +1,69 @@
+import os
+from typing import Any, Optional
+from pydantic import BaseModel, Field
+
+from langchain_core.runnables import RunnableConfig
+
+
+class Configuration(BaseModel):
+    """The configuration for the web page analyzer."""
+
+    analysis_model: str = Field(
+        default="gpt-4o-mini",
+        description="The name of the language model to use for the web page content analysis.",
+    )
+
+    chunk_size_tokens: int = Field(
+        default=6000,
+        description="Pages longer than this number of tokens are split into chunks of at most this size "
+            "and analyzed in a map-reduce fashion.",
+    )
+
+    max_chunk_concurrency: int = Field(
+        default=4,
+        description="The maximum number of page chunks analyzed concurrently.",
+    )
+
+    relevance_filter_enabled: bool = Field(
+        default=True,
+        description="Whether to send only page sections relevant to the search query to the LLM. "
+            "Sections are ranked locally with BM25, no embedding API is called.",
+    )
+
+    relevance_token_budget: int = Field(
+        default=12000,
+        description="The maximum number of tokens of the relevant page sections sent to the LLM. "
+            "Kept above chunk_size_tokens, so that pages with a lot of relevant content are still "
+            "analyzed in chunks instead of being cut to a single chunk.",
+    )
+
+    relevance_top_k: int = Field(
+        default=48,
+        description="The maximum number of relevant page sections sent to the LLM "
+            "(relevance_token_budget / relevance_section_tokens by default).",
+    )
+
+    relevance_section_tokens: int = Field(
+        default=250,
+        description="The size (in tokens) of page sections ranked by the relevance filter.",
+    )
+
+    @classmethod
+    def from_runnable_config(
+        cls, config: Optional[RunnableConfig] = None
+    ) -> "Configuration":
+        """Create a Configuration instance from a RunnableConfig."""
+        configurable = (
+            config["configurable"] if config and "configurable" in config else {}
+        )
+
+        # Get raw values from environment or config
+        raw_values: dict[str, Any] = {
+            name: os.environ.get(name.upper(), configurable.get(name))
+            for name in cls.model_fields.keys()
+        }
+
+        # Filter out None values
+        values = {k: v for k, v in raw_values.items() if v is not None}
+
+        return cls(**values)
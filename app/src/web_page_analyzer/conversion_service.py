@@ -0,0 +1,113 @@
+import atexit
+import logging
+import threading
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from config.config_loader import app_config
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CONVERSION_POOL_MAX_QUEUE = 64
+DEFAULT_CONVERSION_POOL_MAX_TASKS_PER_CHILD = 200
+
+
+def _html_to_markdown(html: str, main_content_only: bool, engine: Optional[str]) -> str:
+    from web_page_analyzer.utils import convert_html_to_markdown
+    return convert_html_to_markdown(html, main_content_only=main_content_only, engine=engine)
+
+def _html_to_text(html: str) -> str:
+    from web_page_analyzer.utils import html_to_text
+    return html_to_text(html)
+
+
+class ConversionService:
+    """
+    Converts HTML in a pool of worker processes, so that CPU-bound conversions of pages
+    scraped by parallel graph branches run on all cores instead of contending for the GIL.
+
+    The number of conversions submitted to the pool (running and waiting) is bounded
+    by max_queue, callers above the limit block until a slot is freed. Workers are replaced
+    after max_tasks_per_child conversions, which caps memory held by long-lived workers.
+
+    Workers are spawned, and a spawned process re-imports the __main__ module of the application
+    on start (and so on every recycle). Entry points must do their heavy setup (graphs, database
+    connections, tools) only under `if __name__ == "__main__":` before enabling the pool with
+    the `conversion_pool_enabled` setting.
+    """
+
+    def __init__(self, workers: Optional[int], max_queue: int, max_tasks_per_child: int):
+        self._workers = workers
+        self._max_tasks_per_child = max_tasks_per_child
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._lock = threading.Lock()
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # Workers are spawned, forking a process with running threads (HTTP, graph branches) is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=get_context("spawn"),
+            max_tasks_per_child=self._max_tasks_per_child,
+        )
+
+    def _run(self, fn, *args):
+        with self._slots:
+            executor = self._executor
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A worker died (eg. killed by the OOM killer), replace the pool and convert in-process
+                log.warning("Conversion pool is broken, restarting it")
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = self._create_executor()
+                return fn(*args)
+
+    def html_to_markdown(self, html: str, main_content_only: bool = False, engine: Optional[str] = None) -> str:
+        """
+        Converts HTML content to markdown format in a worker process
+        (see web_page_analyzer.utils.convert_html_to_markdown).
+        Raises:
+            MarkdownConversionError: if the conversion fails.
+        """
+        return self._run(_html_to_markdown, html, main_content_only, engine)
+
+    def html_to_text(self, html: str) -> str:
+        """
+        Converts HTML content to plain text in a worker process (see web_page_analyzer.utils.html_to_text).
+        """
+        return self._run(_html_to_text, html)
+
+    def shutdown(self):
+        """
+        Cancels waiting conversions and stops the workers.
+        Waits for the pool, as not waiting while workers are being recycled crashes the pool management thread.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_conversion_service: Optional[ConversionService] = None
+_conversion_service_lock = threading.Lock()
+
+def get_conversion_service() -> Optional[ConversionService]:
+    """
+    Returns the process-wide HTML conversion service or None if the conversion pool is disabled
+    (conversions then run in the calling thread).
+    """
+    global _conversion_service
+    if not app_config.get("conversion_pool_enabled", False):
+        return None
+    if _conversion_service is None:
+        with _conversion_service_lock:
+            if _conversion_service is None:
+                _conversion_service = ConversionService(
+                    workers=app_config.get("conversion_pool_workers"),
+                    max_queue=app_config.get("conversion_pool_max_queue", DEFAULT_CONVERSION_POOL_MAX_QUEUE),
+                    max_tasks_per_child=app_config.get(
+                        "conversion_pool_max_tasks_per_child", DEFAULT_CONVERSION_POOL_MAX_TASKS_PER_CHILD
+                    ),
+                )
+                atexit.register(_conversion_service.shutdown)
+    return _conversion_service
@@ -0,0 +1,173 @@
+import re
+import logging
+from typing import Optional, TypedDict
+import lxml.html
+from lxml import etree
+from utils.tokens import estimate_tokens
+from web_page_analyzer.lxml_converter import parse_document
+
+log = logging.getLogger(__name__)
+
+# Elements that never hold the main content of the page
+BOILERPLATE_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "button", "select", "nav", "aside", "footer", "menu", "dialog",
+]
+# Forms with less text are controls (search boxes, login, newsletter sign-up), longer forms
+# are kept, as some pages (eg. ASP.NET WebForms) wrap the whole body in a <form>
+MAX_CONTROL_FORM_TEXT_LENGTH = 200
+# class/id hints of boilerplate (cookie banners, menus, sidebars etc.) and of the main content
+NEGATIVE_HINTS = re.compile(
+    r"cookie|consent|banner|gdpr|nav|menu|footer|header|sidebar|breadcrumb|share|social|"
+    r"comment|advert|\bads?\b|promo|sponsor|subscribe|newsletter|popup|modal|related|widget|masthead",
+    re.IGNORECASE,
+)
+POSITIVE_HINTS = re.compile(r"article|content|main|post|entry|story|text|body", re.IGNORECASE)
+CANDIDATE_TAGS = {"div", "section", "article", "main", "td", "body"}
+PARAGRAPH_TAGS = ["p", "pre", "td", "li", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "dd", "table"]
+MIN_PARAGRAPH_LENGTH = 25
+# Hinted elements longer than that are likely page wrappers (eg. "has-sidebar"), not boilerplate
+MAX_HINTED_BOILERPLATE_LENGTH = 1000
+# Siblings scoring at least that share of the best candidate are part of the main content too
+SIBLING_SCORE_RATIO = 0.3
+# Extraction result covering less than this share of the page text is considered a failure
+MIN_CONTENT_RATIO = 0.15
+# If less than this share of the page text survives the boilerplate removal, the original page is returned
+MIN_EXTRACTED_TEXT_RATIO = 0.05
+
+
+class ExtractionResult(TypedDict):
+    """
+    Result of main content extraction.
+    """
+    html: str
+    tokens_before: int
+    tokens_after: int
+
+
+def extract_main_content(html: str) -> ExtractionResult:
+    """
+    Removes boilerplate (navigation, footers, cookie banners, sidebars...) from the HTML page
+    and returns HTML with the page title and its main content only.
+
+    Paragraph-like elements give score to their parents, based on their text length,
+    the parent with the highest score, reduced by its link density, is considered to be
+    the main content. If the page doesn't have an obvious main content block,
+    the whole page (without boilerplate elements) is returned. If (almost) no text is left
+    after the extraction, the original HTML is returned.
+    Args:
+        html: The HTML content as a string.
+    Returns:
+        The main content HTML along with estimated number of text tokens before and after extraction.
+    """
+    if not html.strip():
+        return ExtractionResult(html=html, tokens_before=0, tokens_after=0)
+    document = parse_document(html)
+    tokens_before = estimate_tokens(_text(document))
+
+    title = document.findtext(".//title") or ""
+    etree.strip_elements(document, etree.Comment, *BOILERPLATE_TAGS, with_tail=False)
+    _remove_control_forms(document)
+    _remove_hinted_boilerplate(document)
+
+    body = document.find("body")
+    if body is None:
+        body = document
+    content = _find_main_content(body)
+    if content is None or len(_text(content)) < MIN_CONTENT_RATIO * len(_text(body)):
+        content = body
+
+    tokens_after = estimate_tokens(_text(content))
+    if tokens_after < MIN_EXTRACTED_TEXT_RATIO * tokens_before:
+        log.warning("Main content extraction left %d of %d tokens, using the whole page", tokens_after, tokens_before)
+        return ExtractionResult(html=html, tokens_before=tokens_before, tokens_after=tokens_before)
+    if content is body:
+        # the content is wrapped in <body> of the result page below
+        content.tag = "div"
+    content_html = lxml.html.tostring(content, encoding="unicode")
+    result_html = f"<html><head><title>{_escape(title)}</title></head><body>{content_html}</body></html>"
+    return ExtractionResult(html=result_html, tokens_before=tokens_before, tokens_after=tokens_after)
+
+def _text(element) -> str:
+    """
+    Returns visible text of the element with collapsed whitespace.
+    """
+    return " ".join(element.text_content().split())
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _class_and_id(element) -> str:
+    return f"{element.get('class', '')} {element.get('id', '')}"
+
+def _remove_control_forms(document) -> None:
+    """
+    Removes forms that are mostly controls with little text (search boxes, login forms...).
+    """
+    for form in list(document.iter("form")):
+        if form.getparent() is not None and len(_text(form)) < MAX_CONTROL_FORM_TEXT_LENGTH:
+            form.drop_tree()
+
+def _remove_hinted_boilerplate(document) -> None:
+    """
+    Removes elements which class or id marks them as boilerplate
+    (unless they look like a content container or a wrapper of the whole page).
+    """
+    to_remove = []
+    for element in document.iter("div", "section", "ul", "ol", "p", "span", "table"):
+        hints = _class_and_id(element)
+        if not NEGATIVE_HINTS.search(hints) or POSITIVE_HINTS.search(hints):
+            continue
+        if len(_text(element)) < MAX_HINTED_BOILERPLATE_LENGTH or _link_density(element) > 0.5:
+            to_remove.append(element)
+    for element in to_remove:
+        if element.getparent() is not None:
+            element.drop_tree()
+
+def _link_density(element) -> float:
+    """
+    Returns the share of the element's text that is a link text.
+    """
+    text_length = len(_text(element))
+    if text_length == 0:
+        return 1.0
+    link_length = sum(len(_text(link)) for link in element.iter("a"))
+    return min(link_length / text_length, 1.0)
+
+def _find_main_content(body) -> Optional[etree.ElementBase]:
+    """
+    Returns the element with the highest text-density score or None.
+    """
+    scores: dict = {}
+    for paragraph in body.iter(*PARAGRAPH_TAGS):
+        text = _text(paragraph)
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        parent = paragraph.getparent()
+        for weight in (1.0, 0.5):
+            if parent is None:
+                break
+            if parent.tag in CANDIDATE_TAGS:
+                scores[parent] = scores.get(parent, 0.0) + score * weight
+            parent = parent.getparent()
+
+    for candidate in scores:
+        hints = _class_and_id(candidate)
+        if POSITIVE_HINTS.search(hints) or candidate.tag in ("article", "main"):
+            scores[candidate] *= 1.25
+        scores[candidate] *= 1 - _link_density(candidate)
+
+    if not scores:
+        return None
+    best = max(scores, key=scores.get)
+    if scores[best] <= 0:
+        return None
+    # content split into several sibling blocks (eg. sections of an article) - take them all
+    parent = best.getparent()
+    if parent is not None and any(
+        sibling is not best and scores.get(sibling, 0.0) >= SIBLING_SCORE_RATIO * scores[best]
+        for sibling in parent
+    ):
+        return parent
+    return best
@@ -0,0 +1,38 @@
+import logging
+import threading
+from typing import Optional
+from config.config_loader import app_config
+from utils.disk_cache import DiskCache
+
+log = logging.getLogger(__name__)
+
+DEFAULT_FETCH_CACHE_PATH = "~/.cache/ai-chatbot/fetch_cache.sqlite"
+DEFAULT_FETCH_CACHE_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_FETCH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_fetch_cache: Optional[DiskCache] = None
+_fetch_cache_lock = threading.Lock()
+
+def get_fetch_cache() -> Optional[DiskCache]:
+    """
+    Returns the process-wide cache of fetched web pages or None if caching is disabled.
+    The cache is keyed by normalized URL and stores the raw response body next to
+    the converted markdown, together with validators (ETag/Last-Modified) used to
+    revalidate stale entries.
+    """
+    global _fetch_cache
+    if not app_config.get("fetch_cache_enabled", True):
+        return None
+    if _fetch_cache is None:
+        with _fetch_cache_lock:
+            if _fetch_cache is None:
+                try:
+                    _fetch_cache = DiskCache(
+                        path=app_config.get("fetch_cache_path", DEFAULT_FETCH_CACHE_PATH),
+                        max_bytes=app_config.get("fetch_cache_max_bytes", DEFAULT_FETCH_CACHE_MAX_BYTES),
+                        ttl_seconds=app_config.get("fetch_cache_ttl_seconds", DEFAULT_FETCH_CACHE_TTL_SECONDS),
+                    )
+                except Exception as e:
+                    log.error("Unable to open fetch cache, continuing without it: %s", e)
+                    return None
+    return _fetch_cache
@@ -4,18 +4,39 @@ from langgraph.graph import START, END
 from web_page_analyzer.state import (
     AnalyserState,
 )
+from web_page_analyzer.configuration import Configuration
 from web_page_analyzer.nodes import (
     web_scraping,
+    relevance_filter,
+    analysis_cache_lookup,
+    analysis_cache_store,
+    route_to_analysis,
     web_content_analysis,
+    chunk_analysis,
+    merge_chunk_analyses,
 )
 
-builder = StateGraph(AnalyserState)
+builder = StateGraph(AnalyserState, config_schema=Configuration)
 
 builder.add_node("web_scraping", web_scraping)
+builder.add_node("relevance_filter", relevance_filter)
+builder.add_node("analysis_cache_lookup", analysis_cache_lookup)
 builder.add_node("web_content_analysis", web_content_analysis)
+builder.add_node("chunk_analysis", chunk_analysis)
+builder.add_node("merge_chunk_analyses", merge_chunk_analyses)
+builder.add_node("analysis_cache_store", analysis_cache_store)
 
 builder.add_edge(START, "web_scraping")
-builder.add_edge("web_scraping", "web_content_analysis")
-builder.add_edge("web_content_analysis", END)
+builder.add_edge("web_scraping", "relevance_filter")
+builder.add_edge("relevance_filter", "analysis_cache_lookup")
+# Cached analyses end the graph without calling the LLM,
+# long pages are analyzed in chunks (map) and the partial results are merged (reduce)
+builder.add_conditional_edges(
+    "analysis_cache_lookup", route_to_analysis, ["web_content_analysis", "chunk_analysis", END]
+)
+builder.add_edge("chunk_analysis", "merge_chunk_analyses")
+builder.add_edge("merge_chunk_analyses", "analysis_cache_store")
+builder.add_edge("web_content_analysis", "analysis_cache_store")
+builder.add_edge("analysis_cache_store", END)
 
 graph = builder.compile(name="web_page_analyzer")
\ No newline at end of file
@@ -0,0 +1,161 @@
+import re
+import lxml.html
+
+# Elements dropped together with their content
+SKIPPED_TAGS = frozenset([
+    "script", "style", "noscript", "template", "img", "svg", "canvas", "iframe",
+    "meta", "link", "object", "embed", "video", "audio", "source", "picture",
+])
+BLOCK_TAGS = frozenset([
+    "p", "div", "section", "article", "main", "header", "footer", "nav", "aside", "form",
+    "fieldset", "figure", "figcaption", "address", "details", "summary", "dl", "dt", "dd",
+    "body", "html", "center",
+])
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+WHITESPACE = re.compile(r"[ \t\r\n\f\v]+")
+EXCESS_NEWLINES = re.compile(r"\n\s*\n\s*\n+")
+TRAILING_SPACES = re.compile(r"[ \t]+\n")
+# Whitespace left at line starts by inline elements, nested list indentation is kept
+LEADING_SPACES = re.compile(r"\n[ \t]+(?!- |\d+\. )")
+# XML declaration of XHTML pages, eg. <?xml version="1.0" encoding="UTF-8"?>
+XML_DECLARATION = re.compile(r"^\ufeff?\s*<\?xml[^>]*\?>")
+
+
+def parse_document(html: str):
+    """
+    Parses HTML document with lxml.
+    The XML declaration of XHTML pages is dropped, lxml rejects text (already decoded)
+    documents declaring their encoding.
+    """
+    return lxml.html.document_fromstring(XML_DECLARATION.sub("", html, count=1))
+
+
+class LxmlMarkdownConverter:
+    """
+    HTML to markdown converter backed by the lxml parser.
+
+    Follows the output contract of the markdownify based converter used by html_to_markdown
+    (ATX headings, "-" bullets, unescaped asterisks, "Title: " prefixed page title,
+    links kept with their URLs, images, scripts and styles removed, spans padded with spaces),
+    but parses the document with libxml2 and walks the tree once, which is several times
+    faster than BeautifulSoup with the pure-Python html.parser.
+    """
+
+    def convert(self, html: str) -> str:
+        """
+        Converts HTML document to markdown.
+        """
+        if not html.strip():
+            return ""
+        document = parse_document(html)
+        parts: list[str] = []
+        self._convert_element(document, parts, list_depth=0)
+        markdown = "".join(parts)
+        markdown = TRAILING_SPACES.sub("\n", markdown)
+        markdown = LEADING_SPACES.sub("\n", markdown)
+        markdown = EXCESS_NEWLINES.sub("\n\n", markdown)
+        return markdown.strip()
+
+    def _convert_children(self, element, parts: list[str], list_depth: int) -> None:
+        if element.text:
+            parts.append(WHITESPACE.sub(" ", element.text))
+        for child in element:
+            self._convert_element(child, parts, list_depth)
+            if child.tail:
+                parts.append(WHITESPACE.sub(" ", child.tail))
+
+    def _inline_text(self, element, list_depth: int = 0) -> str:
+        parts: list[str] = []
+        self._convert_children(element, parts, list_depth)
+        return "".join(parts).strip()
+
+    def _convert_element(self, element, parts: list[str], list_depth: int) -> None:
+        tag = element.tag
+        if not isinstance(tag, str):
+            # comments and processing instructions
+            return
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS:
+            return
+
+        if tag == "head":
+            title = element.find("title")
+            if title is not None:
+                self._convert_element(title, parts, list_depth)
+        elif tag == "title":
+            parts.append("Title: " + WHITESPACE.sub(" ", element.text_content()).strip() + "\n\n")
+        elif tag in BLOCK_TAGS:
+            parts.append("\n\n")
+            self._convert_children(element, parts, list_depth)
+            parts.append("\n\n")
+        elif tag in HEADING_LEVELS:
+            text = self._inline_text(element, list_depth)
+            if text:
+                parts.append(f"\n\n{'#' * HEADING_LEVELS[tag]} {text}\n\n")
+        elif tag in ("strong", "b"):
+            text = self._inline_text(element, list_depth)
+            if text:
+                parts.append(f"**{text}**")
+        elif tag in ("em", "i"):
+            text = self._inline_text(element, list_depth)
+            if text:
+                parts.append(f"*{text}*")
+        elif tag == "code":
+            text = element.text_content()
+            if text:
+                parts.append(f"`{text}`")
+        elif tag == "pre":
+            parts.append(f"\n\n```\n{element.text_content().strip(chr(10))}\n```\n\n")
+        elif tag == "a":
+            text = self._inline_text(element, list_depth)
+            parts.append(f"[{text}]({element.get('href')})")
+        elif tag == "span":
+            parts.append(" ")
+            self._convert_children(element, parts, list_depth)
+            parts.append(" ")
+        elif tag == "br":
+            parts.append("  \n")
+        elif tag == "hr":
+            parts.append("\n\n---\n\n")
+        elif tag in ("ul", "ol"):
+            self._convert_list(element, parts, list_depth, ordered=(tag == "ol"))
+        elif tag == "blockquote":
+            text = self._inline_text(element, list_depth)
+            if text:
+                quoted = "\n".join(f"> {line}".rstrip() for line in text.split("\n"))
+                parts.append(f"\n\n{quoted}\n\n")
+        elif tag == "table":
+            self._convert_table(element, parts, list_depth)
+        else:
+            self._convert_children(element, parts, list_depth)
+
+    def _convert_list(self, element, parts: list[str], list_depth: int, ordered: bool) -> None:
+        indent = "  " * list_depth
+        parts.append("\n\n" if list_depth == 0 else "\n")
+        number = 1
+        for item in element:
+            if not isinstance(item.tag, str) or item.tag.lower() != "li":
+                continue
+            marker = f"{number}." if ordered else "-"
+            text = self._inline_text(item, list_depth + 1)
+            text = EXCESS_NEWLINES.sub("\n", text).replace("\n\n", "\n")
+            parts.append(f"{indent}{marker} {text}\n")
+            number += 1
+        parts.append("\n\n" if list_depth == 0 else "")
+
+    def _convert_table(self, element, parts: list[str], list_depth: int) -> None:
+        rows = [row for row in element.iter("tr")]
+        if not rows:
+            return
+        parts.append("\n\n")
+        for idx, row in enumerate(rows):
+            cells = [
+                WHITESPACE.sub(" ", self._inline_text(cell, list_depth)).replace("|", "\\|")
+                for cell in row
+                if isinstance(cell.tag, str) and cell.tag.lower() in ("td", "th")
+            ]
+            parts.append("| " + " | ".join(cells) + " |\n")
+            if idx == 0:
+                parts.append("| " + " | ".join("---" for _ in cells) + " |\n")
+        parts.append("\n\n")
+
@@ -1,36 +1,153 @@
-import os
 import logging
-from langchain_openai import ChatOpenAI
+from typing import Literal
+from langgraph.graph import END
+from langchain_core.runnables import RunnableConfig
+from langchain_core.language_models.chat_models import BaseChatModel
+from web_page_analyzer.configuration import Configuration
 from web_page_analyzer.state import (
-    InputState,
     ScrapingState,
+    ChunkAnalysisState,
     AnalyserState,
 )
 from web_page_analyzer.prompts import (
+    ANALYSIS_PROMPTS_VERSION,
     web_content_analyzer_instructions,
+    web_content_chunk_analyzer_instructions,
+    chunk_analyses_merge_instructions,
 )
 from web_page_analyzer.utils import (
     url_to_markdown,
     get_current_date,
+    split_into_chunks,
 )
+from web_page_analyzer.relevance import select_relevant_sections
+from web_page_analyzer.analysis_cache import get_analysis_cache, analysis_cache_key
+from utils.tokens import estimate_tokens
+from utils.usage import message_usage
+from utils.llm import get_chat_model
 
 log = logging.getLogger(__name__)
 
-def web_scraping(state: InputState) -> ScrapingState:
+NO_RELEVANT_INFORMATION = "No relevant information found"
+
+def _get_analysis_model(configurable: Configuration) -> BaseChatModel:
+    """
+    Returns a shared language model instance for web page content analysis.
+    """
+    return get_chat_model(configurable.analysis_model, temperature=1.0)
+
+def web_scraping(state: ScrapingState) -> ScrapingState:
     """
     LangGraph node that performs web scraping to extract content from a given URL.
-    Fetches the content of the specified URL and converts it to markdown format for 
-    easier processing.
+    Fetches the content of the specified URL and converts it to markdown format for
+    easier processing. Scraping is skipped if the caller already provided the page content.
     """
+    if state.get("page_content"):
+        return {}
     return {
         "page_content": url_to_markdown(state["url"]),
     }
 
-def web_content_analysis(state: ScrapingState) -> AnalyserState:
+def relevance_filter(state: ScrapingState, config: RunnableConfig) -> ScrapingState:
+    """
+    LangGraph node that keeps only page sections relevant to the search query,
+    so that the LLM doesn't pay for the parts of the page unrelated to the query.
+    Sections are ranked against cache_query (the bare search query) when the caller provides it.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    if not configurable.relevance_filter_enabled:
+        return {}
+
+    selection = select_relevant_sections(
+        state["page_content"],
+        # ranking against the bare query, the context added by callers (eg. deep research rationale)
+        # would match template words and make the selected content (and its cache key) vary
+        state.get("cache_query") or state["search_query"],
+        token_budget=configurable.relevance_token_budget,
+        top_k=configurable.relevance_top_k,
+        section_tokens=configurable.relevance_section_tokens,
+    )
+    if selection["tokens_after"] >= selection["tokens_before"]:
+        return {}
+    log.info(
+        "Relevance filter kept %d of %d sections of %s, %d -> %d tokens",
+        selection["sections_selected"],
+        selection["sections_total"],
+        state["url"],
+        selection["tokens_before"],
+        selection["tokens_after"],
+    )
+    return {
+        "page_content": selection["text"],
+    }
+
+def _analysis_cache_key(state: ScrapingState, configurable: Configuration) -> str:
+    return analysis_cache_key(
+        state["page_content"],
+        # callers adding context to the search query (eg. the rationale of deep research) give the bare query
+        state.get("cache_query") or state["search_query"],
+        model=configurable.analysis_model,
+        prompt_version=ANALYSIS_PROMPTS_VERSION,
+        chunk_size_tokens=configurable.chunk_size_tokens,
+        current_date=get_current_date(),
+    )
+
+def analysis_cache_lookup(state: ScrapingState, config: RunnableConfig) -> AnalyserState:
+    """
+    LangGraph node that looks up the analysis of the (filtered) page content for the search query
+    in the analysis cache, so that pages already analyzed for the same query are not sent to the LLM again.
+    """
+    cache = get_analysis_cache()
+    if not cache:
+        return {}
+    configurable = Configuration.from_runnable_config(config)
+    analysis_result = cache.get(_analysis_cache_key(state, configurable))
+    log.info(
+        "Analysis cache %s for %s, hit ratio: %.0f%%",
+        "hit" if analysis_result is not None else "miss",
+        state["url"],
+        100 * cache.hit_ratio(),
+    )
+    if analysis_result is None:
+        return {}
+    return {
+        "analysis_result": analysis_result,
+    }
+
+def analysis_cache_store(state: AnalyserState, config: RunnableConfig) -> AnalyserState:
+    """
+    LangGraph node that stores the analysis result in the analysis cache.
+    """
+    cache = get_analysis_cache()
+    if cache:
+        configurable = Configuration.from_runnable_config(config)
+        cache.put(
+            _analysis_cache_key(state, configurable),
+            state["analysis_result"],
+            metadata={"model": configurable.analysis_model, "prompts_version": ANALYSIS_PROMPTS_VERSION},
+        )
+    return {}
+
+def route_to_analysis(state: AnalyserState, config: RunnableConfig) -> Literal["web_content_analysis", "chunk_analysis", "__end__"]:
+    """
+    LangGraph routing function that ends the graph when the analysis was found in the cache
+    and sends pages which are still long after relevance filtering to the chunked (map-reduce) analysis.
+    """
+    if state.get("analysis_result") is not None:
+        return END
+    configurable = Configuration.from_runnable_config(config)
+    page_tokens = estimate_tokens(state["page_content"])
+    if page_tokens > configurable.chunk_size_tokens:
+        log.info("Page has ~%d tokens, analyzing it in chunks", page_tokens)
+        return "chunk_analysis"
+    return "web_content_analysis"
+
+def web_content_analysis(state: ScrapingState, config: RunnableConfig) -> AnalyserState:
     """
-    LangGraph node that analyzes the content of a scraped web page and provides an answer 
+    LangGraph node that analyzes the content of a scraped web page and provides an answer
     to the user's query.
     """
+    configurable = Configuration.from_runnable_config(config)
 
     # Format the prompt
     current_date = get_current_date()
@@ -40,14 +157,67 @@ def web_content_analysis(state: ScrapingState) -> AnalyserState:
         scraped_page=state["page_content"],
     )
 
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("OPENAI_API_KEY"),
+    llm = _get_analysis_model(configurable)
+    result = llm.invoke(formatted_prompt)
+
+    return {
+        "analysis_result": result.content,
+        **message_usage(configurable.analysis_model, result),
+    }
+
+def chunk_analysis(state: ScrapingState, config: RunnableConfig) -> ChunkAnalysisState:
+    """
+    LangGraph node that splits a long web page into token-bounded chunks
+    and analyzes them concurrently (map step of the map-reduce analysis).
+    """
+    configurable = Configuration.from_runnable_config(config)
+    chunks = split_into_chunks(state["page_content"], configurable.chunk_size_tokens)
+
+    current_date = get_current_date()
+    formatted_prompts = [
+        web_content_chunk_analyzer_instructions.format(
+            search_query=state["search_query"],
+            current_date=current_date,
+            chunks_count=len(chunks),
+            chunk_number=idx + 1,
+            scraped_page=chunk,
+        )
+        for idx, chunk in enumerate(chunks)
+    ]
+
+    llm = _get_analysis_model(configurable)
+    results = llm.batch(formatted_prompts, config={"max_concurrency": configurable.max_chunk_concurrency})
+    log.info("Analyzed %d chunks of %s", len(chunks), state["url"])
+
+    usages = [message_usage(configurable.analysis_model, result) for result in results]
+    return {
+        "chunk_analysis_results": [result.content for result in results],
+        "tokens_used": sum(usage["tokens_used"] for usage in usages),
+        "cost_usd": sum(usage["cost_usd"] for usage in usages),
+    }
+
+def merge_chunk_analyses(state: ChunkAnalysisState, config: RunnableConfig) -> AnalyserState:
+    """
+    LangGraph node that merges analyses of page chunks into the final answer
+    (reduce step of the map-reduce analysis).
+    """
+    relevant_results = [
+        result for result in state["chunk_analysis_results"]
+        if NO_RELEVANT_INFORMATION.lower() not in result.lower()
+    ]
+    if not relevant_results:
+        return {"analysis_result": NO_RELEVANT_INFORMATION}
+
+    configurable = Configuration.from_runnable_config(config)
+    formatted_prompt = chunk_analyses_merge_instructions.format(
+        search_query=state["search_query"],
+        current_date=get_current_date(),
+        partial_analyses="\n\n---\n\n".join(relevant_results),
     )
+    llm = _get_analysis_model(configurable)
     result = llm.invoke(formatted_prompt)
 
     return {
-        "analysis_result": result.content
+        "analysis_result": result.content,
+        **message_usage(configurable.analysis_model, result),
     }
@@ -1,3 +1,6 @@
+# Bump whenever the analysis prompts change, so that cached analysis results are not reused
+ANALYSIS_PROMPTS_VERSION = "1"
+
 web_content_analyzer_instructions = """You are an expert data analyst, analyzing web pages content to extract key information on the following subject:
 {search_query}.
 
@@ -16,3 +19,39 @@ Content to analyze (till the end of the text):
 {scraped_page}
 """
 
+
+web_content_chunk_analyzer_instructions = """You are an expert data analyst, analyzing a part of a web page content to extract key information on the following subject:
+{search_query}.
+
+Instructions:
+- The web page was too long to be analyzed at once, so it was split into {chunks_count} parts. You are analyzing part {chunk_number}.
+- Carefully analyze this part of the web page finding information relevant to the user's query.
+- Use the information like tables, lists, and highlighted text to inform your analysis.
+- Data can be highly condensed, unformatted, so pay close attention to details, eg. collapsed lists or tables.
+- The text can start or end in the middle of a sentence, table or list.
+- Current date is {current_date}.
+
+Output Format:
+- List all facts from this part that are relevant to the search query, be concise.
+- If there is no information relevant to the search query, say "No relevant information found".
+
+Content to analyze (till the end of the text):
+{scraped_page}
+"""
+
+chunk_analyses_merge_instructions = """You are an expert data analyst. A long web page was split into parts and each part was analyzed separately to extract key information on the following subject:
+{search_query}.
+
+Instructions:
+- Combine the partial analyses below into a single answer to the user's query.
+- Remove duplicated information, resolve contradictions by preferring more specific and more recent data.
+- Current date is {current_date}.
+
+Output Format:
+- Provide a concise answer to the search query.
+- If there is no information relevant to the search query, say "No relevant information found".
+- Add confidence level of your analysis on a scale from 1 to 10 (1 = very unsure, 10 = very sure).
+
+Partial analyses:
+{partial_analyses}
+"""
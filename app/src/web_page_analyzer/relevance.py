@@ -0,0 +1,157 @@
+import re
+import math
+import logging
+from array import array
+from collections import Counter
+from typing import TypedDict
+from web_page_analyzer.utils import split_into_chunks
+from utils.tokens import estimate_tokens
+from utils.text_similarity import STOPWORDS
+
+log = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Marks the place of sections removed from the page
+OMITTED_SECTIONS_MARKER = "\n\n[...]\n\n"
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase terms, skipping stopwords and single characters.
+    """
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+class TermIndex:
+    """
+    Compact inverted index of text sections, used for BM25 ranking.
+
+    Postings of all terms are kept in flat arrays (CSR layout): postings of the term
+    with id `t` are stored at positions offsets[t]..offsets[t + 1] of doc_ids and freqs.
+    """
+
+    def __init__(self, sections: list[str]):
+        self.vocabulary: dict[str, int] = {}
+        self.doc_lengths = array("I")
+        postings: list[list[tuple[int, int]]] = []
+        for doc_id, section in enumerate(sections):
+            terms = tokenize(section)
+            self.doc_lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_id, freq))
+
+        self.offsets = array("I", [0])
+        self.doc_ids = array("I")
+        self.freqs = array("I")
+        for term_postings in postings:
+            for doc_id, freq in term_postings:
+                self.doc_ids.append(doc_id)
+                self.freqs.append(freq)
+            self.offsets.append(len(self.doc_ids))
+
+        self.docs_count = len(sections)
+        self.avg_doc_length = (sum(self.doc_lengths) / self.docs_count) if self.docs_count else 0.0
+
+    def bm25_scores(self, query: str, k1: float = 1.2, b: float = 0.75) -> array:
+        """
+        Returns BM25 score of every indexed section for the given query.
+        """
+        scores = array("d", [0.0] * self.docs_count)
+        if not self.avg_doc_length:
+            return scores
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs_with_term = end - start
+            idf = math.log(1 + (self.docs_count - docs_with_term + 0.5) / (docs_with_term + 0.5))
+            for pos in range(start, end):
+                doc_id = self.doc_ids[pos]
+                freq = self.freqs[pos]
+                length_norm = 1 - b + b * self.doc_lengths[doc_id] / self.avg_doc_length
+                scores[doc_id] += idf * freq * (k1 + 1) / (freq + k1 * length_norm)
+        return scores
+
+
+class RelevanceSelection(TypedDict):
+    """
+    Result of selecting page sections relevant to the query.
+    """
+    text: str
+    tokens_before: int
+    tokens_after: int
+    sections_total: int
+    sections_selected: int
+
+
+def select_relevant_sections(text: str, query: str, token_budget: int, top_k: int,
+                             section_tokens: int) -> RelevanceSelection:
+    """
+    Ranks sections of the page against the query with BM25 and keeps only the best ones.
+
+    The first section (page title and introduction) is always kept, then sections are taken
+    by descending score until top_k sections are selected or the token budget is used.
+    Sections are returned in their original order. If no section matches the query at all
+    (eg. the page and the query are in different languages), the page is returned unchanged.
+    Args:
+        text: The page content (markdown).
+        query: The search query.
+        token_budget: The maximum number of (estimated) tokens of the selected text.
+        top_k: The maximum number of selected sections.
+        section_tokens: The size of a section in tokens.
+    Returns:
+        The selected text along with selection statistics.
+    """
+    tokens_before = estimate_tokens(text)
+    sections = split_into_chunks(text, section_tokens)
+    unchanged = RelevanceSelection(
+        text=text,
+        tokens_before=tokens_before,
+        tokens_after=tokens_before,
+        sections_total=len(sections),
+        sections_selected=len(sections),
+    )
+    if tokens_before <= token_budget or len(sections) <= 1:
+        return unchanged
+
+    scores = TermIndex(sections).bm25_scores(query)
+    if not any(scores):
+        log.info("No page section matches the query, keeping the whole page")
+        return unchanged
+
+    section_sizes = [estimate_tokens(section) for section in sections]
+    selected = {0}
+    used_tokens = section_sizes[0]
+    for idx in sorted(range(len(sections)), key=lambda i: scores[i], reverse=True):
+        if len(selected) >= top_k or scores[idx] <= 0:
+            break
+        if idx in selected or used_tokens + section_sizes[idx] > token_budget:
+            continue
+        selected.add(idx)
+        used_tokens += section_sizes[idx]
+
+    parts = []
+    for idx in sorted(selected):
+        if parts and idx - 1 not in selected:
+            parts.append(OMITTED_SECTIONS_MARKER)
+        elif parts:
+            parts.append("\n\n")
+        parts.append(sections[idx])
+    if max(selected) < len(sections) - 1:
+        parts.append(OMITTED_SECTIONS_MARKER)
+    selected_text = "".join(parts)
+
+    return RelevanceSelection(
+        text=selected_text,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(selected_text),
+        sections_total=len(sections),
+        sections_selected=len(selected),
+    )
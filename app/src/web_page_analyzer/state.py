@@ -1,3 +1,4 @@
+import operator
 from typing import TypedDict
 from typing_extensions import Annotated
 
@@ -8,6 +9,7 @@ class InputState(TypedDict):
     """
     search_query: Annotated[str, ..., "Query to answer by analyzing web page content."]
     url: Annotated[str, ..., "Url of the web page to analyze."]
+    cache_query: Annotated[str, ..., "Query identifying the analysis in the analysis cache, defaults to search_query."]
 
 class ScrapingState(InputState):
     """
@@ -20,3 +22,11 @@ class AnalyserState(ScrapingState):
     State for scraped web page content analysis.
     """
     analysis_result: Annotated[str, ..., "Result of web content analysis with answer to the query."]
+    tokens_used: Annotated[int, operator.add]
+    cost_usd: Annotated[float, operator.add]
+
+class ChunkAnalysisState(ScrapingState):
+    """
+    State for map-reduce analysis of long web pages, analyzed in chunks.
+    """
+    chunk_analysis_results: Annotated[list[str], ..., "Results of analysis of the consecutive page chunks."]
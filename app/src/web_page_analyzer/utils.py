@@ -1,55 +1,149 @@
 import requests
 import logging
+from typing import Mapping
 from datetime import datetime
 from markdownify import MarkdownConverter
 from bs4 import BeautifulSoup
+from utils.url import normalize_url
+from utils.http import get_fetch_backend
+from utils.disk_cache import DiskCache, CacheEntry
+from utils.tokens import CHARS_PER_TOKEN
+from config.config_loader import app_config
+from web_page_analyzer.fetch_cache import get_fetch_cache
+from web_page_analyzer.conversion_service import get_conversion_service
+from web_page_analyzer.extraction import extract_main_content
+from web_page_analyzer.lxml_converter import LxmlMarkdownConverter
 
 log = logging.getLogger(__name__)
 
+# Bump whenever html_to_markdown output changes, so that cached pages get converted again
+MARKDOWN_PIPELINE_VERSION = "2"
+
 def get_current_date():
     """
     Returns the current date in "Month Day, Year" format.
     """
     return datetime.now().strftime("%B %d, %Y")
 
-def html_to_markdown(html: str) -> str:
+class CustomConverter(MarkdownConverter):
+    def convert_style(self, el, text, parent_tags):
+        return '' # remove style tags entirely
+    def convert_script(self, el, text, parent_tags):
+        return '' # remove script tags entirely
+    def convert_a(self, el, text, parent_tags):
+        return f"[{text}]({el.get('href')})"  # just return the link text, not the URL
+    def convert_img(self, el, text, parent_tags):
+        return ''  # remove images entirely
+    def convert_title(self, el, text, parent_tags):
+        return "Title: " + text  # convert title
+    def convert_span(self, el, text, parent_tags):
+        return f" {text} " # return with spaces to avoid word concatenation
+
+# Converters are stateless, so they are created once and shared by all calls
+MARKDOWN_CONVERTERS = {
+    "markdownify": CustomConverter(
+        heading_style="ATX",
+        bullets="-",
+        escape_asterisks=False,
+        autolinks=False,
+    ),
+    "lxml": LxmlMarkdownConverter(),
+}
+
+class MarkdownConversionError(Exception):
+    """
+    Raised when HTML content can't be converted to markdown.
+    """
+
+
+def html_to_markdown(html: str, main_content_only: bool = False, engine: str | None = None) -> str:
     """
     Converts HTML content to markdown format.
     Args:
         html: The HTML content as a string.
+        main_content_only: Whether to drop boilerplate (navigation, footers, cookie banners,
+            sidebars...) and convert only the main content of the page.
+        engine: The conversion engine, "markdownify" or "lxml" (faster).
+            Defaults to the "html_to_markdown_engine" setting.
     Returns:
         The markdown content as a string.
     """
+    try:
+        return convert_html_to_markdown(html, main_content_only=main_content_only, engine=engine)
+    except MarkdownConversionError as e:
+        return f"Unexpected error converting HTML to Markdown: {e}"
 
-    class CustomConverter(MarkdownConverter):
-        def convert_style(self, el, text, parent_tags):
-            return '' # remove style tags entirely
-        def convert_script(self, el, text, parent_tags):
-            return '' # remove script tags entirely
-        def convert_a(self, el, text, parent_tags):
-            return f"[{text}]({el.get('href')})"  # just return the link text, not the URL
-        def convert_img(self, el, text, parent_tags):
-            return ''  # remove images entirely
-        def convert_title(self, el, text, parent_tags):
-            return "Title: " + text  # convert title
-        def convert_span(self, el, text, parent_tags):
-            return f" {text} " # return with spaces to avoid word concatenation
-        
-    options = dict(
-        heading_style="ATX",
-        bullets="-",
-        escape_asterisks=False,
-        autolinks=False,
-    )
-
+def convert_html_to_markdown(html: str, main_content_only: bool = False, engine: str | None = None) -> str:
+    """
+    Converts HTML content to markdown format, see html_to_markdown.
+    Raises:
+        MarkdownConversionError: if the conversion fails.
+    """
     try:
+        converter = MARKDOWN_CONVERTERS[engine or _markdown_engine()]
         log.info("Size of HTML content: %d characters", len(html))
-        markdown = CustomConverter(**options).convert(html)
+        if main_content_only:
+            html = _extract_main_content(html)
+        markdown = converter.convert(html)
         log.info("Converted HTML to Markdown, size: %d characters", len(markdown))
         return markdown
     except Exception as e:
         log.error(f"Unexpected error converting HTML to Markdown: {e}")
-        return f"Unexpected error converting HTML to Markdown: {e}"
+        raise MarkdownConversionError(str(e)) from e
+
+def _markdown_engine() -> str:
+    """
+    Returns the configured HTML to markdown conversion engine.
+    """
+    return app_config.get("html_to_markdown_engine", "markdownify")
+
+def split_into_chunks(text: str, max_tokens: int) -> list[str]:
+    """
+    Splits text into chunks of at most max_tokens (estimated) tokens.
+    Chunks are cut at paragraph boundaries whenever possible, only paragraphs
+    longer than the chunk size are split in the middle.
+    Args:
+        text: The text to split (eg. page content in markdown).
+        max_tokens: The maximum size of a chunk in tokens.
+    Returns:
+        The list of chunks.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current: list[str] = []
+    current_size = 0
+    for paragraph in text.split("\n\n"):
+        if not paragraph.strip():
+            continue
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)]
+        for piece in pieces:
+            if current and current_size + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current, current_size = [], 0
+            current.append(piece)
+            current_size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def _extract_main_content(html: str) -> str:
+    """
+    Main content extraction stage of html_to_markdown, logs the token reduction of the page.
+    Falls back to the original HTML if the extraction fails.
+    """
+    try:
+        result = extract_main_content(html)
+    except Exception as e:
+        log.warning("Main content extraction failed, converting the whole page: %s", e)
+        return html
+    if result["tokens_before"]:
+        log.info(
+            "Main content extraction reduced page text from %d to %d tokens (%.0f%% reduction)",
+            result["tokens_before"],
+            result["tokens_after"],
+            100 * (1 - result["tokens_after"] / result["tokens_before"]),
+        )
+    return result["html"]
 
 def html_to_text(html: str) -> str:
     """
@@ -74,31 +168,118 @@ def url_to_markdown(url: str) -> str:
     
     """
     Fetches the content of a URL and converts it to markdown format.
-    Uses the requests library to fetch the HTML content and markdownify to convert it to markdown.
+    Uses the shared, connection pooling HTTP session to download the HTML content (streamed,
+    size-capped, non-HTML content rejected upfront) and converts it to markdown, in the conversion
+    process pool when it is enabled.
+    Pages are served from the fetch cache while fresh. Stale entries are revalidated
+    with ETag/Last-Modified, so unchanged pages are neither downloaded nor converted again.
+    Pages that fail to convert are not cached.
     Args:
         url: The URL to fetch and convert.
     Returns:
         The markdown content as a string.
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/126.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        response = requests.get(url, timeout=10, headers=headers)
-        response.raise_for_status()  # throws exception on errors (eg. 404/500)
-        log.info("Fetched URL: %s with status code %s", url, response.status_code)
-        html = response.text
-        markdown = html_to_markdown(html)
+        cache = get_fetch_cache()
+        cache_key = normalize_url(url)
+        cached = cache.get(cache_key) if cache else None
+        if cached and cache.is_fresh(cached):
+            log.info("Fetch cache hit for URL: %s", url)
+            return _cached_markdown(cache, cached)
+
+        headers = _revalidation_headers(cached["metadata"]) if cached else {}
+        page = get_fetch_backend()(url, headers)
+        if cached and page["status_code"] == 304:
+            log.info("Fetch cache entry revalidated for URL: %s", url)
+            cache.touch(cache_key, _updated_metadata(cached["metadata"], page["headers"]))
+            return _cached_markdown(cache, cached)
+        log.info("Fetched URL: %s with status code %s", url, page["status_code"])
+        markdown = _page_to_markdown(page["html"])
+        if cache:
+            cache.put(
+                cache_key,
+                raw=page["raw"],
+                text=markdown,
+                metadata={
+                    "etag": page["headers"].get("ETag"),
+                    "last_modified": page["headers"].get("Last-Modified"),
+                    "content_type": page["headers"].get("Content-Type"),
+                    "encoding": page["encoding"],
+                    "truncated": page["truncated"],
+                    "markdown_pipeline": _markdown_pipeline(),
+                },
+            )
         return markdown
     except requests.RequestException as e:
         log.error("Error fetching URL %s: %s", url, e)
         return f"Error fetching URL {url}: {e}"
+    except MarkdownConversionError as e:
+        return f"Unexpected error converting HTML to Markdown: {e}"
     except Exception as e:
         log.error("Unexpected error processing URL %s: %s", url, e)
         return f"Unexpected error processing URL {url}: {e}"
+
+def _page_to_markdown(html: str) -> str:
+    """
+    Converts a fetched web page to markdown using the configured pipeline stages.
+    The conversion runs in the conversion process pool when it is enabled.
+    Raises:
+        MarkdownConversionError: if the conversion fails.
+    """
+    main_content_only = app_config.get("main_content_extraction", True)
+    conversion_service = get_conversion_service()
+    if conversion_service:
+        return conversion_service.html_to_markdown(html, main_content_only, _markdown_engine())
+    return convert_html_to_markdown(html, main_content_only=main_content_only)
+
+def _markdown_pipeline() -> str:
+    """
+    Returns identifier of the configured HTML to markdown pipeline, stored with cached pages.
+    """
+    stages = [MARKDOWN_PIPELINE_VERSION, _markdown_engine()]
+    if app_config.get("main_content_extraction", True):
+        stages.append("main-content")
+    return "+".join(stages)
+
+def _revalidation_headers(metadata: dict) -> dict:
+    """
+    Returns conditional request headers for revalidating a cached page.
+    """
+    headers = {}
+    if metadata.get("etag"):
+        headers["If-None-Match"] = metadata["etag"]
+    if metadata.get("last_modified"):
+        headers["If-Modified-Since"] = metadata["last_modified"]
+    return headers
+
+def _updated_metadata(metadata: dict, headers: Mapping[str, str]) -> dict:
+    """
+    Returns cached page metadata updated with validators sent along a 304 response.
+    """
+    return {
+        **metadata,
+        "etag": headers.get("ETag", metadata.get("etag")),
+        "last_modified": headers.get("Last-Modified", metadata.get("last_modified")),
+    }
+
+def _cached_markdown(cache: DiskCache, entry: CacheEntry) -> str:
+    """
+    Returns markdown of a cached page.
+    If the markdown was produced by a different conversion pipeline, the page is converted
+    again from the cached raw bytes and the cache entry gets updated. If that conversion fails,
+    the markdown of the previous pipeline is returned and the entry is kept as is.
+    """
+    metadata = entry["metadata"]
+    if metadata.get("markdown_pipeline") == _markdown_pipeline() or not entry["raw"]:
+        return entry["text"]
+    html = entry["raw"].decode(metadata.get("encoding") or "utf-8", errors="replace")
+    try:
+        markdown = _page_to_markdown(html)
+    except MarkdownConversionError:
+        return entry["text"]
+    metadata = {**metadata, "markdown_pipeline": _markdown_pipeline()}
+    cache.put(entry["key"], raw=entry["raw"], text=markdown, metadata=metadata)
+    return markdown
     
 if __name__ == "__main__":
     test_url = "https://www.espn.com/f1/schedule"
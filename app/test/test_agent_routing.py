@@ -0,0 +1,46 @@
+from unittest.mock import patch
+from agent.routing import select_next_route_after_processing
+
+FINAL_ANSWER_STATE = {
+    "processing_iteration": 1,
+    "processing_answer": "Paris is the capital of France.",
+    "is_final_answer": True,
+    "requires_web_search": False,
+    "requires_long_term_memory_access": False,
+}
+
+def test_fast_path_delivers_final_processing_answer():
+    """Test that a final answer is delivered directly with the fast path enabled per request."""
+    config = {"configurable": {"fast_path": True}}
+    assert select_next_route_after_processing(FINAL_ANSWER_STATE, config) == "deliver_processing_answer"
+
+@patch.dict("config.config_loader.app_config.config", {"agent_fast_path": True})
+def test_fast_path_enabled_by_app_setting():
+    """Test that the agent_fast_path setting enables the fast path, unless disabled per request."""
+    assert select_next_route_after_processing(FINAL_ANSWER_STATE, {}) == "deliver_processing_answer"
+    config = {"configurable": {"fast_path": False}}
+    assert select_next_route_after_processing(FINAL_ANSWER_STATE, config) == "finalize_answer"
+
+@patch.dict("config.config_loader.app_config.config", {"agent_fast_path": False})
+def test_fast_path_disabled_goes_to_finalize_answer():
+    """Test that without the fast path a final answer still goes through finalize_answer."""
+    assert select_next_route_after_processing(FINAL_ANSWER_STATE, {}) == "finalize_answer"
+    assert select_next_route_after_processing(FINAL_ANSWER_STATE, {"configurable": {}}) == "finalize_answer"
+
+def test_fast_path_collects_knowledge_first():
+    """Test that knowledge collection takes precedence over the fast path."""
+    config = {"configurable": {"fast_path": True}}
+    web_search_state = {**FINAL_ANSWER_STATE, "requires_web_search": True}
+    memory_state = {**FINAL_ANSWER_STATE, "requires_long_term_memory_access": True, "user": "Bob"}
+
+    assert select_next_route_after_processing(web_search_state, config) == "collect_knowledge"
+    assert select_next_route_after_processing(memory_state, config) == "collect_knowledge"
+
+def test_fast_path_skips_empty_or_non_final_answer():
+    """Test that empty or non-final answers are not delivered directly."""
+    config = {"configurable": {"fast_path": True}}
+    empty_answer_state = {**FINAL_ANSWER_STATE, "processing_answer": ""}
+    non_final_state = {**FINAL_ANSWER_STATE, "is_final_answer": False}
+
+    assert select_next_route_after_processing(empty_answer_state, config) == "finalize_answer"
+    assert select_next_route_after_processing(non_final_state, config) == "finalize_answer"
@@ -0,0 +1,67 @@
+import json
+from typing import Annotated, TypedDict
+from langgraph.graph import StateGraph, START, END, add_messages
+from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.messages import AIMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from runner.batch import BatchRunner, percentile
+
+class MessagesState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+def _answer(state: MessagesState) -> MessagesState:
+    query = state["messages"][-1].content
+    if query == "fail":
+        raise RuntimeError("LLM unavailable")
+    message = AIMessage(
+        f"{query}: {len(state['messages'])} messages",
+        usage_metadata={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110},
+        response_metadata={"model_name": "gpt-4o"},
+    )
+    # token usage is collected from the LLM calls
+    model = GenericFakeChatModel(messages=iter([message]))
+    return {"messages": [model.invoke(state["messages"])]}
+
+def _graph():
+    graph = StateGraph(MessagesState)
+    graph.add_node("finalize_answer", _answer)
+    graph.add_edge(START, "finalize_answer")
+    graph.add_edge("finalize_answer", END)
+    return graph.compile(checkpointer=InMemorySaver())
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 90) == 5.0
+    assert percentile(values, 0) == 1.0
+    assert percentile([7.0], 99) == 7.0
+
+def test_batch_runs_conversations(tmp_path):
+    """Test that conversations run on their own threads and a failed one doesn't stop the batch."""
+    input_path, output_path = tmp_path / "conversations.jsonl", tmp_path / "results.jsonl"
+    input_path.write_text("\n".join([
+        json.dumps({"id": "multi", "turns": ["hi", "again"]}),
+        json.dumps({"query": "single"}),
+        "",
+        json.dumps({"id": "broken", "turns": ["fail", "never asked"]}),
+    ]), encoding="utf-8")
+
+    summary = BatchRunner(_graph(), workers=2).run(str(input_path), str(output_path))
+
+    results = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    by_turn = {(record["id"], record["turn"]): record for record in results}
+    assert set(by_turn) == {("multi", 0), ("multi", 1), ("2", 0), ("broken", 0)}
+    # the second turn sees the history of the conversation thread
+    assert by_turn[("multi", 0)]["answer"] == "hi: 1 messages"
+    assert by_turn[("multi", 1)]["answer"] == "again: 3 messages"
+    assert by_turn[("2", 0)]["answer"] == "single: 1 messages"
+    assert by_turn[("multi", 0)]["thread_id"] == by_turn[("multi", 1)]["thread_id"]
+    assert len({record["thread_id"] for record in results}) == 3
+    assert by_turn[("broken", 0)]["error"] == "LLM unavailable"
+    assert by_turn[("multi", 1)]["input_tokens"] == 100
+    assert by_turn[("multi", 1)]["output_tokens"] == 10
+    assert summary["turns"] == 4
+    assert summary["errors"] == 1
+    assert summary["input_tokens"] == 300
+    assert summary["cost_usd"] > 0
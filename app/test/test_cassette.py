@@ -0,0 +1,72 @@
+import json
+import httpx
+import pytest
+import requests
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.cassette import Cassette, CassetteMissError, redact_url
+
+class EchoHandler(BaseHTTPRequestHandler):
+    requests_count = 0
+
+    def do_POST(self):
+        EchoHandler.requests_count += 1
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        payload = json.dumps({"echo": json.loads(body), "count": EchoHandler.requests_count}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Should-Retry", "false")
+        self.send_header("Retry-After-Ms", "250")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        EchoHandler.requests_count += 1
+        payload = b"<html><body>\xc5\xbc\xc3\xb3\xc5\x82w</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Set-Cookie", "session=secret")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_record_and_replay(server_url, tmp_path):
+    """Test that recorded httpx and requests exchanges are replayed without reaching the server."""
+    path = str(tmp_path / "run.json.gz")
+    with Cassette(path, mode="record") as cassette:
+        first = httpx.post(f"{server_url}/llm", json={"prompt": "first"}).json()
+        second = httpx.post(f"{server_url}/llm", json={"prompt": "second"}).json()
+        page = requests.get(f"{server_url}/page?key=secret-api-key", stream=True)
+        page_text = b"".join(page.iter_content(4)).decode("utf-8")
+    assert len(cassette.interactions) == 3
+    assert "secret-api-key" not in redact_url(f"{server_url}/page?key=secret-api-key")
+
+    requests_count = EchoHandler.requests_count
+    with Cassette(path, mode="replay", latency="zero") as replay:
+        # matched by body, regardless of the order
+        replayed = httpx.post(f"{server_url}/llm", json={"prompt": "second"})
+        assert replayed.json() == second
+        # headers driving the OpenAI client retries are replayed
+        assert replayed.headers["x-should-retry"] == "false"
+        assert replayed.headers["retry-after-ms"] == "250"
+        # the changed body falls back to the next unplayed exchange with the same URL
+        assert httpx.post(f"{server_url}/llm", json={"prompt": "changed"}).json() == first
+        replayed_page = requests.get(f"{server_url}/page?key=other-key", stream=True)
+        assert b"".join(replayed_page.iter_content(4)).decode("utf-8") == page_text
+        assert "set-cookie" not in replayed_page.headers
+        with pytest.raises(CassetteMissError):
+            httpx.post(f"{server_url}/llm", json={"prompt": "third"})
+    assert EchoHandler.requests_count == requests_count
+    assert replay.network_seconds > 0
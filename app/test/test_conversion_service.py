@@ -0,0 +1,41 @@
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from web_page_analyzer.conversion_service import ConversionService
+
+HTML = """
+<html>
+    <head><title>Pool title</title></head>
+    <body><h1>Header</h1><p>Converted in a <strong>worker</strong> process.</p></body>
+</html>
+"""
+
+def test_conversion_service_converts_in_worker_processes():
+    """Test that conversions submitted from many threads succeed with recycled workers and a bounded queue."""
+    service = ConversionService(workers=2, max_queue=2, max_tasks_per_child=1)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            markdowns = list(executor.map(
+                lambda html: service.html_to_markdown(html, engine="lxml"), [HTML] * 6
+            ))
+        text = service.html_to_text(HTML)
+    finally:
+        service.shutdown()
+
+    for markdown in markdowns:
+        assert "Title: Pool title" in markdown
+        assert "# Header" in markdown
+        assert "Converted in a **worker** process." in markdown
+    assert "Converted in a worker process." in text
+
+def test_conversion_service_shutdown_after_recycled_workers():
+    """Test that the pool shuts down cleanly after its workers were recycled."""
+    thread_errors = []
+    service = ConversionService(workers=2, max_queue=4, max_tasks_per_child=1)
+    with patch("threading.excepthook", thread_errors.append):
+        for _ in range(4):
+            service.html_to_text(HTML)
+        processes = list(service._executor._processes.values())
+        service.shutdown()
+
+    assert thread_errors == []
+    assert all(not process.is_alive() for process in processes)
@@ -0,0 +1,62 @@
+from unittest.mock import patch
+from utils.url import canonicalize_url
+from utils.fingerprint import simhash, hamming_distance
+from deep_research.dedup import DuplicateRegistry
+from deep_research.nodes import web_content_analysis
+
+ARTICLE = " ".join(
+    f"Sentence {i} of the article describes the race weekend in detail with results and standings."
+    for i in range(40)
+)
+
+def test_canonicalize_url():
+    """Test that AMP, tracking and www variants of the URL map to the same canonical URL."""
+    canonical = "https://example.com/news/story?id=3"
+    assert canonicalize_url("http://www.Example.com/news/story/amp/?utm_source=x&id=3#top") == canonical
+    assert canonicalize_url("https://amp.example.com/news/story?id=3&fbclid=abc") == canonical
+    assert canonicalize_url("https://example.com/news/story/?amp=1&id=3") == canonical
+    assert canonicalize_url("https://example.com/news/other?id=3") != canonical
+
+def test_simhash_near_duplicates():
+    """Test that fingerprints of near-duplicate texts are close and of different texts are far."""
+    syndicated = "Home | News | Sport\n\n" + ARTICLE + "\n\nShare this article. Advertisement."
+    other = " ".join(f"Recipe step {i}: knead the dough, fold it and let it rest for an hour." for i in range(40))
+
+    assert hamming_distance(simhash(ARTICLE), simhash(syndicated)) <= 3
+    assert hamming_distance(simhash(ARTICLE), simhash(other)) > 3
+    assert simhash("Error fetching URL") is None
+
+def test_duplicate_registry():
+    """Test that duplicate URLs and near-duplicate contents are detected."""
+    registry = DuplicateRegistry()
+
+    assert registry.claim_url("https://example.com/story")
+    assert not registry.claim_url("https://www.example.com/story/?utm_medium=social")
+    assert registry.claim_content("https://example.com/story", simhash(ARTICLE), max_distance=3) is None
+    assert registry.claim_content(
+        "https://mirror.example.org/story", simhash(ARTICLE + " Copyright."), max_distance=3
+    ) == "https://example.com/story"
+
+@patch("deep_research.nodes.web_page_analyzer.graph")
+@patch("deep_research.nodes.url_to_markdown")
+def test_web_content_analysis_skips_duplicates(mock_url_to_markdown, mock_analyzer):
+    """Test that duplicate pages are counted and not analyzed."""
+    mock_url_to_markdown.side_effect = lambda url: ARTICLE if "mirror" in url or "story" in url else "Other page"
+    mock_analyzer.stream.side_effect = lambda analyzer_input, stream_mode: iter([{"analysis_result": "Answer"}])
+    state = {"user_query": "query", "search_query": "query", "rationale": "", "research_run_id": "run-1"}
+
+    results = [
+        web_content_analysis({**state, "url": url}, {})
+        for url in [
+            "https://example.com/story",
+            "https://example.com/story?utm_source=feed",
+            "https://mirror.example.org/story-copy",
+        ]
+    ]
+
+    assert results[0]["web_content_analysis_results"] == ["Answer"]
+    assert results[1]["skipped_duplicates"] == 1
+    assert results[2]["skipped_duplicates"] == 1
+    assert all(result["seen_urls"] for result in results)
+    assert mock_analyzer.stream.call_count == 1
+    assert mock_analyzer.stream.call_args.args[0]["page_content"] == ARTICLE
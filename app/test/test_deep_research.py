@@ -0,0 +1,249 @@
+import time
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage
+from utils.url import url_digest
+from deep_research.nodes import (
+    web_research,
+    select_urls_to_analyze,
+    continue_to_web_content_analysis,
+    web_content_analysis,
+    evaluate_research,
+    reflection,
+)
+from deep_research.late_analyses import get_late_analysis_registry
+from deep_research.schema import Reflection
+from deep_research.utils import filter_follow_up_queries
+from deep_research.ranking import rank_search_results
+from deep_research.budget import PAGE_TOKENS_ESTIMATE, plan_initial_research, plan_next_loop
+from deep_research.configuration import Configuration
+
+def _result(url: str) -> dict:
+    return {"search_query": "query", "rationale": "", "url": url}
+
+@patch("deep_research.nodes.web_search")
+def test_web_research_skips_seen_urls(mock_search):
+    """Test that URLs analyzed in the previous research loops are reported as reused and not returned."""
+    mock_search.return_value = [
+        {"link": "https://example.com/a"},
+        {"link": "https://www.example.com/b/?utm_source=x"},
+        {"link": "https://example.com/c"},
+    ]
+    seen_urls = {url_digest("https://example.com/a"), url_digest("https://example.com/b")}
+
+    result = web_research({"search_query": "query", "rationale": "", "seen_urls": seen_urls}, {})
+
+    assert [research["url"] for research in result["web_research_results"]] == ["https://example.com/c"]
+    assert result["reused_url_count"] == 2
+
+def test_select_urls_to_analyze():
+    """Test that only URLs not analyzed yet are selected, each once."""
+    state = {
+        "user_query": "query",
+        "research_run_id": "run-1",
+        "seen_urls": {url_digest("https://example.com/a")},
+        "web_research_results": [
+            _result("https://example.com/a"),
+            _result("https://example.com/b"),
+            _result("https://example.com/b?utm_medium=social"),
+            _result("https://example.com/c"),
+        ],
+    }
+
+    selected = select_urls_to_analyze(state, {})
+    sends = continue_to_web_content_analysis({**state, **selected})
+
+    assert [send.arg["url"] for send in sends] == ["https://example.com/b", "https://example.com/c"]
+
+def test_no_new_urls_go_to_update_findings():
+    """Test that the research continues with the findings update when all URLs were already analyzed."""
+    assert continue_to_web_content_analysis({"urls_to_analyze": []}) == "update_findings"
+
+@patch("deep_research.nodes.web_page_analyzer.graph")
+@patch("deep_research.nodes.url_to_markdown")
+def test_analysis_deadline(mock_url_to_markdown, mock_analyzer):
+    """Test that analyses not finished by the research loop deadline are recorded as late."""
+    mock_url_to_markdown.side_effect = lambda url: f"Page {url}"
+    mock_analyzer.stream.side_effect = lambda analyzer_input, stream_mode: iter([
+        time.sleep(0.5 if "slow" in analyzer_input["url"] else 0) or {"analysis_result": "Answer"}
+    ])
+    state = {
+        "user_query": "query", "search_query": "query", "rationale": "",
+        "research_run_id": "run-deadline", "analysis_deadline": time.time() + 0.2,
+    }
+
+    fast = web_content_analysis({**state, "url": "https://fast.example.com"}, {})
+    started = time.time()
+    slow = web_content_analysis({**state, "url": "https://slow.example.com"}, {})
+
+    assert fast["web_content_analysis_results"] == ["Answer"]
+    assert "web_content_analysis_results" not in slow
+    assert slow["late_analyses"][0]["url"] == "https://slow.example.com"
+    assert time.time() - started < 0.4
+
+@patch("deep_research.nodes.web_page_analyzer.graph")
+@patch("deep_research.nodes.url_to_markdown")
+def test_late_analysis_cancelled_and_counted(mock_url_to_markdown, mock_analyzer):
+    """Test that a late analysis stops before its next step and its spend is counted by reflection."""
+    analyzed = []
+    def slow_analyzer(analyzer_input, stream_mode):
+        time.sleep(0.3)
+        yield {"page_content": "Page", "tokens_used": 100, "cost_usd": 0.01}
+        analyzed.append(analyzer_input["url"])
+        yield {"analysis_result": "Answer", "tokens_used": 600, "cost_usd": 0.06}
+
+    mock_url_to_markdown.return_value = "Page"
+    mock_analyzer.stream.side_effect = slow_analyzer
+    state = {
+        "user_query": "query", "search_query": "query", "rationale": "", "url": "https://slow.example.com",
+        "research_run_id": "run-late", "analysis_deadline": time.time() + 0.1,
+    }
+
+    result = web_content_analysis(state, {})
+    registry = get_late_analysis_registry("run-late")
+    assert result["late_analyses"][0]["url"] == "https://slow.example.com"
+    assert registry.running == 1
+
+    waited = time.time()
+    while registry.running and time.time() - waited < 2:
+        time.sleep(0.05)
+    assert registry.running == 0
+    assert analyzed == []
+
+    with patch("deep_research.nodes.get_chat_model") as mock_get_model:
+        mock_get_model.return_value.invoke.return_value = {
+            "parsed": Reflection(is_sufficient=True, knowledge_gap="", follow_up_queries=[]),
+            "parsing_error": None,
+            "raw": AIMessage(content="", usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}),
+        }
+        update = reflection({
+            "messages": [HumanMessage(content="query")], "research_run_id": "run-late",
+            "web_content_analysis_results": [],
+        }, {})
+    assert update["tokens_used"] == 115
+    assert registry.collect()["tokens_used"] == 0
+
+def test_initial_research_plan_follows_token_budget():
+    """Test that the first research loop is sized by the token budget."""
+    small = plan_initial_research(Configuration(research_budget_tokens=20000), "gpt-4o-mini")
+    large = plan_initial_research(Configuration(research_budget_tokens=200000), "gpt-4o-mini")
+
+    assert small == {"search_queries": 1, "results_per_query": 1}
+    assert large["search_queries"] * large["results_per_query"] > 1
+    assert large["search_queries"] * large["results_per_query"] * PAGE_TOKENS_ESTIMATE <= 200000
+
+def test_next_research_loop_follows_token_budget():
+    """Test that another research loop is planned only while the token budget allows it."""
+    state = {
+        "research_started_at": time.time(),
+        "research_loop_count": 1,
+        "number_of_ran_queries": 2,
+        "knowledge_gap": "gap",
+        "follow_up_queries": ["follow-up 1", "follow-up 2", "follow-up 3"],
+        "tokens_used": 10000,
+    }
+
+    plan = plan_next_loop(state, Configuration(research_budget_tokens=100000))
+    assert 1 < plan["search_queries"] * plan["results_per_query"] <= 4
+    assert plan_next_loop(state, Configuration(research_budget_tokens=15000)) is None
+    assert plan_next_loop({**state, "knowledge_gap": ""}, Configuration(research_budget_tokens=100000)) is None
+
+def test_next_research_loop_reserves_late_analyses():
+    """Test that the spend of late analyses still running is reserved before planning another loop."""
+    state = {
+        "research_started_at": time.time(),
+        "research_loop_count": 1,
+        "number_of_ran_queries": 2,
+        "knowledge_gap": "gap",
+        "follow_up_queries": ["follow-up 1", "follow-up 2"],
+        "tokens_used": 10000,
+    }
+    configurable = Configuration(research_budget_tokens=50000)
+
+    assert plan_next_loop(state, configurable) is not None
+    # each late analysis is assumed to use as much as an average analyzed page (5000 tokens)
+    assert plan_next_loop({**state, "running_late_analyses": 6}, configurable) is None
+
+def test_select_urls_counts_finished_late_analyses():
+    """Test that the spend of late analyses finished since reflection is added to the state."""
+    registry = get_late_analysis_registry("run-select")
+    registry.started()
+    registry.finished(300, 0.03)
+
+    selected = select_urls_to_analyze({"research_run_id": "run-select", "web_research_results": []}, {})
+    assert selected["tokens_used"] == 300
+    assert selected["cost_usd"] == 0.03
+    assert select_urls_to_analyze({"research_run_id": "run-select", "web_research_results": []}, {})["tokens_used"] == 0
+
+def test_filter_follow_up_queries():
+    """Test that follow-up queries paraphrasing searched queries or each other are dropped."""
+    executed_queries = ["F1 2024 race calendar", "Who won the 2023 F1 championship?"]
+    follow_up_queries = [
+        "2024 F1 calendar of races",
+        "F1 2024 sprint race results",
+        "f1 2024 sprint races results?",
+        "Who won the 2022 F1 championship?",
+    ]
+
+    assert filter_follow_up_queries(follow_up_queries, executed_queries, max_similarity=0.7) == [
+        "F1 2024 sprint race results",
+        "Who won the 2022 F1 championship?",
+    ]
+
+def test_evaluate_research_sends_only_new_queries():
+    """Test that only follow-up queries not searched yet start another research loop."""
+    state = {
+        "is_sufficient": False,
+        "knowledge_gap": "gap",
+        "research_loop_count": 1,
+        "executed_queries": ["F1 2024 race calendar"],
+        "seen_urls": set(),
+    }
+
+    sends = evaluate_research({**state, "follow_up_queries": ["2024 F1 calendar of races", "F1 2024 tyre rules"]}, {})
+    assert [send.arg["search_query"] for send in sends] == ["F1 2024 tyre rules"]
+    assert evaluate_research({**state, "follow_up_queries": ["F1 race calendar 2024"]}, {}) == "finalize_answer"
+
+SEARCH_RESULTS = [
+    {"title": "Home", "link": "https://news.example.com/", "snippet": "Latest news and weather."},
+    {"title": "F1 2024 calendar", "link": "https://f1.example.com/calendar", "snippet": "All 24 races of the 2024 F1 season."},
+    {"title": "F1 2024 race calendar and dates", "link": "https://f1.example.com/dates", "snippet": "Dates of F1 races."},
+    {"title": "2024 F1 race calendar", "link": "https://motorsport.example.org/f1", "snippet": "The F1 race calendar for 2024."},
+]
+
+def test_rank_search_results():
+    """Test that relevant results are ranked first, relevance winning over domain diversity."""
+    ranked = rank_search_results(SEARCH_RESULTS, "F1 2024 race calendar")
+
+    links = [result["link"] for result in ranked]
+    # the second result from f1.example.com is relevant, so it comes before the irrelevant one from a new domain
+    assert links[-1] == "https://news.example.com/"
+    assert links[0] == "https://motorsport.example.org/f1"
+
+def test_rank_search_results_prefers_new_domains():
+    """Test that of equally relevant results, a result from a domain not ranked yet comes first."""
+    results = [
+        {"title": "F1 race calendar", "link": "https://f1.example.com/a", "snippet": "F1 race calendar."},
+        {"title": "F1 race calendar", "link": "https://f1.example.com/b", "snippet": "F1 race calendar."},
+        {"title": "F1 race calendar", "link": "https://motorsport.example.org/f1", "snippet": "F1 race calendar."},
+    ]
+
+    ranked = rank_search_results(results, "F1 race calendar")
+
+    assert [result["link"] for result in ranked] == [
+        "https://f1.example.com/a", "https://motorsport.example.org/f1", "https://f1.example.com/b",
+    ]
+
+@patch("deep_research.nodes.web_search")
+def test_web_research_fetch_limit_and_snippet_answer(mock_search):
+    """Test that only the top ranked URLs are fetched and pages aren't fetched when snippets answer the query."""
+    mock_search.return_value = SEARCH_RESULTS
+    state = {"search_query": "F1 2024 race calendar", "rationale": ""}
+
+    result = web_research(state, {"configurable": {"max_urls_to_fetch_per_query": 2}})
+    assert len(result["web_research_results"]) == 2
+    assert "https://news.example.com/" not in [research["url"] for research in result["web_research_results"]]
+    assert result["web_research_results"][0]["title"]
+
+    result = web_research(state, {"configurable": {"snippet_answer_threshold": 1.0}})
+    assert "web_research_results" not in result
+    assert "All 24 races" in result["web_content_analysis_results"][0]
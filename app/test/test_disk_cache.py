@@ -0,0 +1,49 @@
+import time
+from utils.disk_cache import DiskCache
+from utils.url import normalize_url
+
+def test_disk_cache_put_get(tmp_path):
+    """Test storing and reading entries from the disk cache."""
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=1024, ttl_seconds=60)
+    cache.put("key", raw=b"<p>raw</p>", text="raw", metadata={"etag": "abc"})
+
+    entry = cache.get("key")
+
+    assert entry["raw"] == b"<p>raw</p>"
+    assert entry["text"] == "raw"
+    assert entry["metadata"] == {"etag": "abc"}
+    assert cache.is_fresh(entry)
+    assert cache.get("missing") is None
+    assert cache.hit_ratio() == 0.5
+
+def test_disk_cache_ttl(tmp_path):
+    """Test that expired entries are reported as stale but kept for revalidation."""
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=1024, ttl_seconds=0.01)
+    cache.put("key", text="value")
+    time.sleep(0.02)
+
+    entry = cache.get("key")
+    assert entry is not None
+    assert not cache.is_fresh(entry)
+
+    cache.touch("key")
+    assert cache.is_fresh(cache.get("key"))
+
+def test_disk_cache_lru_eviction(tmp_path):
+    """Test that least recently used entries are evicted when the cache is full."""
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=10)
+    cache.put("a", raw=b"1234")
+    cache.put("b", raw=b"1234")
+    cache.get("a")  # "b" becomes the least recently used entry
+    cache.put("c", raw=b"1234")
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.total_size() == 8
+
+def test_normalize_url():
+    """Test that trivially different URLs are normalized to the same key."""
+    assert normalize_url("HTTPS://Example.com:443/page?b=2&a=1#section") == "https://example.com/page?a=1&b=2"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/") == "http://example.com:8080/"
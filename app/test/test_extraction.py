@@ -0,0 +1,97 @@
+from web_page_analyzer.extraction import extract_main_content
+from web_page_analyzer.utils import html_to_markdown
+
+PAGE = """
+<html>
+    <head><title>Race calendar</title></head>
+    <body>
+        <header class="site-header"><a href="/">Home</a> <a href="/news">News</a></header>
+        <nav><ul><li><a href="/f1">F1</a></li><li><a href="/motogp">MotoGP</a></li></ul></nav>
+        <div id="cookie-banner">We use cookies to improve your experience. Accept all cookies?</div>
+        <div class="layout">
+            <div class="article-body">
+                <h1>Season schedule</h1>
+                <p>The season opens in Melbourne on March 8, followed by races in China, Japan and Bahrain.</p>
+                <p>The summer break starts after the Hungarian Grand Prix, which takes place on August 2.</p>
+                <p>The championship concludes in Abu Dhabi on December 6, after twenty four rounds in total.</p>
+            </div>
+            <div class="sidebar">
+                <ul>
+                    <li><a href="/a">Most read: transfer rumours</a></li>
+                    <li><a href="/b">Most read: tyre regulations</a></li>
+                </ul>
+            </div>
+        </div>
+        <footer>Copyright 2025, all rights reserved. <a href="/privacy">Privacy policy</a></footer>
+    </body>
+</html>
+"""
+
+def test_extract_main_content():
+    """Test that boilerplate is dropped and the main content with the title is kept."""
+    result = extract_main_content(PAGE)
+
+    assert "Melbourne on March 8" in result["html"]
+    assert "Abu Dhabi on December 6" in result["html"]
+    assert "<title>Race calendar</title>" in result["html"]
+    assert "cookies" not in result["html"]
+    assert "Most read" not in result["html"]
+    assert "MotoGP" not in result["html"]
+    assert "Privacy policy" not in result["html"]
+    assert result["tokens_after"] < result["tokens_before"]
+
+def test_html_to_markdown_with_main_content_extraction():
+    """Test main content extraction stage of the html_to_markdown."""
+    markdown = html_to_markdown(PAGE, main_content_only=True)
+
+    assert "Title: Race calendar" in markdown
+    assert "# Season schedule" in markdown
+    assert "Most read" not in markdown
+
+WEB_FORMS_PAGE = """
+<html>
+    <head><title>Team news</title></head>
+    <body>
+        <form method="post" action="./Default.aspx" id="form1">
+            <input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="dDwtMTA4NzczMzUxMjs7Pg==" />
+            <div class="header"><a href="/">Home</a> <a href="/teams">Teams</a></div>
+            <form class="search"><input type="text" name="q" /><button>Search</button></form>
+            <div id="content">
+                <h1>Driver line-up confirmed</h1>
+                <p>The team confirmed its driver line-up for the next season, keeping both current drivers.</p>
+                <p>Testing starts in Bahrain in February, three weeks before the opening race in Melbourne.</p>
+            </div>
+        </form>
+    </body>
+</html>
+"""
+
+def test_extract_main_content_of_page_wrapped_in_form():
+    """Test that content of a page wrapped in a <form> (eg. ASP.NET WebForms) is kept and control forms dropped."""
+    result = extract_main_content(WEB_FORMS_PAGE)
+
+    assert "driver line-up for the next season" in result["html"]
+    assert "Testing starts in Bahrain" in result["html"]
+    assert 'name="q"' not in result["html"]
+    assert "<body><body>" not in result["html"]
+    markdown = html_to_markdown(WEB_FORMS_PAGE, main_content_only=True)
+    assert "# Driver line-up confirmed" in markdown
+    assert "Testing starts in Bahrain" in markdown
+
+def test_extract_main_content_falls_back_to_whole_page():
+    """Test that the original page is returned when (almost) no text survives the extraction."""
+    page = "<html><head><title>T</title></head><body><form><p>The race starts at noon.</p></form></body></html>"
+
+    result = extract_main_content(page)
+
+    assert result["html"] == page
+    assert result["tokens_after"] == result["tokens_before"]
+
+def test_extract_main_content_of_xhtml_page():
+    """Test that boilerplate is dropped from XHTML pages with an XML encoding declaration."""
+    result = extract_main_content('<?xml version="1.0" encoding="UTF-8"?>\n' + PAGE.strip())
+
+    assert "Melbourne on March 8" in result["html"]
+    assert "Most read" not in result["html"]
+    assert "Privacy policy" not in result["html"]
+    assert result["tokens_after"] < result["tokens_before"]
@@ -0,0 +1,55 @@
+from unittest.mock import patch, MagicMock
+from langchain_core.messages import AIMessage, HumanMessage
+from utils.text_similarity import text_similarity
+from deep_research.findings import new_findings, is_empty_analysis
+from deep_research.nodes import update_findings
+
+def test_text_similarity():
+    """Test that reworded texts are similar and unrelated texts are not."""
+    assert text_similarity("Max Verstappen won the 2023 championship.", "max verstappen won the 2023 championship") == 1.0
+    assert text_similarity("Verstappen won the championship in 2023", "Verstappen won the 2023 championships") > 0.7
+    assert text_similarity("Verstappen won the championship in 2023", "The race was held in heavy rain") < 0.3
+
+def test_new_findings_drop_empty_and_duplicate_facts():
+    """Test that empty analyses and already known facts are not added to the findings."""
+    findings = ["Max Verstappen won the 2023 Formula 1 championship with 19 wins."]
+    analyses = [
+        "No relevant information found.\nConfidence level: 1",
+        "Max Verstappen won the 2023 Formula 1 championship, with 19 wins. Red Bull won 21 of 22 races in 2023.\n"
+        "Confidence level: 9",
+        "Max Verstappen won the 2023 Formula 1 championship with 19 wins!",
+        "Paris",
+        "Max Verstappen won the 2022 Formula 1 championship with 15 wins.",
+    ]
+
+    added = new_findings(findings, analyses, max_similarity=0.7)
+
+    assert is_empty_analysis(analyses[0])
+    assert added == ["Red Bull won 21 of 22 races in 2023.\nConfidence level: 9", "Paris", analyses[4]]
+    assert new_findings(findings + added, ["Paris."], max_similarity=0.7) == []
+
+@patch("deep_research.nodes.get_chat_model")
+def test_update_findings_compresses_large_findings(mock_chat):
+    """Test that only the new analyses are added and findings over the token limit are compressed."""
+    mock_chat.return_value = MagicMock(invoke=MagicMock(return_value=AIMessage("Compressed findings")))
+    analyses = [
+        "The first race of the season was held in Bahrain in March.",
+        "Red Bull won the constructors championship by a large margin.",
+        "Ferrari scored a single victory at the Singapore Grand Prix.",
+        "Lewis Hamilton finished third in the drivers standings.",
+        "Pirelli supplied tyres in five dry compounds this year.",
+    ]
+    state = {
+        "messages": [HumanMessage("topic")],
+        "web_content_analysis_results": analyses,
+        "findings": analyses[:2],
+        "findings_analyses_count": 2,
+    }
+
+    update = update_findings(state, {"configurable": {"findings_max_tokens": 10000}})
+    assert update["findings"] == analyses
+    assert update["findings_analyses_count"] == 5
+    mock_chat.assert_not_called()
+
+    update = update_findings(state, {"configurable": {"findings_max_tokens": 20}})
+    assert update["findings"] == ["Compressed findings"]
@@ -0,0 +1,29 @@
+from utils.http import (
+    charset_from_content_type,
+    is_supported_content_type,
+    sniff_charset,
+)
+
+def test_supported_content_types():
+    """Test that only textual documents are accepted for download."""
+    assert is_supported_content_type("text/html; charset=utf-8")
+    assert is_supported_content_type("application/xhtml+xml")
+    assert is_supported_content_type("")
+    assert not is_supported_content_type("application/pdf")
+    assert not is_supported_content_type("image/png")
+
+def test_charset_from_content_type():
+    """Test reading charset from the Content-Type header."""
+    assert charset_from_content_type("text/html; charset=ISO-8859-2") == "iso8859-2"
+    assert charset_from_content_type('text/html; charset="utf-8"') == "utf-8"
+    assert charset_from_content_type("text/html") is None
+    assert charset_from_content_type("text/html; charset=unknown-charset") is None
+
+def test_sniff_charset():
+    """Test detecting charset from <meta> tags and byte order marks."""
+    assert sniff_charset(b'<html><head><meta charset="windows-1250"></head>') == "cp1250"
+    assert sniff_charset(
+        b'<meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">'
+    ) == "iso8859-1"
+    assert sniff_charset(b"\xef\xbb\xbf<html></html>") == "utf-8-sig"
+    assert sniff_charset(b"<html><head></head></html>") is None
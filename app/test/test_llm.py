@@ -0,0 +1,33 @@
+from unittest.mock import patch, MagicMock
+from pydantic import BaseModel
+from langchain_core.tools import tool
+from utils.llm import get_chat_model, clear_chat_models
+
+class Answer(BaseModel):
+    answer: str
+
+@tool
+def lookup(query: str) -> str:
+    """Looks up the query."""
+    return query
+
+@patch("utils.llm.ChatOpenAI")
+def test_chat_models_are_shared(mock_chat):
+    """Test that models are created once per key and share the pooled HTTP clients."""
+    mock_chat.side_effect = lambda **kwargs: MagicMock()
+    clear_chat_models()
+    try:
+        model = get_chat_model("gpt-4o", temperature=0.5)
+        assert get_chat_model("gpt-4o", temperature=0.5) is model
+        assert get_chat_model("gpt-4o", temperature=0) is not model
+        structured = get_chat_model("gpt-4o", temperature=0.5, schema=Answer, include_raw=True)
+        assert get_chat_model("gpt-4o", temperature=0.5, schema=Answer, include_raw=True) is structured
+        with_tools = get_chat_model("gpt-4o", temperature=0.5, tools=[lookup])
+        assert get_chat_model("gpt-4o", temperature=0.5, tools=[lookup]) is with_tools
+
+        assert mock_chat.call_count == 4
+        clients = {(call.kwargs["http_client"], call.kwargs["http_async_client"]) for call in mock_chat.call_args_list}
+        assert len(clients) == 1
+        assert structured is not with_tools
+    finally:
+        clear_chat_models()
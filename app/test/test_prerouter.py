@@ -0,0 +1,16 @@
+from agent.prerouter import preroute
+from benchmarks.prerouter import load_labeled_turns, evaluate
+
+def test_prerouter_routes_labeled_turns():
+    """Test that all labeled turns of the fixture set are routed as expected."""
+    result = evaluate(load_labeled_turns())
+    assert result["mistakes"] == []
+    assert result["accuracy"] == 1.0
+
+def test_prerouter_tool_arguments():
+    """Test that tool calls get arguments extracted from the turn."""
+    assert preroute("What is 2^10?")["tool_args"] == {"expression": "2**10"}
+    assert preroute("What's 12 times 12?")["tool_args"] == {"expression": "12 * 12"}
+    assert preroute("How many days until 2026-12-24?")["tool_args"] == {"target_date": "2026-12-24"}
+    assert preroute("2026-01-14 + 30 days")["tool_args"] == {"operation": "2026-01-14 + 30 days"}
+    assert preroute("What time is it?")["tool_args"] == {}
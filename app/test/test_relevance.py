@@ -0,0 +1,37 @@
+from web_page_analyzer.relevance import TermIndex, select_relevant_sections, tokenize
+
+SECTIONS = [
+    "Title: Travel guide to Krakow",
+    "The airport train runs every 30 minutes and the journey takes 17 minutes.",
+    "The Wieliczka salt mine is 15 km away from the city.",
+    "Poland uses the zloty, card payments are accepted almost everywhere.",
+]
+
+def test_tokenize():
+    """Test that stopwords and punctuation are skipped."""
+    assert tokenize("How far is the Salt Mine?") == ["far", "salt", "mine"]
+
+def test_bm25_ranking():
+    """Test that the section matching the query gets the highest score."""
+    scores = TermIndex(SECTIONS).bm25_scores("How far is the salt mine?")
+
+    assert max(range(len(SECTIONS)), key=lambda i: scores[i]) == 2
+    assert scores[1] == 0.0
+
+def test_select_relevant_sections():
+    """Test that only the first and the most relevant sections are kept, in the original order."""
+    text = "\n\n".join(SECTIONS)
+
+    selection = select_relevant_sections(text, "airport train", token_budget=30, top_k=2, section_tokens=20)
+
+    assert selection["text"] == SECTIONS[0] + "\n\n" + SECTIONS[1] + "\n\n[...]\n\n"
+    assert selection["sections_selected"] == 2
+    assert selection["tokens_after"] < selection["tokens_before"]
+
+def test_select_relevant_sections_without_matches():
+    """Test that the page is kept unchanged if no section matches the query."""
+    text = "\n\n".join(SECTIONS)
+
+    selection = select_relevant_sections(text, "Jak dojechać do centrum?", token_budget=30, top_k=2, section_tokens=20)
+
+    assert selection["text"] == text
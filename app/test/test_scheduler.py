@@ -0,0 +1,68 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.scheduler import ScrapingScheduler, parse_retry_after
+
+def _download_times(scheduler: ScrapingScheduler, urls: list[str], duration: float = 0.0) -> list[float]:
+    started = time.monotonic()
+    def download(url):
+        with scheduler.slot(url):
+            time.sleep(duration)
+            return time.monotonic() - started
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return sorted(executor.map(download, urls))
+
+def test_domain_rate_limit():
+    """Test that requests above the burst are spread according to the domain rate."""
+    scheduler = ScrapingScheduler(max_in_flight=10, concurrency=10, rate_per_second=20, burst=2)
+
+    times = _download_times(scheduler, ["https://example.com/a"] * 4 + ["https://other.com/a"] * 2)
+
+    stats = scheduler.stats()
+    assert times[-1] >= 0.09  # 2 requests over the burst at 20 requests/s
+    assert stats["example.com"]["requests"] == 4
+    assert stats["example.com"]["queue_wait_seconds_max"] >= 0.09
+    assert stats["other.com"]["queue_wait_seconds_max"] < 0.05
+
+def test_domain_concurrency_and_global_cap():
+    """Test that the number of concurrent downloads respects per-domain and global limits."""
+    scheduler = ScrapingScheduler(max_in_flight=3, concurrency=2, rate_per_second=0, burst=1)
+    lock = threading.Lock()
+    in_flight = {"example.com": 0, "total": 0}
+    peaks = {"example.com": 0, "total": 0}
+
+    def download(url):
+        domain = "example.com" if "example.com" in url else None
+        with scheduler.slot(url):
+            with lock:
+                for key in filter(None, [domain, "total"]):
+                    in_flight[key] += 1
+                    peaks[key] = max(peaks[key], in_flight[key])
+            time.sleep(0.05)
+            with lock:
+                for key in filter(None, [domain, "total"]):
+                    in_flight[key] -= 1
+
+    urls = ["https://example.com/"] * 4 + [f"https://site{i}.com/" for i in range(4)]
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        list(executor.map(download, urls))
+
+    assert peaks == {"example.com": 2, "total": 3}
+
+def test_retry_after_pauses_domain():
+    """Test that Retry-After pauses the whole domain."""
+    scheduler = ScrapingScheduler(max_in_flight=10, concurrency=10, rate_per_second=0, burst=1)
+    scheduler.block("https://example.com/page", 0.2)
+
+    times = _download_times(scheduler, ["https://example.com/other", "https://other.com/"])
+
+    assert times[0] < 0.1
+    assert times[1] >= 0.19
+    assert scheduler.stats()["example.com"]["throttled"] == 1
+
+def test_parse_retry_after():
+    """Test parsing Retry-After header values."""
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,74 @@
+import json
+import time
+import threading
+from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from utils.disk_cache import DiskCache
+from utils.search import SingleFlight, google_search, register_search_backend, web_search
+
+RESULTS = [{"title": "Example", "link": "https://example.com", "snippet": "Example page"}]
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Test that concurrent calls with the same key share a single execution."""
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flights.do, "key", slow_call)
+        started.wait()
+        followers = [executor.submit(flights.do, "key", slow_call) for _ in range(4)]
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+
+@patch("utils.search._get_google_search")
+@patch("utils.search.get_search_cache")
+def test_google_search_cache(mock_get_cache, mock_get_client, tmp_path):
+    """Test that searches differing only in query case and whitespace are served from the cache."""
+    mock_get_cache.return_value = DiskCache(str(tmp_path / "search.sqlite"), max_bytes=1024 * 1024, ttl_seconds=60)
+    client = MagicMock()
+    client.results.return_value = RESULTS
+    mock_get_client.return_value = client
+
+    first = google_search("Formula 1 schedule", num_results=5)
+    second = google_search("  formula 1   SCHEDULE?", num_results=5)
+    other = google_search("Formula 1 schedule", num_results=2)
+
+    assert first == second == other == RESULTS
+    assert client.results.call_count == 2
+
+@patch("utils.search._get_google_search")
+@patch("utils.search.get_search_cache")
+def test_google_search_rechecks_cache_in_coalesced_call(mock_get_cache, mock_get_client, tmp_path):
+    """Test that a search missing the cache just before another one filled it doesn't call the API again."""
+    cache = DiskCache(str(tmp_path / "search.sqlite"), max_bytes=1024 * 1024, ttl_seconds=60)
+    client = MagicMock()
+    client.results.return_value = RESULTS
+    mock_get_client.return_value = client
+    mock_get_cache.return_value = cache
+    google_search("Formula 1 schedule", num_results=5)
+
+    # the first cache check runs before the previous search stored its results
+    racing_cache = MagicMock(wraps=cache)
+    racing_cache.get.side_effect = [None, cache.get(json.dumps(["formula 1 schedule", 5]))]
+    mock_get_cache.return_value = racing_cache
+
+    assert google_search("Formula 1 schedule", num_results=5) == RESULTS
+    assert client.results.call_count == 1
+
+def test_web_search_uses_configured_backend():
+    """Test that web search is served by the backend selected with the search_backend setting."""
+    register_search_backend("static", lambda query, num_results: RESULTS[:num_results])
+
+    with patch("utils.search.app_config.get", side_effect=lambda key, default=None: (
+        "static" if key == "search_backend" else default
+    )):
+        assert web_search("anything", num_results=1) == RESULTS
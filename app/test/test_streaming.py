@@ -0,0 +1,73 @@
+import time
+from typing import Annotated, TypedDict
+from langgraph.graph import StateGraph, START, END, add_messages
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from runner.streaming import stream_answer, format_progress
+
+class MessagesState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+def _research_subgraph():
+    model = FakeListChatModel(responses=["Research summary"])
+    graph = StateGraph(MessagesState)
+    graph.add_node("web_research", lambda state: {})
+    graph.add_node("finalize_answer", lambda state: {"messages": [model.invoke(state["messages"])]})
+    graph.add_edge(START, "web_research")
+    graph.add_edge("web_research", "finalize_answer")
+    graph.add_edge("finalize_answer", END)
+    return graph.compile()
+
+def _agent_graph():
+    research = _research_subgraph()
+    model = FakeListChatModel(responses=["The answer"])
+
+    def web_search(state):
+        research.invoke({"messages": state["messages"]})
+        return {}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("web_search", web_search)
+    graph.add_node("finalize_answer", lambda state: {"messages": [model.invoke(state["messages"])]})
+    graph.add_node("store_memory", lambda state: time.sleep(0.2) or {})
+    graph.add_edge(START, "web_search")
+    graph.add_edge("web_search", "finalize_answer")
+    graph.add_edge("finalize_answer", "store_memory")
+    graph.add_edge("store_memory", END)
+    return graph.compile()
+
+def test_stream_answer_tokens_of_agent_answer_only():
+    """Test that only tokens of the agent's finalize_answer are streamed and progress covers subgraph nodes."""
+    tokens, progress = [], []
+
+    result = stream_answer(_agent_graph(), {"messages": [HumanMessage("question")]}, {},
+                           on_token=tokens.append, on_progress=progress.append)
+
+    assert result["answer"] == "The answer"
+    assert len(tokens) > 1 and "".join(tokens) == "The answer"
+    assert "web_search › web_research" in progress
+    assert "web_search › finalize_answer" in progress
+    # progress is not reported once the answer is being printed
+    assert "store_memory" not in progress
+    assert result["time_to_first_token"] < result["total_seconds"] - 0.15
+
+def test_stream_answer_without_llm_tokens():
+    """Test that answers arriving only as node updates (eg. fast path) are passed on when the graph finishes."""
+    graph = StateGraph(MessagesState)
+    graph.add_node("deliver_processing_answer", lambda state: {"messages": [AIMessage("Fast answer")]})
+    graph.add_edge(START, "deliver_processing_answer")
+    graph.add_edge("deliver_processing_answer", END)
+    tokens = []
+
+    result = stream_answer(graph.compile(), {"messages": [HumanMessage("question")]}, {},
+                           on_token=tokens.append, on_progress=lambda stage: None)
+
+    assert result["answer"] == "Fast answer"
+    assert tokens == ["Fast answer"]
+    assert result["time_to_first_token"] is not None
+
+def test_format_progress():
+    """Test that subgraph namespaces are shown without task ids."""
+    assert format_progress(("web_search:1f0c", "web_content_analysis:9a2b"), "web_scraping") == \
+        "web_search › web_content_analysis › web_scraping"
+    assert format_progress((), "process_query") == "process_query"
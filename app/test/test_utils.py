@@ -1,6 +1,12 @@
-from app.src.deep_research.utils import html_to_markdown
+import pytest
+from unittest.mock import MagicMock, patch
+from requests.structures import CaseInsensitiveDict
+from deep_research.utils import html_to_markdown
+from utils.disk_cache import DiskCache
+from web_page_analyzer.utils import url_to_markdown
 
-def test_html_to_markdown():
+@pytest.mark.parametrize("engine", ["markdownify", "lxml"])
+def test_html_to_markdown(engine):
     """Test the html_to_markdown function."""
     html = """
     <html>
@@ -14,7 +20,7 @@ def test_html_to_markdown():
         </body>
     </html>
     """
-    markdown = html_to_markdown(html)
+    markdown = html_to_markdown(html, engine=engine)
     
     assert "Title: Test title" in markdown
     assert "# Header" in markdown
@@ -24,3 +30,49 @@ def test_html_to_markdown():
     assert "<script>" not in markdown
     assert "alert" not in markdown
     assert "<style>" not in markdown
+
+XHTML_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en">
+    <head><title>XHTML page</title></head>
+    <body>
+        <h1>Race calendar</h1>
+        <p>The season opens in Melbourne on March 8.</p>
+    </body>
+</html>
+"""
+
+@pytest.mark.parametrize("engine", ["markdownify", "lxml"])
+def test_html_to_markdown_of_xhtml_page(engine):
+    """Test that XHTML pages with an XML encoding declaration are converted."""
+    markdown = html_to_markdown(XHTML_PAGE, engine=engine)
+
+    assert "Title: XHTML page" in markdown
+    assert "# Race calendar" in markdown
+    assert "Melbourne on March 8" in markdown
+    assert "<?xml" not in markdown
+
+def _fetched_page(html: str) -> dict:
+    return {
+        "status_code": 200, "headers": CaseInsensitiveDict(), "raw": html.encode(), "html": html,
+        "encoding": "utf-8", "truncated": False,
+    }
+
+def test_failed_conversion_is_not_cached(tmp_path):
+    """Test that a page failing to convert is not stored in the fetch cache and is converted again next time."""
+    cache = DiskCache(str(tmp_path / "fetch.sqlite"), max_bytes=1024 * 1024, ttl_seconds=60)
+    converter = MagicMock()
+    converter.convert.side_effect = [ValueError("broken page"), "# Race calendar"]
+    fetch = MagicMock(return_value=_fetched_page("<h1>Race calendar</h1>"))
+
+    with patch("web_page_analyzer.utils.get_fetch_cache", return_value=cache), \
+            patch("web_page_analyzer.utils.get_fetch_backend", return_value=fetch), \
+            patch.dict("web_page_analyzer.utils.MARKDOWN_CONVERTERS", {"markdownify": converter}), \
+            patch.dict("config.config_loader.app_config.config", {"html_to_markdown_engine": "markdownify"}):
+        failed = url_to_markdown("https://example.com/calendar")
+        assert "broken page" in failed
+        assert cache.get("https://example.com/calendar") is None
+
+        assert url_to_markdown("https://example.com/calendar") == "# Race calendar"
+        assert fetch.call_count == 2
+        assert cache.get("https://example.com/calendar")["text"] == "# Race calendar"
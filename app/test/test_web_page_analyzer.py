@@ -0,0 +1,158 @@
+import pytest
+from unittest.mock import patch
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from utils.disk_cache import DiskCache
+from utils.tokens import estimate_tokens
+from web_page_analyzer.graph import graph
+from web_page_analyzer.nodes import relevance_filter
+from web_page_analyzer.utils import split_into_chunks
+from web_page_analyzer.analysis_cache import AnalysisCache, analysis_cache_key
+
+@pytest.fixture(autouse=True)
+def analysis_cache():
+    """Replace the persistent analysis cache, tests mock the LLM and must not share cached results."""
+    with patch("web_page_analyzer.nodes.get_analysis_cache", return_value=None) as mock_get_cache:
+        yield mock_get_cache
+
+def test_split_into_chunks():
+    """Test that chunks respect the size limit and paragraph boundaries."""
+    text = "\n\n".join(f"Paragraph {i} " + "x" * 30 for i in range(10))
+
+    chunks = split_into_chunks(text, max_tokens=25)  # ~100 characters
+
+    assert len(chunks) == 5
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].startswith("Paragraph 0")
+    assert "\n\n".join(chunks) == text
+
+def test_split_into_chunks_long_paragraph():
+    """Test that paragraphs longer than the chunk size are split."""
+    chunks = split_into_chunks("y" * 250, max_tokens=25)
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+@patch("web_page_analyzer.nodes.url_to_markdown")
+@patch("web_page_analyzer.nodes._get_analysis_model")
+def test_short_page_analysis(mock_get_model, mock_url_to_markdown):
+    """Test that short pages are analyzed with a single LLM call."""
+    mock_url_to_markdown.return_value = "Short page"
+    mock_get_model.return_value = FakeListChatModel(responses=["Answer"])
+
+    result = graph.invoke({"search_query": "query", "url": "https://example.com"})
+
+    assert result["analysis_result"] == "Answer"
+    assert "chunk_analysis_results" not in result
+
+@patch("web_page_analyzer.nodes.url_to_markdown")
+@patch("web_page_analyzer.nodes._get_analysis_model")
+def test_long_page_map_reduce_analysis(mock_get_model, mock_url_to_markdown):
+    """Test that long pages are analyzed in chunks and the results are merged."""
+    mock_url_to_markdown.return_value = "\n\n".join(["a" * 300, "b" * 300, "c" * 300])
+    mock_get_model.side_effect = [
+        FakeListChatModel(responses=["Fact A", "No relevant information found", "Fact C"]),
+        FakeListChatModel(responses=["Merged answer"]),
+    ]
+
+    result = graph.invoke(
+        {"search_query": "query", "url": "https://example.com"},
+        config={"configurable": {"chunk_size_tokens": 100, "max_chunk_concurrency": 1}},
+    )
+
+    assert result["analysis_result"] == "Merged answer"
+
+@patch("web_page_analyzer.nodes.url_to_markdown")
+@patch("web_page_analyzer.nodes._get_analysis_model")
+def test_long_relevant_page_filtered_and_analyzed_in_chunks(mock_get_model, mock_url_to_markdown):
+    """Test that with the default configuration a long page is filtered and the relevant content still analyzed in chunks."""
+    relevant = "The F1 race calendar lists the date and the circuit of every race of the season. " * 12
+    irrelevant = "Subscribe to our newsletter to get the latest offers from our partners. " * 13
+    mock_url_to_markdown.return_value = "\n\n".join([relevant, irrelevant] * 40)
+    mock_get_model.side_effect = [
+        FakeListChatModel(responses=["Fact"] * 10),
+        FakeListChatModel(responses=["Merged answer"]),
+    ]
+
+    result = graph.invoke({"search_query": "F1 race calendar", "url": "https://example.com"})
+
+    assert result["analysis_result"] == "Merged answer"
+    # relevant sections were kept up to the relevance budget, which is larger than a chunk
+    assert "newsletter" not in result["page_content"]
+    assert 6000 < estimate_tokens(result["page_content"]) <= 12000
+
+@patch("web_page_analyzer.nodes.url_to_markdown")
+@patch("web_page_analyzer.nodes._get_analysis_model")
+def test_provided_page_content_is_not_scraped(mock_get_model, mock_url_to_markdown):
+    """Test that the page isn't downloaded again when the caller provides its content."""
+    mock_get_model.return_value = FakeListChatModel(responses=["Answer"])
+
+    result = graph.invoke({"search_query": "query", "url": "https://example.com", "page_content": "Page"})
+
+    assert result["analysis_result"] == "Answer"
+    mock_url_to_markdown.assert_not_called()
+
+def test_analysis_cache_key_normalizes_query():
+    """Test that the cache key ignores query case and whitespace but not the content, model or date."""
+    date = "March 01, 2026"
+    key = analysis_cache_key("Page", "Who won  the race?", "gpt-4o-mini", "1", 6000, date)
+
+    assert key == analysis_cache_key("Page", " who won the race ", "gpt-4o-mini", "1", 6000, date)
+    assert key != analysis_cache_key("Page 2", "Who won the race?", "gpt-4o-mini", "1", 6000, date)
+    assert key != analysis_cache_key("Page", "Who won the race?", "gpt-4o", "1", 6000, date)
+    assert key != analysis_cache_key("Page", "Who won the race?", "gpt-4o-mini", "2", 6000, date)
+    assert key != analysis_cache_key("Page", "Who won the race?", "gpt-4o-mini", "1", 6000, "March 02, 2026")
+
+@patch("web_page_analyzer.nodes.url_to_markdown")
+@patch("web_page_analyzer.nodes._get_analysis_model")
+def test_cached_analysis_skips_llm(mock_get_model, mock_url_to_markdown, analysis_cache, tmp_path):
+    """Test that the same page analyzed again for the same query is served from the cache."""
+    cache = AnalysisCache(DiskCache(str(tmp_path / "analysis.sqlite"), max_bytes=1024 * 1024, ttl_seconds=60))
+    analysis_cache.return_value = cache
+    mock_url_to_markdown.return_value = "Short page"
+    mock_get_model.return_value = FakeListChatModel(responses=["Answer"])
+
+    first = graph.invoke({"search_query": "Query", "url": "https://example.com"})
+    second = graph.invoke({"search_query": "query ", "url": "https://mirror.example.com"})
+
+    assert first["analysis_result"] == second["analysis_result"] == "Answer"
+    assert mock_get_model.call_count == 1
+    assert cache.hit_ratio() == 0.5
+
+@patch("web_page_analyzer.nodes.get_current_date")
+@patch("web_page_analyzer.nodes.url_to_markdown")
+@patch("web_page_analyzer.nodes._get_analysis_model")
+def test_cached_analysis_keyed_by_cache_query_and_date(mock_get_model, mock_url_to_markdown, mock_get_date,
+                                                       analysis_cache, tmp_path):
+    """Test that analyses are cached by the bare query, regardless of the added context, and by the current date."""
+    cache = AnalysisCache(DiskCache(str(tmp_path / "analysis.sqlite"), max_bytes=1024 * 1024, ttl_seconds=60))
+    analysis_cache.return_value = cache
+    mock_url_to_markdown.return_value = "Short page"
+    mock_get_model.return_value = FakeListChatModel(responses=["Answer"])
+    mock_get_date.return_value = "March 01, 2026"
+    url = "https://example.com"
+
+    graph.invoke({"search_query": "Query\nRationale: first", "cache_query": "Query", "url": url})
+    graph.invoke({"search_query": "Query\nRationale: second", "cache_query": "query?", "url": url})
+    assert mock_get_model.call_count == 1
+
+    mock_get_date.return_value = "March 02, 2026"
+    graph.invoke({"search_query": "Query\nRationale: first", "cache_query": "Query", "url": url})
+    assert mock_get_model.call_count == 2
+
+def test_relevance_filter_ranks_sections_against_cache_query():
+    """Test that page sections are ranked against the bare query, not the context added to the search query."""
+    page = "\n\n".join([
+        "Intro of the page.",
+        "The F1 race calendar lists every race of the season.",
+        "The original user query and the rationale for the search query were discussed at length.",
+        "Weather forecast for the weekend.",
+    ])
+    composite_query = "Original user query: F1 races\nCurrent search query: F1 race calendar\nRationale for the search query: dates"
+    config = {"configurable": {"relevance_token_budget": 30, "relevance_top_k": 2, "relevance_section_tokens": 15}}
+
+    plain = relevance_filter({"page_content": page, "search_query": "F1 race calendar", "url": "u"}, config)
+    composite = relevance_filter(
+        {"page_content": page, "search_query": composite_query, "cache_query": "F1 race calendar", "url": "u"}, config
+    )
+
+    assert "race calendar lists" in plain["page_content"]
+    assert composite == plain